@@ -46,6 +46,19 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'cadastro_pessoas.wsgi.application'
+# Aquece templates/URLs/banco ao carregar wsgi.py/asgi.py (ver pessoas/warmup.py).
+WARMUP_ON_START = not DEBUG
+# Orçamento de imports no startup de um worker, verificado por `manage.py bench_startup`.
+STARTUP_IMPORT_BUDGET_MS = 1000
+
+# Cache local do processo (linhas da listagem, ver pessoas/render.py).
+# Em produção com vários workers, prefira Redis/Memcached para compartilhar o cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 50_000},
+    }
+}
 
 DATABASES = {
     'default': {
@@ -68,6 +81,17 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = []
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic gera nomes com hash + variantes .gz/.br (ver pessoas/estaticos.py).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'pessoas.estaticos.ArmazenamentoEstatico'},
+}
+# Sem nginx na frente (DEBUG = False): serve STATIC_ROOT pelo Django, escolhendo .br/.gz.
+ESTATICOS_SERVIR_LOCAL = False
+# Sem `manage.py vendorizar_assets` o system check avisa (pessoas.W001) e o `check --deploy`
+# falha (pessoas.E001). True usa o CDN para as bibliotecas que faltarem.
+ESTATICOS_CDN_FALLBACK = False
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Bootstrap messages:
@@ -79,3 +103,26 @@ MESSAGE_TAGS = {
     messages.WARNING: 'warning',
     messages.ERROR: 'danger',
 }
+
+# Busca por CPF (LRU + filtro de Bloom, ver pessoas/cpf_lookup.py):
+CPF_BLOOM_PATH = BASE_DIR / 'var' / 'cpf_bloom.bin'
+CPF_BLOOM_FPR = 0.01
+# Segundos até a reconstrução automática, em segundo plano (None: só pelo rebuild_cpf_bloom).
+CPF_BLOOM_MAX_AGE = 60 * 60
+CPF_LOOKUP_LRU_SIZE = 10_000
+
+# Exportações (ver pessoas/exportacao.py): arquivos gerados uma vez por versão dos dados.
+EXPORT_DIR = BASE_DIR / 'var' / 'exports'
+# None = Django envia o arquivo (FileResponse). Atrás de um proxy, use
+# 'x-accel-redirect' (nginx, com `location /_exports/ { internal; alias <EXPORT_DIR>/; }`)
+# ou 'x-sendfile' (Apache mod_xsendfile) para o proxy enviar os bytes.
+EXPORT_SENDFILE = None
+EXPORT_SENDFILE_PREFIX = '/_exports/'
+
+# Controle de admissão (ver pessoas/admissao.py): execuções simultâneas por classe, somando todos os workers.
+ADMISSAO_ATIVA = True
+ADMISSAO_DIR = BASE_DIR / 'var' / 'admissao'
+ADMISSAO_CLASSES = {
+    'exportacao': {'limite': 2, 'espera': 2.0, 'retry_after': 10},
+    'relatorio': {'limite': 4, 'espera': 1.0, 'retry_after': 5},
+}
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from pessoas.estaticos import servir_estatico
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('pessoas.urls')),
 ]
+
+if settings.ESTATICOS_SERVIR_LOCAL:
+    urlpatterns.insert(0, re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'), servir_estatico))
@@ -1,7 +1,18 @@
 """WSGI config for cadastro_pessoas project."""
 
 import os
-from django.core.wsgi import get_wsgi_application
 
+# Antes de qualquer import do projeto/Django que possa ler settings.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+
+from django.conf import settings  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+from pessoas.warmup import aquecer  # noqa: E402
+
 application = get_wsgi_application()
+
+if getattr(settings, 'WARMUP_ON_START', False):
+    # Fecha as conexões abertas no aquecimento: com --preload elas seriam herdadas
+    # por todos os workers do fork.
+    aquecer(fechar_conexoes=True)
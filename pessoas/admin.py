@@ -1,8 +1,183 @@
+from __future__ import annotations
+
+import calendar
+from datetime import date
+from functools import cached_property
+
 from django.contrib import admin
-from .models import Pessoa
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import IntegerField, Max, Min, Q, Value
+from django.db.models.functions import Cast, ExtractDay, ExtractMonth, ExtractYear, Floor
+
+from .cpf import normalize_cpf
+from .forms import MESES
+from .models import Pessoa, PessoaArquivo
+from .utils import years_ago
+
+
+# -------------------------
+# Paginação com contagem estimada
+# -------------------------
+class EstimatedCountPaginator(Paginator):
+    """Evita o COUNT(*) exato em tabelas grandes.
+
+    Conta no máximo `limite` + 1 linhas, então a consulta nunca varre a tabela
+    inteira. Até `limite` a contagem é exata. Acima disso `count` fica em
+    `limite`: os links de página param aí (sem páginas finais vazias) e o
+    admin mostra "mais de `limite`" — ou, sem filtros, a estimativa das
+    estatísticas do banco (pg_class.reltuples ou sqlite_stat1), marcada como
+    aproximada. Nada de contagem inventada a partir do MAX(id).
+    """
+    limite = 10_000
+    truncado = False
+    estimativa: int | None = None
+
+    @cached_property
+    def count(self) -> int:
+        qs = self.object_list
+        if not hasattr(qs, 'query'):
+            return super().count
+
+        total = qs.order_by()[:self.limite + 1].count()
+        if total <= self.limite:
+            return total
+        self.truncado = True
+        if not qs.query.where:
+            estimativa = _estimar_linhas(qs.model, qs.db)
+            if estimativa is not None and estimativa > self.limite:
+                self.estimativa = estimativa
+        return self.limite
+
+
+def _estimar_linhas(model, using: str) -> int | None:
+    """Linhas da tabela segundo as estatísticas do banco, ou None se não houver."""
+    connection = connections[using]
+    tabela = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabela])
+            row = cursor.fetchone()
+            return int(row[0]) if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            # sqlite_stat1 só existe depois de um ANALYZE; o 1º número é a quantidade de linhas.
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone():
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabela])
+                row = cursor.fetchone()
+                if row:
+                    return int(row[0].split()[0])
+    return None
+
+
+# -------------------------
+# Filtros laterais (consultas por faixa de data_nascimento)
+# -------------------------
+class FaixaEtariaFilter(admin.SimpleListFilter):
+    title = 'faixa etária'
+    parameter_name = 'faixa'
+
+    FAIXAS = {
+        '0-17': (0, 17),
+        '18-29': (18, 29),
+        '30-49': (30, 49),
+        '50+': (50, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(k, k) for k in self.FAIXAS]
 
+    def queryset(self, request, queryset):
+        faixa = self.FAIXAS.get(self.value())
+        if not faixa:
+            return queryset
+        minimo, maximo = faixa
+        hoje = date.today()
+        # idade >= minimo  <=>  nasceu até years_ago(hoje, minimo)
+        # idade <= maximo  <=>  nasceu depois de years_ago(hoje, maximo + 1)
+        queryset = queryset.filter(data_nascimento__lte=years_ago(hoje, minimo))
+        if maximo is not None:
+            queryset = queryset.filter(data_nascimento__gt=years_ago(hoje, maximo + 1))
+        return queryset
+
+
+class MesNascimentoFilter(admin.SimpleListFilter):
+    title = 'mês de nascimento'
+    parameter_name = 'mes'
+
+    def lookups(self, request, model_admin):
+        return [(str(n), nome) for n, nome in MESES]
+
+    def queryset(self, request, queryset):
+        try:
+            mes = int(self.value() or 0)
+        except ValueError:
+            return queryset
+        if not 1 <= mes <= 12:
+            return queryset
+
+        # Um intervalo de datas por ano (OR de ranges) em vez de EXTRACT(month),
+        # para o banco poder usar o índice de data_nascimento.
+        anos = Pessoa.objects.aggregate(min=Min('data_nascimento'), max=Max('data_nascimento'))
+        if anos['min'] is None:
+            return queryset.none()
+        condicao = Q()
+        for ano in range(anos['min'].year, anos['max'].year + 1):
+            ultimo_dia = calendar.monthrange(ano, mes)[1]
+            condicao |= Q(data_nascimento__range=(date(ano, mes, 1), date(ano, mes, ultimo_dia)))
+        return queryset.filter(condicao)
+
+
+# -------------------------
+# Admin
+# -------------------------
 @admin.register(Pessoa)
 class PessoaAdmin(admin.ModelAdmin):
     list_display = ('nome', 'sobrenome', 'cpf', 'sexo', 'data_nascimento', 'idade')
-    search_fields = ('nome', 'sobrenome', 'cpf')
-    list_filter = ('sexo',)
+    search_fields = ('^nome', '^sobrenome')
+    list_filter = ('sexo', FaixaEtariaFilter, MesNascimentoFilter)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        hoje = date.today()
+        nascimento = (
+            ExtractYear('data_nascimento') * 10000
+            + ExtractMonth('data_nascimento') * 100
+            + ExtractDay('data_nascimento')
+        )
+        # Idade em anos completos calculada no banco: floor((AAAAMMDD_hoje - AAAAMMDD_nascimento) / 10000).
+        # Divisão com float + FLOOR explícito: `/` entre inteiros só trunca em alguns bancos (MySQL devolve decimal).
+        idade = Floor((Value(hoje.year * 10000 + hoje.month * 100 + hoje.day) - nascimento) / Value(10000.0))
+        return super().get_queryset(request).annotate(idade_db=Cast(idade, IntegerField()))
+
+    @admin.display(description='Idade', ordering='-data_nascimento')
+    def idade(self, obj):
+        return obj.idade_db
+
+    def get_search_results(self, request, queryset, search_term):
+        termo = search_term.strip()
+        digitos = normalize_cpf(termo)
+        if digitos and not any(c.isalpha() for c in termo):
+            # Busca por CPF: exata ou por prefixo, sempre pelo índice único de `cpf`.
+            if len(digitos) == 11:
+                return queryset.filter(cpf=digitos), False
+            # ':' vem logo depois de '9' na tabela ASCII: [prefixo, prefixo + ':') é o intervalo exato.
+            return queryset.filter(cpf__gte=digitos, cpf__lt=digitos + ':'), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(PessoaArquivo)
+class PessoaArquivoAdmin(admin.ModelAdmin):
+    """Somente leitura: entra e sai do arquivo por `arquivar_pessoas` / `restaurar_arquivo`."""
+    list_display = ('nome', 'sobrenome', 'cpf', 'data_nascimento', 'arquivado_em', 'motivo')
+    search_fields = ('^nome', '^sobrenome', '=cpf')
+    date_hierarchy = 'arquivado_em'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,318 @@
+"""Controle de admissão para rotas caras (exportações, filtros e estatísticas).
+
+Cada rota pesada é embrulhada em `limitar('<classe>')` em `pessoas/urls.py`.
+Cada classe tem um limite de execuções simultâneas **somado entre todos os
+workers**: são `limite` arquivos de slot em `ADMISSAO_DIR`, e executar exige
+um `flock` exclusivo em um deles. Se o processo morrer, o sistema operacional
+solta o lock sozinho, então não há vaga presa.
+
+Sem vaga, o request espera na fila por no máximo `espera` segundos e depois
+recebe `503` com `Retry-After`. Profundidade da fila, admissões após espera e
+rejeições ficam num SQLite pequeno (`ADMISSAO_DIR/metricas.sqlite3`),
+compartilhado pelos workers (`python manage.py admissao_status`). A fila é
+contada por processo, e entradas de processos mortos são descartadas.
+
+Sem `fcntl` (Windows) o limite vale por processo (semáforo em memória).
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows: limite por processo
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CLASSES_PADRAO = {
+    # classe: limite de execuções simultâneas, espera máxima na fila (s), Retry-After (s)
+    'exportacao': {'limite': 2, 'espera': 2.0, 'retry_after': 10},
+    'relatorio': {'limite': 4, 'espera': 1.0, 'retry_after': 5},
+}
+_INTERVALO_INICIAL = 0.01
+_INTERVALO_MAXIMO = 0.2
+
+
+def admissao_dir() -> Path:
+    return Path(getattr(settings, 'ADMISSAO_DIR', Path(settings.BASE_DIR) / 'var' / 'admissao'))
+
+
+def config_classe(classe: str) -> dict:
+    classes = {**CLASSES_PADRAO, **getattr(settings, 'ADMISSAO_CLASSES', {})}
+    return {**CLASSES_PADRAO.get(classe, CLASSES_PADRAO['relatorio']), **classes.get(classe, {})}
+
+
+# -------------------------
+# Vagas (semáforo entre processos)
+# -------------------------
+class Vaga:
+    """Uma vaga ocupada; `liberar()` devolve para a classe."""
+
+    def __init__(self, fh=None, semaforo=None):
+        self._fh = fh
+        self._semaforo = semaforo
+
+    def liberar(self) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+        if self._semaforo is not None:
+            self._semaforo.release()
+            self._semaforo = None
+
+
+_semaforos: dict[tuple[str, int], threading.BoundedSemaphore] = {}
+_semaforos_lock = threading.Lock()
+
+
+def tentar_vaga(classe: str, limite: int) -> Vaga | None:
+    """Tenta ocupar uma vaga sem bloquear."""
+    if limite <= 0:
+        return None
+    if fcntl is None:
+        with _semaforos_lock:
+            semaforo = _semaforos.setdefault((classe, limite), threading.BoundedSemaphore(limite))
+        return Vaga(semaforo=semaforo) if semaforo.acquire(blocking=False) else None
+
+    pasta = admissao_dir()
+    pasta.mkdir(parents=True, exist_ok=True)
+    # Começa de um slot aleatório para não disputar sempre o primeiro arquivo.
+    inicio = int.from_bytes(os.urandom(2), 'big') % limite
+    for i in range(limite):
+        # Um open() por tentativa: flock vale por descrição de arquivo, e threads
+        # do mesmo processo também precisam disputar entre si.
+        fh = open(pasta / f'{classe}.{(inicio + i) % limite}.lock', 'a+b')
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            continue
+        return Vaga(fh=fh)
+    return None
+
+
+def adquirir(classe: str) -> Vaga | None:
+    """Ocupa uma vaga da classe, esperando na fila até o limite configurado.
+
+    Devolve None se a espera estourou (o chamador responde 503).
+    """
+    config = config_classe(classe)
+    vaga = tentar_vaga(classe, config['limite'])
+    if vaga is not None:
+        return vaga
+
+    metricas = get_metricas()
+    metricas.entrar_fila(classe)
+    prazo = time.monotonic() + config['espera']
+    intervalo = _INTERVALO_INICIAL
+    try:
+        while time.monotonic() < prazo:
+            time.sleep(min(intervalo, max(0.0, prazo - time.monotonic())))
+            vaga = tentar_vaga(classe, config['limite'])
+            if vaga is not None:
+                return vaga
+            intervalo = min(intervalo * 2, _INTERVALO_MAXIMO)
+        return None
+    finally:
+        metricas.sair_fila(classe, admitido=vaga is not None)
+
+
+# -------------------------
+# Métricas compartilhadas
+# -------------------------
+class MetricasAdmissao:
+    """Contadores por classe num SQLite próprio (não no banco da aplicação).
+
+    Só é escrito quando um request precisa esperar: o caminho rápido (vaga
+    livre) não toca em disco.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS admissao ('
+                ' classe TEXT PRIMARY KEY, fila_max INTEGER NOT NULL DEFAULT 0,'
+                ' admitidos_apos_espera INTEGER NOT NULL DEFAULT 0,'
+                ' rejeitados INTEGER NOT NULL DEFAULT 0, ultima_rejeicao REAL)'
+            )
+            # Quem está esperando agora, por processo: a profundidade da fila é a
+            # soma das linhas de processos vivos, então um worker que morre na
+            # fila não deixa o contador inflado para sempre.
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fila ('
+                ' classe TEXT NOT NULL, pid INTEGER NOT NULL, em_fila INTEGER NOT NULL,'
+                ' PRIMARY KEY (classe, pid))'
+            )
+            self._local.conn = conn
+        return conn
+
+    def _executar(self, *comandos: tuple[str, tuple]) -> None:
+        """Executa os comandos numa transação só."""
+        try:
+            conn = self._conexao()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for sql, params in comandos:
+                    conn.execute(sql, params)
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            # Métrica nunca derruba o request.
+            logger.warning('Falha ao gravar métrica de admissão', exc_info=True)
+
+    def _limpar_mortos(self) -> None:
+        """Remove da fila as entradas de processos que não existem mais."""
+        pids = [pid for (pid,) in self._conexao().execute('SELECT DISTINCT pid FROM fila')]
+        mortos = [pid for pid in pids if not _processo_vivo(pid)]
+        if mortos:
+            self._executar(*[('DELETE FROM fila WHERE pid = ?', (pid,)) for pid in mortos])
+
+    def entrar_fila(self, classe: str) -> None:
+        try:
+            self._limpar_mortos()
+        except sqlite3.Error:
+            logger.warning('Falha ao limpar a fila de admissão', exc_info=True)
+        self._executar(
+            (
+                'INSERT INTO fila (classe, pid, em_fila) VALUES (?, ?, 1) '
+                'ON CONFLICT(classe, pid) DO UPDATE SET em_fila = em_fila + 1',
+                (classe, os.getpid()),
+            ),
+            (
+                'INSERT INTO admissao (classe, fila_max) '
+                'VALUES (?, (SELECT SUM(em_fila) FROM fila WHERE classe = ?)) '
+                'ON CONFLICT(classe) DO UPDATE SET fila_max = MAX(fila_max, excluded.fila_max)',
+                (classe, classe),
+            ),
+        )
+
+    def sair_fila(self, classe: str, admitido: bool) -> None:
+        saida = (
+            ('UPDATE fila SET em_fila = em_fila - 1 WHERE classe = ? AND pid = ?', (classe, os.getpid())),
+            ('DELETE FROM fila WHERE classe = ? AND pid = ? AND em_fila <= 0', (classe, os.getpid())),
+        )
+        if admitido:
+            self._executar(*saida, (
+                'UPDATE admissao SET admitidos_apos_espera = admitidos_apos_espera + 1 WHERE classe = ?',
+                (classe,),
+            ))
+        else:
+            self._executar(*saida, (
+                'UPDATE admissao SET rejeitados = rejeitados + 1, ultima_rejeicao = ? WHERE classe = ?',
+                (time.time(), classe),
+            ))
+
+    def resumo(self) -> list[dict]:
+        self._limpar_mortos()
+        cursor = self._conexao().execute(
+            'SELECT a.classe, COALESCE((SELECT SUM(f.em_fila) FROM fila f WHERE f.classe = a.classe), 0) AS em_fila, '
+            'a.fila_max, a.admitidos_apos_espera, a.rejeitados, a.ultima_rejeicao '
+            'FROM admissao a ORDER BY a.classe'
+        )
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor]
+
+    def zerar(self) -> None:
+        # Só os contadores: quem está na fila agora continua lá.
+        self._executar(('DELETE FROM admissao', ()))
+
+
+def _processo_vivo(pid: int) -> bool:
+    if pid == os.getpid() or os.name == 'nt':
+        # No Windows os.kill(pid, 0) encerraria o processo; lá o limite já é por processo.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_metricas: MetricasAdmissao | None = None
+
+
+def get_metricas() -> MetricasAdmissao:
+    global _metricas
+    caminho = admissao_dir() / 'metricas.sqlite3'
+    if _metricas is None or _metricas.caminho != caminho:
+        _metricas = MetricasAdmissao(caminho)
+    return _metricas
+
+
+# -------------------------
+# Decorator
+# -------------------------
+def limitar(classe: str):
+    """Decorator de view: limita execuções simultâneas da `classe` entre workers."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'ADMISSAO_ATIVA', True):
+                return view(request, *args, **kwargs)
+            vaga = adquirir(classe)
+            if vaga is None:
+                return servidor_ocupado(request, classe)
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                vaga.liberar()
+                raise
+            if getattr(response, 'streaming', False):
+                # Streaming (exportações): a vaga fica ocupada até o servidor
+                # fechar a resposta (último byte enviado ou cliente desconectou).
+                _liberar_ao_fechar(response, vaga)
+            else:
+                vaga.liberar()
+            return response
+        wrapper.classe_admissao = classe
+        return wrapper
+    return decorator
+
+
+def _liberar_ao_fechar(response, vaga: Vaga) -> None:
+    """Encadeia `vaga.liberar()` no `close()` da resposta, que WSGI e ASGI sempre chamam."""
+    fechar = response.close
+
+    def close():
+        try:
+            fechar()
+        finally:
+            vaga.liberar()
+
+    response.close = close
+
+
+def servidor_ocupado(request, classe: str) -> HttpResponse:
+    retry_after = config_classe(classe)['retry_after']
+    logger.warning('Admissão rejeitada: classe=%s path=%s', classe, request.path)
+    response = HttpResponse(
+        f'⚠️ Servidor ocupado com outras operações pesadas. Tente novamente em {retry_after} segundos.',
+        status=503,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,59 @@
+"""Leitura incremental e compactação do log de alterações (`AlteracaoPessoa`).
+
+Cursor = último `seq` recebido. `desde=0` reproduz a base inteira: a migração
+0004 registrou uma inclusão por pessoa existente e a compactação só remove
+entradas que já foram superadas por outra mais nova da mesma pessoa.
+"""
+
+from __future__ import annotations
+
+import json
+
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+
+from .models import AlteracaoPessoa
+
+
+def ultimo_seq() -> int:
+    return AlteracaoPessoa.objects.aggregate(m=Max('seq'))['m'] or 0
+
+
+def iter_alteracoes(desde: int, ate: int, chunk_size: int = 5000):
+    """Alterações com desde < seq <= ate, lidas em lotes pela PK."""
+    cursor = desde
+    while cursor < ate:
+        lote = list(
+            AlteracaoPessoa.objects.filter(seq__gt=cursor, seq__lte=ate).order_by('seq')[:chunk_size]
+        )
+        if not lote:
+            return
+        yield from lote
+        cursor = lote[-1].seq
+
+
+def iter_ndjson(desde: int, ate: int, chunk_size: int = 5000):
+    for alteracao in iter_alteracoes(desde, ate, chunk_size):
+        yield json.dumps(alteracao.as_dict(), ensure_ascii=False) + '\n'
+
+
+def compactar(horizonte, chunk_size: int = 5000) -> int:
+    """Remove entradas anteriores a `horizonte` que já têm outra mais nova da mesma pessoa.
+
+    Cada lote é uma transação curta, para não segurar o lock de escrita do SQLite.
+    """
+    mais_nova = AlteracaoPessoa.objects.filter(pessoa_id=OuterRef('pessoa_id'), seq__gt=OuterRef('seq'))
+    candidatas = (
+        AlteracaoPessoa.objects
+        .filter(criado_em__lt=horizonte)
+        .filter(Exists(mais_nova))
+        .order_by('seq')
+    )
+    removidas = 0
+    while True:
+        with transaction.atomic():
+            seqs = list(candidatas.values_list('seq', flat=True)[:chunk_size])
+            if not seqs:
+                return removidas
+            AlteracaoPessoa.objects.filter(seq__in=seqs).delete()
+        removidas += len(seqs)
@@ -4,3 +4,6 @@ class PessoasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pessoas'
     verbose_name = 'Pessoas'
+
+    def ready(self):
+        from . import estaticos, signals  # noqa: F401  (estaticos registra o system check)
@@ -0,0 +1,222 @@
+"""Arquivamento quente/frio: move cadastros inativos de `Pessoa` para `PessoaArquivo`.
+
+Os registros são escolhidos por filtro (faixa de nascimento, idade do
+cadastro, tempo sem alteração ou lista de CPFs) e movidos em lotes de
+`chunk_size`, cada lote numa transação curta: no SQLite o lock de escrita
+fica preso só durante um lote, e a pausa entre lotes deixa os outros
+escritores passarem.
+
+A remoção da tabela quente usa `Pessoa.objects.filter(...).delete()`, então o
+log de alterações ganha as exclusões (`D`), o filtro de CPFs é atualizado e a
+versão das exportações muda. A restauração faz o caminho inverso com
+`bulk_create` (inclusões `I`, mesmo pk).
+
+Os pares de `CandidatoDuplicado` (com a decisão de revisão) vão junto para
+`CandidatoDuplicadoArquivo` antes do DELETE, que os apagaria em cascata, e
+voltam quando as duas pessoas do par estiverem de novo na tabela quente.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterator
+
+from django.db import models, transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from .cpf import normalize_cpf
+from .models import CandidatoDuplicado, CandidatoDuplicadoArquivo, Pessoa, PessoaArquivo
+
+FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d')
+
+
+def parse_data(texto: str) -> date:
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto.strip(), formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Data inválida: {texto!r} (use dd/mm/aaaa).')
+
+
+def ler_cpfs(caminho: str) -> list[str]:
+    """Um CPF por linha (com ou sem máscara); linhas vazias e `#comentários` são ignoradas.
+
+    Linha que não tem exatamente 11 dígitos é erro (`ValueError`), não é ignorada.
+    """
+    cpfs = []
+    with open(caminho, encoding='utf-8') as fh:
+        for numero, linha in enumerate(fh, start=1):
+            linha = linha.split('#', 1)[0].strip()
+            if not linha:
+                continue
+            cpf = normalize_cpf(linha)
+            if len(cpf) != 11:
+                raise ValueError(f'{caminho}, linha {numero}: CPF inválido {linha!r} (precisa ter 11 dígitos).')
+            cpfs.append(cpf)
+    return list(dict.fromkeys(cpfs))
+
+
+@dataclass
+class FiltroArquivo:
+    nascidos_desde: date | None = None
+    nascidos_ate: date | None = None
+    criados_ha_dias: int | None = None
+    sem_alteracao_ha_dias: int | None = None
+    cpfs: list[str] = field(default_factory=list)
+
+    @property
+    def vazio(self) -> bool:
+        return not (self.nascidos_desde or self.nascidos_ate or self.cpfs
+                    or self.criados_ha_dias is not None or self.sem_alteracao_ha_dias is not None)
+
+    def aplicar(self, qs):
+        """Vale para `Pessoa` e `PessoaArquivo` (mesmos nomes de campo)."""
+        agora = timezone.now()
+        if self.nascidos_desde:
+            qs = qs.filter(data_nascimento__gte=self.nascidos_desde)
+        if self.nascidos_ate:
+            qs = qs.filter(data_nascimento__lte=self.nascidos_ate)
+        if self.criados_ha_dias is not None:
+            qs = qs.filter(criado_em__lt=agora - timedelta(days=self.criados_ha_dias))
+        if self.sem_alteracao_ha_dias is not None:
+            qs = qs.filter(atualizado_em__lt=agora - timedelta(days=self.sem_alteracao_ha_dias))
+        return qs
+
+
+def _lotes_de_pks(qs, filtro: FiltroArquivo, chunk_size: int) -> Iterator[list[int]]:
+    """pks a mover, um lote por vez (keyset por pk, ou um lote por fatia da lista de CPFs)."""
+    qs = filtro.aplicar(qs).order_by('pk')
+    if filtro.cpfs:
+        for i in range(0, len(filtro.cpfs), chunk_size):
+            pks = list(qs.filter(cpf__in=filtro.cpfs[i:i + chunk_size]).values_list('pk', flat=True))
+            if pks:
+                yield pks
+        return
+    ultimo = None
+    while True:
+        pagina = qs if ultimo is None else qs.filter(pk__gt=ultimo)
+        pks = list(pagina.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        ultimo = pks[-1]
+
+
+def contar(filtro: FiltroArquivo, arquivo: bool = False) -> int:
+    qs = filtro.aplicar(PessoaArquivo.objects.all() if arquivo else Pessoa.objects.all())
+    return qs.filter(cpf__in=filtro.cpfs).count() if filtro.cpfs else qs.count()
+
+
+def arquivar(filtro: FiltroArquivo, motivo: str = '', chunk_size: int = 500, pausa: float = 0.05,
+             progresso: Callable[[int], None] | None = None) -> int:
+    """Move para o arquivo as pessoas do filtro; devolve quantas foram movidas."""
+    total = 0
+    for pks in _lotes_de_pks(Pessoa.objects.all(), filtro, chunk_size):
+        with transaction.atomic():
+            # Relê dentro da transação: o lote vai como está agora, não como foi listado.
+            pessoas = list(Pessoa.objects.filter(pk__in=pks))
+            PessoaArquivo.objects.bulk_create(
+                [PessoaArquivo.de_pessoa(p, motivo) for p in pessoas], batch_size=500,
+            )
+            _arquivar_pares([p.pk for p in pessoas])
+            Pessoa.objects.filter(pk__in=[p.pk for p in pessoas]).delete()
+        total += len(pessoas)
+        if progresso:
+            progresso(total)
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+
+def restaurar(filtro: FiltroArquivo, chunk_size: int = 500, pausa: float = 0.05,
+              progresso: Callable[[int], None] | None = None) -> tuple[int, list[PessoaArquivo]]:
+    """Devolve à tabela quente; (restaurados, conflitos que ficaram no arquivo).
+
+    Conflito = o CPF foi recadastrado depois do arquivamento, ou o id já foi
+    reutilizado por outra pessoa.
+    """
+    total = 0
+    conflitos: list[PessoaArquivo] = []
+    for pks in _lotes_de_pks(PessoaArquivo.objects.all(), filtro, chunk_size):
+        with transaction.atomic():
+            arquivados = list(PessoaArquivo.objects.filter(pk__in=pks))
+            ocupados_cpf = set(Pessoa.objects.filter(cpf__in=[a.cpf for a in arquivados])
+                               .values_list('cpf', flat=True))
+            ocupados_pk = set(Pessoa.objects.filter(pk__in=pks).values_list('pk', flat=True))
+            livres = []
+            for a in arquivados:
+                if a.cpf in ocupados_cpf or a.pk in ocupados_pk:
+                    conflitos.append(a)
+                else:
+                    livres.append(a)
+                    ocupados_cpf.add(a.cpf)  # mesmo CPF arquivado duas vezes: só o primeiro volta
+            if livres:
+                Pessoa.objects.bulk_create([a.para_pessoa() for a in livres], batch_size=500)
+                # bulk_create preenche criado_em com agora; volta a data original
+                # (sem passar pelo update com log: a inclusão já foi registrada).
+                models.QuerySet.update(
+                    Pessoa.objects.filter(pk__in=[a.pk for a in livres]),
+                    criado_em=Case(*[When(pk=a.pk, then=Value(a.criado_em)) for a in livres]),
+                )
+                PessoaArquivo.objects.filter(pk__in=[a.pk for a in livres]).delete()
+                _restaurar_pares([a.pk for a in livres])
+        total += len(livres)
+        if progresso:
+            progresso(total)
+        if pausa:
+            time.sleep(pausa)
+    return total, conflitos
+
+
+def _pares(model, pks: list[int]):
+    return model.objects.filter(Q(pessoa_a_id__in=pks) | Q(pessoa_b_id__in=pks))
+
+
+def _arquivar_pares(pks: list[int]) -> None:
+    """Copia os pares destas pessoas para o arquivo (o DELETE da pessoa apaga o original)."""
+    pares = list(_pares(CandidatoDuplicado, pks))
+    if pares:
+        CandidatoDuplicadoArquivo.objects.bulk_create(
+            [CandidatoDuplicadoArquivo.de_candidato(c) for c in pares], batch_size=500, ignore_conflicts=True,
+        )
+
+
+def _restaurar_pares(pks: list[int]) -> None:
+    """Devolve os pares cujas duas pessoas voltaram; os demais esperam no arquivo."""
+    pares = list(_pares(CandidatoDuplicadoArquivo, pks))
+    if not pares:
+        return
+    ids = {c.pessoa_a_id for c in pares} | {c.pessoa_b_id for c in pares}
+    ativos = set(Pessoa.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    prontos = [c for c in pares if c.pessoa_a_id in ativos and c.pessoa_b_id in ativos]
+    if prontos:
+        CandidatoDuplicado.objects.bulk_create(
+            [c.para_candidato() for c in prontos], batch_size=500, ignore_conflicts=True,
+        )
+        CandidatoDuplicadoArquivo.objects.filter(pk__in=[c.pk for c in prontos]).delete()
+
+
+def adicionar_argumentos_filtro(parser) -> None:
+    parser.add_argument('--nascidos-desde', type=parse_data, help='Nascidos a partir desta data (dd/mm/aaaa).')
+    parser.add_argument('--nascidos-ate', type=parse_data, help='Nascidos até esta data (dd/mm/aaaa).')
+    parser.add_argument('--criados-ha-dias', type=int, help='Cadastrados há mais de N dias.')
+    parser.add_argument('--sem-alteracao-ha-dias', type=int, help='Sem alteração há mais de N dias.')
+    parser.add_argument('--cpfs', help='Arquivo texto com um CPF por linha.')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Registros por transação (padrão: 500).')
+    parser.add_argument('--pausa', type=float, default=0.05,
+                        help='Segundos entre lotes, para não segurar os outros escritores (padrão: 0.05).')
+    parser.add_argument('--dry-run', action='store_true', help='Só conta quantos registros seriam movidos.')
+
+
+def filtro_das_opcoes(options: dict) -> FiltroArquivo:
+    return FiltroArquivo(
+        nascidos_desde=options.get('nascidos_desde'),
+        nascidos_ate=options.get('nascidos_ate'),
+        criados_ha_dias=options.get('criados_ha_dias'),
+        sem_alteracao_ha_dias=options.get('sem_alteracao_ha_dias'),
+        cpfs=ler_cpfs(options['cpfs']) if options.get('cpfs') else [],
+    )
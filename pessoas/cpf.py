@@ -0,0 +1,145 @@
+"""Validação de CPF (dígitos verificadores), em versão escalar e em lote.
+
+A versão escalar é usada pelo model e pelos forms. As funções `*_lote` usam
+NumPy (quando instalado) para validar/normalizar/formatar milhões de CPFs por
+segundo em importações e varreduras de qualidade (`scan_cpfs`); sem NumPy elas
+caem no laço escalar, com o mesmo resultado.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from django.core.exceptions import ValidationError
+
+_numpy = None
+
+_PESOS_DV1 = tuple(range(10, 1, -1))  # 10..2 sobre os 9 primeiros dígitos
+_PESOS_DV2 = tuple(range(11, 1, -1))  # 11..2 sobre os 10 primeiros dígitos
+_LARGURA_ENTRADA = 32  # entradas maiores que isso não são CPF (nem com máscara e espaços)
+
+
+def normalize_cpf(value: str) -> str:
+    return re.sub(r'\D+', '', value or '')
+
+
+def _digito_verificador(digitos: list[int], pesos: tuple[int, ...]) -> int:
+    return sum(d * p for d, p in zip(digitos, pesos)) * 10 % 11 % 10
+
+
+def validar_cpf(value: str) -> bool:
+    """True se `value` (com ou sem máscara) é um CPF com dígitos verificadores corretos."""
+    cpf = normalize_cpf(value)
+    if len(cpf) != 11 or cpf == cpf[0] * 11:
+        return False
+    digitos = [int(c) for c in cpf]
+    return (
+        _digito_verificador(digitos[:9], _PESOS_DV1) == digitos[9]
+        and _digito_verificador(digitos[:10], _PESOS_DV2) == digitos[10]
+    )
+
+
+def completar_cpf(nove_digitos: str) -> str:
+    """Acrescenta os dois dígitos verificadores aos 9 primeiros dígitos."""
+    digitos = [int(c) for c in nove_digitos]
+    digitos.append(_digito_verificador(digitos, _PESOS_DV1))
+    digitos.append(_digito_verificador(digitos, _PESOS_DV2))
+    return ''.join(map(str, digitos))
+
+
+def formatar_cpf(value: str) -> str:
+    cpf = (value or '').zfill(11)
+    return f"{cpf[0:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:11]}"
+
+
+def cpf_digitos_validator(value: str) -> None:
+    """Validator de model/form: confere os dois dígitos verificadores."""
+    if not validar_cpf(value):
+        raise ValidationError('CPF inválido! Os dígitos verificadores não conferem.', code='cpf_invalido')
+
+
+# -------------------------
+# Lotes (NumPy)
+# -------------------------
+def _carregar_numpy():
+    """Importa o NumPy só no primeiro lote: ele pesa no startup de todo processo
+    que carrega o model. NumPy é opcional; sem ele os lotes usam o laço escalar."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def _digitos_lote(np, cpfs: Iterable[str]):
+    """Matriz (n, 11) de dígitos e máscara de linhas com exatamente 11 dígitos."""
+    entrada = np.array(
+        [c if _entrada_ok(c) else '' for c in cpfs],
+        dtype=f'S{_LARGURA_ENTRADA}',
+    )
+    bytes_ = entrada.view(np.uint8).reshape(len(entrada), _LARGURA_ENTRADA)
+    eh_digito = (bytes_ >= ord('0')) & (bytes_ <= ord('9'))
+    formato_ok = eh_digito.sum(axis=1) == 11
+
+    digitos = bytes_[:, :11].astype(np.int16) - ord('0')
+    # Linhas com máscara (pontos, traço, espaços): ordenação estável "dígitos
+    # primeiro" tira os separadores sem laço em Python. CPFs já limpos pulam isso.
+    mascarados = formato_ok & ~eh_digito[:, :11].all(axis=1)
+    if mascarados.any():
+        ordem = np.argsort(~eh_digito[mascarados], axis=1, kind='stable')[:, :11]
+        digitos[mascarados] = np.take_along_axis(bytes_[mascarados], ordem, axis=1).astype(np.int16) - ord('0')
+    digitos[~formato_ok] = 0
+    return digitos, formato_ok
+
+
+def _entrada_ok(c: str) -> bool:
+    """Mesmo corte de `_digitos_lote`, para o laço escalar dar o mesmo resultado."""
+    return len(c) <= _LARGURA_ENTRADA and c.isascii()
+
+
+def validar_lote(cpfs: Iterable[str]) -> list[bool]:
+    """True onde o CPF (com ou sem máscara) tem 11 dígitos e verificadores corretos."""
+    np = _carregar_numpy()
+    if np is None:
+        return [_entrada_ok(c) and validar_cpf(c) for c in cpfs]
+
+    digitos, formato_ok = _digitos_lote(np, cpfs)
+    dv1 = (digitos[:, :9] @ np.array(_PESOS_DV1, dtype=np.int16)) * 10 % 11 % 10
+    dv2 = (digitos[:, :10] @ np.array(_PESOS_DV2, dtype=np.int16)) * 10 % 11 % 10
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    return (formato_ok & ~repetidos & (dv1 == digitos[:, 9]) & (dv2 == digitos[:, 10])).tolist()
+
+
+def normalizar_lote(cpfs: Iterable[str]) -> list[str]:
+    """Somente os 11 dígitos de cada CPF; '' quando a entrada não tem 11 dígitos."""
+    np = _carregar_numpy()
+    if np is None:
+        normalizados = (normalize_cpf(c) if _entrada_ok(c) else '' for c in cpfs)
+        return [c if len(c) == 11 else '' for c in normalizados]
+
+    digitos, formato_ok = _digitos_lote(np, cpfs)
+    saida = (digitos + ord('0')).astype(np.uint8).view('S11').ravel()
+    saida[~formato_ok] = b''
+    return saida.astype('U11').tolist()
+
+
+def formatar_lote(cpfs: Iterable[str]) -> list[str]:
+    """Formata como `000.000.000-00` (igual a `Pessoa.cpf_formatado`); '' se não tiver 11 dígitos."""
+    np = _carregar_numpy()
+    if np is None:
+        normalizados = (normalize_cpf(c) if _entrada_ok(c) else '' for c in cpfs)
+        return [formatar_cpf(c) if len(c) == 11 else '' for c in normalizados]
+
+    digitos, formato_ok = _digitos_lote(np, cpfs)
+    n = len(digitos)
+    saida = np.empty((n, 14), dtype=np.uint8)
+    saida[:, [3, 7]] = ord('.')
+    saida[:, 11] = ord('-')
+    saida[:, [0, 1, 2, 4, 5, 6, 8, 9, 10, 12, 13]] = digitos + ord('0')
+    saida = saida.view('S14').ravel()
+    saida[~formato_ok] = b''
+    return saida.astype('U14').tolist()
@@ -0,0 +1,486 @@
+"""Consulta de CPF com cache LRU (CPF -> pk) e filtro de Bloom persistido.
+
+A maioria das buscas por CPF erra (CPF digitado errado). O filtro de Bloom
+responde "com certeza não existe" sem tocar no banco; acertos recentes ficam
+num LRU em memória. O banco (índice único de `cpf`) continua sendo a fonte da
+verdade: o filtro só pode dar falso positivo, nunca falso negativo.
+
+Consistência entre processos:
+- o filtro é gravado em disco (`CPF_BLOOM_PATH`) e reconstruído pelo
+  `rebuild_cpf_bloom` (cron) ou, passados `CPF_BLOOM_MAX_AGE` segundos, por
+  uma thread em segundo plano. Um lock de arquivo garante uma reconstrução por
+  vez entre todos os workers; o request nunca espera por ela: enquanto isso
+  vale o filtro antigo + journal (ou nenhum filtro, se o arquivo não existe);
+- inserções, trocas de CPF e exclusões são anotadas, após o commit, num
+  journal append-only ao lado do filtro (`+cpf` / `-cpf`). Cada consulta faz um
+  `stat` no journal e aplica as linhas novas: `+` entra no filtro e `±` tira o
+  CPF do LRU. `*` (de `invalidate()`) desliga o filtro carregado até chegar um
+  reconstruído depois dele.
+- uma consulta ao banco relê o journal antes de entrar no LRU e é descartada
+  se o CPF mudou (ou houve `*`) enquanto ela rodava.
+
+`Pessoa.objects.bulk_create()` e `.update()` (que não disparam sinais) avisam o
+serviço sozinhos após o commit; SQL cru precisa chamar `invalidate()` à mão.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock de arquivo, o journal continua funcionando
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_ESPERA_NOVA_TENTATIVA = 30.0  # segundos entre tentativas de reconstrução que falharam
+
+
+class BloomFilter:
+    """Filtro de Bloom simples (double hashing sobre blake2b)."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytearray | None = None, count: int = 0):
+        self.num_bits = max(8, int(num_bits))
+        self.num_hashes = max(1, int(num_hashes))
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fpr: float) -> 'BloomFilter':
+        capacity = max(1, int(capacity))
+        num_bits = math.ceil(-capacity * math.log(fpr) / (math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def estimated_fpr(self) -> float:
+        """Taxa teórica de falso positivo para a quantidade de itens inseridos."""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class CPFLookup:
+    def __init__(self, path: Path, lru_size: int = 10_000, fpr: float = 0.01, max_age: float | None = 3600):
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix('.journal')
+        self.lock_path = self.path.with_suffix('.lock')
+        self.lru_size = lru_size
+        self.fpr = fpr
+        self.max_age = max_age
+
+        self._lock = threading.RLock()
+        self._lru: OrderedDict[str, int] = OrderedDict()
+        # Geração: sobe a cada `+`/`-`/`*` aplicado. Uma consulta ao banco só
+        # entra no LRU se nada mudou o CPF (ou descartou tudo) enquanto ela rodava.
+        self._geracao = 0
+        self._geracao_descarte = 0
+        self._consultando: dict[str, int] = {}  # CPF -> consultas ao banco em andamento
+        self._mudou_em: dict[str, int] = {}  # só CPFs em `_consultando`
+        self._bloom: BloomFilter | None = None
+        self._bloom_stat: tuple[int, int] | None = None  # (inode, mtime_ns) do arquivo carregado
+        self._bloom_criado_em = 0.0
+        self._journal_ino: int | None = None
+        self._journal_offset = 0
+        self._invalidado_em = 0.0  # filtros criados antes disso não valem
+        self._reconstrucao: threading.Thread | None = None
+        self._proxima_tentativa = 0.0
+        self._stats = dict.fromkeys(
+            ('consultas', 'lru_hits', 'bloom_negativos', 'consultas_banco', 'encontrados_banco', 'falsos_positivos'), 0
+        )
+
+    @classmethod
+    def from_settings(cls) -> 'CPFLookup':
+        return cls(
+            path=getattr(settings, 'CPF_BLOOM_PATH', Path(settings.BASE_DIR) / 'var' / 'cpf_bloom.bin'),
+            lru_size=getattr(settings, 'CPF_LOOKUP_LRU_SIZE', 10_000),
+            fpr=getattr(settings, 'CPF_BLOOM_FPR', 0.01),
+            max_age=getattr(settings, 'CPF_BLOOM_MAX_AGE', 3600),
+        )
+
+    # -------------------------
+    # Consultas
+    # -------------------------
+    def buscar_pk(self, cpf: str) -> int | None:
+        """Retorna o pk da pessoa com este CPF (11 dígitos) ou None."""
+        from .models import Pessoa
+
+        with self._lock:
+            self._sync()
+            self._stats['consultas'] += 1
+
+            pk = self._lru.get(cpf)
+            if pk is not None:
+                self._lru.move_to_end(cpf)
+                self._stats['lru_hits'] += 1
+                return pk
+
+            if self._bloom is not None and cpf not in self._bloom:
+                self._stats['bloom_negativos'] += 1
+                return None
+
+            inicio = self._geracao
+            self._consultando[cpf] = self._consultando.get(cpf, 0) + 1
+
+        try:
+            pk = Pessoa.objects.filter(cpf=cpf).values_list('pk', flat=True).first()
+        finally:
+            with self._lock:
+                # Aplica o que outro processo anotou durante a consulta antes de decidir.
+                self._sync()
+                valido = self._geracao_descarte <= inicio and self._mudou_em.get(cpf, 0) <= inicio
+                self._consultando[cpf] -= 1
+                if not self._consultando[cpf]:
+                    del self._consultando[cpf]
+                    self._mudou_em.pop(cpf, None)
+
+        with self._lock:
+            self._stats['consultas_banco'] += 1
+            if pk is None:
+                if self._bloom is not None:
+                    self._stats['falsos_positivos'] += 1
+                return None
+            self._stats['encontrados_banco'] += 1
+            if valido:
+                self._lembrar(cpf, pk)
+        return pk
+
+    def existe(self, cpf: str, exclude_pk: int | None = None) -> bool:
+        pk = self.buscar_pk(cpf)
+        return pk is not None and pk != exclude_pk
+
+    def carregar(self) -> None:
+        """Lê o filtro do disco e aplica o journal, sem fazer consulta (nem contar nas estatísticas)."""
+        with self._lock:
+            self._sync()
+
+    # -------------------------
+    # Invalidação
+    # -------------------------
+    def registrar_insercao(self, cpf: str, pk: int) -> None:
+        """CPF passou a existir (novo cadastro ou CPF editado). Chamar após o commit."""
+        self.registrar_insercoes([(cpf, pk)])
+
+    def registrar_insercoes(self, pares: list[tuple[str, int]]) -> None:
+        with self._lock:
+            for cpf, pk in pares:
+                if self._bloom is not None:
+                    self._bloom.add(cpf)
+                self._alterado(cpf)
+                self._lembrar(cpf, pk)
+        self._anotar_journal(*(f'+{cpf}' for cpf, _pk in pares))
+
+    def registrar_remocao(self, cpf: str) -> None:
+        """CPF deixou de existir (exclusão ou CPF antigo de uma edição)."""
+        with self._lock:
+            self._alterado(cpf)
+            self._lru.pop(cpf, None)
+        self._anotar_journal(f'-{cpf}')
+
+    def invalidate(self) -> None:
+        """Após SQL cru que mudou CPFs: descarta o LRU e para de confiar no filtro atual.
+
+        Vale para todos os processos (linha `*` no journal). Até o filtro ser
+        reconstruído (em segundo plano ou pelo `rebuild_cpf_bloom`), toda busca
+        vai ao banco.
+        """
+        agora = time.time()
+        with self._lock:
+            self._descartar(agora)
+        self._anotar_journal(f'*{agora}')
+        self._agendar_reconstrucao(forcar=True)
+
+    # -------------------------
+    # Construção / persistência do filtro
+    # -------------------------
+    def rebuild(self) -> BloomFilter:
+        """Relê os CPFs do banco e grava o filtro (espera outra reconstrução em andamento)."""
+        with self._travar_reconstrucao(esperar=True):
+            return self._reconstruir()
+
+    def _reconstruir(self) -> BloomFilter:
+        from .models import Pessoa
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Tudo que foi anotado antes deste offset já estava commitado quando a
+        # leitura do banco começou; o que vier depois é reaplicado a partir do journal.
+        offset = self._tamanho_journal()
+        inicio = time.time()
+
+        total = Pessoa.objects.count()
+        bloom = BloomFilter.for_capacity(max(1000, int(total * 1.25)), self.fpr)
+        for cpf in Pessoa.objects.values_list('cpf', flat=True).order_by().iterator(chunk_size=5000):
+            bloom.add(cpf)
+
+        header = {
+            'num_bits': bloom.num_bits,
+            'num_hashes': bloom.num_hashes,
+            'count': bloom.count,
+            'criado_em': inicio,
+            'journal_offset': 0,
+        }
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as fh:
+            fh.write(json.dumps(header).encode() + b'\n')
+            fh.write(bloom.bits)
+        os.replace(tmp, self.path)
+
+        self._rotacionar_journal(offset)
+        logger.info('Filtro de CPF reconstruído: %s CPFs, %s bits, FPR estimada %.4f',
+                    bloom.count, bloom.num_bits, bloom.estimated_fpr())
+
+        with self._lock:
+            self._bloom = None
+            self._bloom_stat = None
+        return bloom
+
+    def _carregar(self) -> None:
+        try:
+            with open(self.path, 'rb') as fh:
+                st = os.fstat(fh.fileno())
+                header = json.loads(fh.readline())
+                bits = bytearray(fh.read())
+        except FileNotFoundError:
+            # Sem filtro: toda busca vai ao banco até alguém gerar o arquivo.
+            if self._bloom_stat is not None:
+                self._journal_ino = None
+                self._journal_offset = 0
+            self._bloom = None
+            self._bloom_stat = None
+            return
+
+        self._bloom_stat = (st.st_ino, st.st_mtime_ns)
+        self._bloom_criado_em = header['criado_em']
+        self._journal_ino = None
+        self._journal_offset = header['journal_offset']
+        if header['criado_em'] < self._invalidado_em:
+            self._bloom = None  # gerado antes do último invalidate(): não vale
+        else:
+            self._bloom = BloomFilter(header['num_bits'], header['num_hashes'], bits, header['count'])
+
+    def _alterado(self, cpf: str) -> None:
+        self._geracao += 1
+        if cpf in self._consultando:
+            self._mudou_em[cpf] = self._geracao
+
+    def _descartar(self, invalidado_em: float) -> None:
+        self._geracao += 1
+        self._geracao_descarte = self._geracao
+        self._lru.clear()
+        self._invalidado_em = max(self._invalidado_em, invalidado_em)
+        if self._bloom is not None and self._bloom_criado_em < invalidado_em:
+            self._bloom = None
+
+    def _sync(self) -> None:
+        """Recarrega o filtro se o arquivo mudou e aplica as linhas novas do journal.
+
+        Nunca reconstrói aqui: filtro velho ou ausente só agenda a reconstrução
+        em segundo plano.
+        """
+        try:
+            st = self.path.stat()
+            bloom_stat = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            bloom_stat = None
+
+        if bloom_stat != self._bloom_stat or (self._bloom is None and self._bloom_stat is None):
+            self._carregar()
+        if self._bloom is None or self._expirado():
+            self._agendar_reconstrucao()
+
+        try:
+            jst = self.journal_path.stat()
+        except FileNotFoundError:
+            return
+        if self._journal_ino is not None and jst.st_ino != self._journal_ino:
+            # Journal rotacionado por outro processo: o filtro novo já foi gravado antes.
+            self._carregar()
+        if jst.st_size <= self._journal_offset:
+            self._journal_ino = jst.st_ino
+            return
+
+        with open(self.journal_path, 'rb') as fh:
+            fh.seek(self._journal_offset)
+            dados = fh.read()
+        fim = dados.rfind(b'\n') + 1  # ignora uma linha ainda sendo escrita
+        for linha in dados[:fim].decode().splitlines():
+            op, valor = linha[:1], linha[1:]
+            if op == '*':
+                self._descartar(float(valor))
+                continue
+            self._alterado(valor)
+            self._lru.pop(valor, None)
+            if op == '+' and self._bloom is not None:
+                self._bloom.add(valor)
+        self._journal_ino = jst.st_ino
+        self._journal_offset += fim
+
+    def _expirado(self) -> bool:
+        return bool(self.max_age) and time.time() - self._bloom_criado_em > self.max_age
+
+    # -------------------------
+    # Reconstrução em segundo plano
+    # -------------------------
+    def _agendar_reconstrucao(self, forcar: bool = False) -> None:
+        """Dispara uma thread de reconstrução, se não houver uma rodando neste processo."""
+        if not self.max_age:
+            return  # reconstrução só pelo comando (cron)
+        with self._lock:
+            if self._reconstrucao is not None and self._reconstrucao.is_alive():
+                return
+            if not forcar and time.monotonic() < self._proxima_tentativa:
+                return
+            self._reconstrucao = threading.Thread(
+                target=self._reconstruir_em_segundo_plano, name='cpf-bloom-rebuild', daemon=True,
+            )
+            self._reconstrucao.start()
+
+    def _reconstruir_em_segundo_plano(self) -> None:
+        from django.db import connection
+
+        try:
+            with self._travar_reconstrucao(esperar=False) as travado:
+                # Outro worker pode ter acabado de gravar um filtro novo: relê antes de decidir.
+                if travado and self._precisa_reconstruir():
+                    self._reconstruir()
+                    return
+        except Exception:
+            logger.exception('Falha ao reconstruir o filtro de CPF em segundo plano')
+        finally:
+            connection.close()
+        # Falhou, ou outro worker está reconstruindo: não tenta de novo a cada request.
+        with self._lock:
+            self._proxima_tentativa = time.monotonic() + _ESPERA_NOVA_TENTATIVA
+
+
+    def _precisa_reconstruir(self) -> bool:
+        try:
+            with open(self.path, 'rb') as fh:
+                criado_em = json.loads(fh.readline())['criado_em']
+        except (FileNotFoundError, ValueError, KeyError):
+            return True
+        with self._lock:
+            invalidado_em = self._invalidado_em
+        return criado_em < invalidado_em or (bool(self.max_age) and time.time() - criado_em > self.max_age)
+
+    @contextmanager
+    def _travar_reconstrucao(self, esperar: bool):
+        """Lock de arquivo entre processos; devolve False se outro já está reconstruindo."""
+        if fcntl is None:
+            yield True
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a+b') as fh:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _tamanho_journal(self) -> int:
+        try:
+            return self.journal_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _anotar_journal(self, *linhas: str) -> None:
+        if not linhas:
+            return
+        conteudo = ''.join(f'{linha}\n' for linha in linhas).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            with open(self.journal_path, 'ab') as fh:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                    # Se o journal foi rotacionado enquanto esperávamos o lock, reabre.
+                    try:
+                        if os.fstat(fh.fileno()).st_ino != os.stat(self.journal_path).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                fh.write(conteudo)
+                return
+
+    def _rotacionar_journal(self, offset: int) -> None:
+        """Mantém só o trecho do journal posterior ao início da reconstrução."""
+        if not self.journal_path.exists():
+            return
+        tmp = self.journal_path.with_suffix('.journal.tmp')
+        with open(self.journal_path, 'rb') as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            fh.seek(offset)
+            with open(tmp, 'wb') as out:
+                out.write(fh.read())
+            os.replace(tmp, self.journal_path)
+
+    def _lembrar(self, cpf: str, pk: int) -> None:
+        self._lru[cpf] = pk
+        self._lru.move_to_end(cpf)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    # -------------------------
+    # Métricas
+    # -------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            ausentes = s['bloom_negativos'] + s['falsos_positivos']
+            s['taxa_acerto_lru'] = round(s['lru_hits'] / s['consultas'], 4) if s['consultas'] else 0.0
+            s['taxa_sem_banco'] = (
+                round((s['lru_hits'] + s['bloom_negativos']) / s['consultas'], 4) if s['consultas'] else 0.0
+            )
+            s['taxa_falso_positivo'] = round(s['falsos_positivos'] / ausentes, 4) if ausentes else 0.0
+            s['lru_tamanho'] = len(self._lru)
+            if self._bloom is not None:
+                s['bloom_itens'] = self._bloom.count
+                s['bloom_bits'] = self._bloom.num_bits
+                s['bloom_fpr_estimada'] = round(self._bloom.estimated_fpr(), 6)
+                s['bloom_idade_s'] = round(time.time() - self._bloom_criado_em, 1)
+            return s
+
+
+_instance: CPFLookup | None = None
+_instance_lock = threading.Lock()
+
+
+def get_cpf_lookup() -> CPFLookup:
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = CPFLookup.from_settings()
+    return _instance
@@ -0,0 +1,138 @@
+"""Detecção de cadastros duplicados (mesma pessoa com CPF diferente ou com erro de digitação).
+
+Comparar todos contra todos é O(n²). Aqui cada pessoa cai em poucos "blocos"
+(chaves de agrupamento) e só pares do mesmo bloco são comparados:
+
+- `sobrenome normalizado + data de nascimento`;
+- `chave fonética do nome + data de nascimento` (pega erros no sobrenome);
+- `chave fonética do nome + sobrenome normalizado`, sem data (pega erros na
+  data de nascimento).
+
+As duas primeiras contêm a data de nascimento, então o comando
+`find_duplicates` lê a tabela ordenada por data e fecha os blocos de uma data
+antes de ler a próxima. A terceira é montada numa segunda passada, com a
+tabela ordenada por sobrenome. Nos dois casos a memória fica limitada a um
+dia de nascimentos / um sobrenome e o custo é quase linear. Blocos maiores que
+`max_bloco` são ignorados (nomes muito comuns não ajudam a decidir nada e
+fariam o custo voltar a ser quadrático).
+
+O score vem de nome + sobrenome, multiplicado pela semelhança das datas; o
+CPF só soma (cadastro duplicado costuma ter justamente CPF diferente).
+
+Este módulo não importa nada do Django: as funções rodam nos processos do pool.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from itertools import combinations
+
+try:
+    from rapidfuzz.distance import Indel
+except ImportError:  # rapidfuzz é opcional; difflib dá o mesmo ratio, só que mais devagar
+    Indel = None
+
+# (pk, nome, sobrenome, cpf[, data de nascimento em ISO]) — sem a data, as duas
+# pessoas são tratadas como nascidas no mesmo dia.
+Registro = tuple
+
+PESO_NOME = 0.5
+PESO_SOBRENOME = 0.5
+BONUS_CPF = 0.1  # CPF parecido só aumenta o score, nunca derruba
+SIMILARIDADE_DATA_ERRO = 0.9  # um dígito errado ou dia/mês trocados
+LIMIAR_PADRAO = 0.85
+
+
+def normalizar_texto(value: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados."""
+    sem_acento = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode()
+    return ' '.join(sem_acento.lower().split())
+
+
+_FONETICA_REGRAS = [
+    (r'ph', 'f'), (r'th', 't'), (r'[cs]h', 'x'), (r'lh', 'l'), (r'nh', 'n'),
+    (r'qu', 'k'), (r'gu(?=[ei])', 'g'), (r'g(?=[ei])', 'j'), (r'c(?=[ei])', 's'),
+    (r'c', 'k'), (r'q', 'k'), (r'z', 's'), (r'x', 's'), (r'y', 'i'), (r'w', 'v'), (r'h', ''),
+    (r'([a-z])\1+', r'\1'),
+]
+
+
+def chave_fonetica(value: str) -> str:
+    """Chave fonética simplificada para português (Thiago ~ Tiago, Luiz ~ Luis)."""
+    texto = re.sub(r'[^a-z]', '', normalizar_texto(value).split(' ')[0] if value else '')
+    if not texto:
+        return ''
+    for padrao, troca in _FONETICA_REGRAS:
+        texto = re.sub(padrao, troca, texto)
+    # Primeira letra + consoantes: vogais variam muito em erros de digitação.
+    return texto[:1] + re.sub(r'[aeiou]', '', texto[1:])
+
+
+def chaves_de_bloco(nome: str, sobrenome: str, nascimento_iso: str) -> list[str]:
+    chaves = [f's:{normalizar_texto(sobrenome)}|{nascimento_iso}']
+    fonetica = chave_fonetica(nome)
+    if fonetica:
+        chaves.append(f'f:{fonetica}|{nascimento_iso}')
+    return chaves
+
+
+def chave_sem_data(nome: str, sobrenome: str) -> str:
+    fonetica = chave_fonetica(nome)
+    return f'n:{fonetica}|{normalizar_texto(sobrenome)}' if fonetica else ''
+
+
+def similaridade(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    if Indel is not None:
+        return Indel.normalized_similarity(a, b)
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def similaridade_cpf(a: str, b: str) -> float:
+    """Fração de posições iguais (erro de digitação troca um ou dois dígitos)."""
+    if len(a) != len(b) or not a:
+        return 0.0
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def similaridade_data(a: str, b: str) -> float:
+    """1 para datas iguais; `SIMILARIDADE_DATA_ERRO` para erro de digitação; 0 para o resto."""
+    if a == b:
+        return 1.0
+    if len(a) != len(b) or len(a) != 10:
+        return 0.0
+    if sum(x != y for x, y in zip(a, b)) == 1:
+        return SIMILARIDADE_DATA_ERRO
+    # AAAA-MM-DD: dia e mês trocados na digitação
+    if a[:4] == b[:4] and a[5:7] == b[8:10] and a[8:10] == b[5:7]:
+        return SIMILARIDADE_DATA_ERRO
+    return 0.0
+
+
+def pontuar_par(a: Registro, b: Registro) -> float:
+    nomes = (
+        PESO_NOME * similaridade(normalizar_texto(a[1]), normalizar_texto(b[1]))
+        + PESO_SOBRENOME * similaridade(normalizar_texto(a[2]), normalizar_texto(b[2]))
+    )
+    if len(a) > 4 and len(b) > 4:
+        nomes *= similaridade_data(a[4], b[4])
+    return min(1.0, nomes + BONUS_CPF * similaridade_cpf(a[3], b[3]))
+
+
+def comparar_blocos(blocos: list[tuple[str, list[Registro]]], limiar: float) -> list[tuple[int, int, float, str]]:
+    """Compara os pares dentro de cada bloco; devolve (pk_menor, pk_maior, score, chave)."""
+    pares: dict[tuple[int, int], tuple[float, str]] = {}
+    for chave, registros in blocos:
+        for a, b in combinations(registros, 2):
+            par = (a[0], b[0]) if a[0] < b[0] else (b[0], a[0])
+            if par in pares:
+                continue
+            score = pontuar_par(a, b)
+            if score >= limiar:
+                pares[par] = (round(score, 4), chave)
+    return [(pa, pb, score, chave) for (pa, pb), (score, chave) in pares.items()]
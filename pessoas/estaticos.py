@@ -0,0 +1,230 @@
+"""Arquivos estáticos servidos pelo próprio projeto (sem CDN).
+
+- `VENDOR`: Bootstrap, Bootstrap Icons e Chart.js em versões fixas, guardados em
+  `pessoas/static/pessoas/vendor/` (baixados por `python manage.py vendorizar_assets`);
+- `ArmazenamentoEstatico`: o `collectstatic` gera nomes com hash do conteúdo
+  (manifest) e, para cada arquivo de texto, as variantes `.gz` e `.br` (brotli,
+  se o pacote estiver instalado);
+- `servir_estatico`: modo local (sem nginx) que escolhe a variante comprimida
+  pelo `Accept-Encoding` e manda cache de 1 ano para os nomes com hash.
+
+Arquivo do vendor faltando gera aviso em todo comando (`pessoas.W001`) e erro
+no `check --deploy` (`pessoas.E001`): rode `vendorizar_assets` e versione os
+arquivos. `ESTATICOS_CDN_FALLBACK = True` faz a tag `{% vendor %}` usar a URL
+do CDN para o que faltar.
+
+Sem manifest (checkout limpo, testes, antes do `collectstatic`) o
+`ArmazenamentoEstatico` devolve a URL sem hash em vez de levantar erro.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import posixpath
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core import checks
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, StaticFilesStorage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só há a variante .gz
+    brotli = None
+
+
+@dataclass(frozen=True)
+class Asset:
+    caminho: str  # relativo ao STATIC_ROOT / pasta static do app
+    cdn: str
+    tipo: str  # 'css' ou 'js'
+
+
+_JSDELIVR = 'https://cdn.jsdelivr.net/npm/'
+BOOTSTRAP = '5.3.3'
+BOOTSTRAP_ICONS = '1.11.3'
+CHARTJS = '4.4.1'
+
+VENDOR = {
+    'bootstrap_css': Asset(
+        f'pessoas/vendor/bootstrap-{BOOTSTRAP}/bootstrap.min.css',
+        f'{_JSDELIVR}bootstrap@{BOOTSTRAP}/dist/css/bootstrap.min.css', 'css'),
+    'bootstrap_js': Asset(
+        f'pessoas/vendor/bootstrap-{BOOTSTRAP}/bootstrap.bundle.min.js',
+        f'{_JSDELIVR}bootstrap@{BOOTSTRAP}/dist/js/bootstrap.bundle.min.js', 'js'),
+    'bootstrap_icons': Asset(
+        f'pessoas/vendor/bootstrap-icons-{BOOTSTRAP_ICONS}/bootstrap-icons.min.css',
+        f'{_JSDELIVR}bootstrap-icons@{BOOTSTRAP_ICONS}/font/bootstrap-icons.min.css', 'css'),
+    'chartjs': Asset(
+        f'pessoas/vendor/chartjs-{CHARTJS}/chart.umd.min.js',
+        f'{_JSDELIVR}chart.js@{CHARTJS}/dist/chart.umd.min.js', 'js'),
+}
+
+# Arquivos referenciados pelo CSS dos ícones (url(./fonts/...)), baixados junto.
+VENDOR_EXTRAS = {
+    f'pessoas/vendor/bootstrap-icons-{BOOTSTRAP_ICONS}/fonts/bootstrap-icons.woff2':
+        f'{_JSDELIVR}bootstrap-icons@{BOOTSTRAP_ICONS}/font/fonts/bootstrap-icons.woff2',
+    f'pessoas/vendor/bootstrap-icons-{BOOTSTRAP_ICONS}/fonts/bootstrap-icons.woff':
+        f'{_JSDELIVR}bootstrap-icons@{BOOTSTRAP_ICONS}/font/fonts/bootstrap-icons.woff',
+}
+
+
+@lru_cache(maxsize=None)
+def vendorizado(caminho: str) -> bool:
+    return finders.find(caminho) is not None
+
+
+def vendor_ausente() -> list[str]:
+    return [c for c in [a.caminho for a in VENDOR.values()] + list(VENDOR_EXTRAS) if finders.find(c) is None]
+
+
+@checks.register(checks.Tags.staticfiles)
+def verificar_vendor(app_configs=None, **kwargs):
+    """Aviso em todo comando: sem os arquivos do vendor as páginas vão ao CDN (ou ficam sem estilo)."""
+    faltando = vendor_ausente()
+    if not faltando:
+        return []
+    destino = 'do CDN' if getattr(settings, 'ESTATICOS_CDN_FALLBACK', False) else 'sem CSS/JS'
+    lista = ', '.join(faltando)
+    return [checks.Warning(
+        f'Arquivos do vendor ausentes; as páginas vão carregar {destino}: {lista}',
+        hint='Rode `python manage.py vendorizar_assets` e versione os arquivos.',
+        id='pessoas.W001',
+    )]
+
+
+@checks.register(checks.Tags.staticfiles, deploy=True)
+def verificar_vendor_deploy(app_configs=None, **kwargs):
+    """`check --deploy`: publicar sem o vendor é erro (a menos que o CDN seja aceito de propósito)."""
+    faltando = vendor_ausente()
+    if not faltando or getattr(settings, 'ESTATICOS_CDN_FALLBACK', False):
+        return []
+    lista = ', '.join(faltando)
+    return [checks.Error(
+        f'Arquivos do vendor ausentes: {lista}',
+        hint='Rode `python manage.py vendorizar_assets` antes do deploy '
+             '(ou ESTATICOS_CDN_FALLBACK = True para usar o CDN).',
+        id='pessoas.E001',
+    )]
+
+
+# -------------------------
+# collectstatic: hash no nome + variantes comprimidas
+# -------------------------
+COMPRIMIVEIS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+TAMANHO_MINIMO = 512  # abaixo disso o cabeçalho do gzip come o ganho
+
+
+class ArmazenamentoEstatico(ManifestStaticFilesStorage):
+    manifest_strict = False  # arquivo novo depois do collectstatic: calcula o hash em vez de 500
+
+    def url(self, name, force=False):
+        if not self.hashed_files:
+            # Sem staticfiles.json (collectstatic ainda não rodou): URL simples, como o StaticFilesStorage.
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Depois do manifest pronto: comprime os nomes finais (com hash) e os originais.
+        for nome in list(self.hashed_files.values()) + list(paths):
+            if nome.endswith(COMPRIMIVEIS) and self.exists(nome):
+                self._comprimir(nome)
+
+    def _comprimir(self, nome: str) -> None:
+        caminho = self.path(nome)
+        with open(caminho, 'rb') as fh:
+            dados = fh.read()
+        if len(dados) < TAMANHO_MINIMO:
+            return
+        variantes = {'.gz': gzip.compress(dados, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(dados, quality=11)
+        for sufixo, comprimido in variantes.items():
+            destino = caminho + sufixo
+            if len(comprimido) >= len(dados):
+                # Não compensa: remove variante velha para não servir conteúdo desatualizado.
+                if os.path.exists(destino):
+                    os.unlink(destino)
+                continue
+            with open(destino, 'wb') as fh:
+                fh.write(comprimido)
+
+
+# -------------------------
+# Servidor local (ESTATICOS_SERVIR_LOCAL)
+# -------------------------
+# Nome gerado pelo ManifestStaticFilesStorage: nome.<12 hex>.ext
+_NOME_COM_HASH = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_CURTO = 'public, max-age=300'
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def aceita_encoding(accept_encoding: str, encoding: str) -> bool:
+    """`encoding` é aceito pelo header `Accept-Encoding`? Respeita q-values (`gzip;q=0` recusa)."""
+    q_curinga = None
+    for item in accept_encoding.lower().split(','):
+        nome, _, parametros = item.partition(';')
+        nome = nome.strip()
+        q = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.partition('=')
+            if chave.strip() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if nome == encoding:
+            return q > 0
+        if nome == '*':
+            q_curinga = q
+    return q_curinga is not None and q_curinga > 0
+
+
+def _aceita(request, encoding: str) -> bool:
+    return aceita_encoding(request.headers.get('Accept-Encoding', ''), encoding)
+
+
+@require_safe
+def servir_estatico(request, path: str):
+    """Serve STATIC_ROOT escolhendo .br/.gz pré-comprimidos conforme o Accept-Encoding."""
+    raiz = os.path.realpath(settings.STATIC_ROOT)
+    caminho = os.path.realpath(os.path.join(raiz, posixpath.normpath(path).lstrip('/')))
+    if not caminho.startswith(raiz + os.sep) or not os.path.isfile(caminho):
+        raise Http404('Arquivo estático não encontrado.')
+
+    enviado, encoding = caminho, None
+    for nome, sufixo in _ENCODINGS:
+        if _aceita(request, nome) and os.path.isfile(caminho + sufixo):
+            enviado, encoding = caminho + sufixo, nome
+            break
+
+    stat = os.stat(enviado)
+    etag = f'"{int(stat.st_mtime)}-{stat.st_size}-{encoding or "id"}"'
+    cache = CACHE_IMUTAVEL if _NOME_COM_HASH.search(path) else CACHE_CURTO
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(caminho)
+        response = FileResponse(open(enviado, 'rb'), content_type=content_type or 'application/octet-stream')
+        # O FileResponse deduz "inline; filename=..." do nome do arquivo aberto; asset não precisa disso.
+        response.headers.pop('Content-Disposition', None)
+        response['Content-Length'] = str(stat.st_size)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache
+    response['Vary'] = 'Accept-Encoding'
+    return response
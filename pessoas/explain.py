@@ -0,0 +1,274 @@
+"""Confere o plano de execução das consultas de cada rota de `pessoas/urls.py`.
+
+Cada rota é chamada com o test client (GET e, para os formulários de
+consulta, POST); todo SELECT que ela executa é capturado e passa por
+`EXPLAIN QUERY PLAN` (SQLite). Em rotas indexadas, estas linhas do plano são
+regressão:
+
+- `SCAN <tabela>`, com ou sem `USING [COVERING] INDEX`: ler o índice inteiro
+  custa o mesmo que ler a tabela. A única exceção é a consulta sem `WHERE` e
+  com `LIMIT` (primeira página em ordem de índice, `.first()`, `.exists()`),
+  que para depois de poucas linhas;
+- `USE TEMP B-TREE FOR ...` (ordenação/agrupamento fora de índice).
+
+Rotas em `VARREDURA_ORDENADA` podem ler tudo, desde que na ordem de um índice
+(só `TEMP B-TREE` é regressão); rotas em `NAO_INDEXADAS` não são cobradas.
+
+Uso em testes: `assert_rota_indexada(client, '/pessoas/')`.
+Uso na linha de comando: `python manage.py explain_views` (roda num banco de
+teste com `criar_dados_exemplo()`).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from urllib.parse import quote
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+# Varredura de tabela (ou alias dela). `SCAN CONSTANT ROW` (SELECT sem FROM,
+# VALUES) e `SCAN SUBQUERY n` não leem tabela nenhuma.
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW\b|\d+ CONSTANT ROWS\b|SUBQUERY \d)(\w+)')
+# Subconsultas no FROM e CTEs: o `SCAN <nome>` delas percorre o resultado já
+# calculado; as tabelas lidas lá dentro aparecem nas próprias linhas do plano.
+_SUBCONSULTA = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+_ALIAS = re.compile(r'"?(\w+)"?\s+AS\s+"?(\w+)"?', re.IGNORECASE)
+_TEMP_BTREE = re.compile(r'USE TEMP B-TREE')
+_LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+_WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+INDEXADA = 'indexada'
+ORDENADA = 'ordenada'
+LIVRE = 'livre'
+
+# Rotas (ou rota + querystring) que por natureza leem a tabela toda.
+NAO_INDEXADAS = {
+    'dashboard': 'totais e média de idade de todos os cadastros',
+    'est_total_cadastros': 'COUNT(*) de todos os cadastros',
+    'est_homens_mulheres': 'contagem por sexo de todos os cadastros',
+    'est_media_idade': 'média sobre todos os cadastros',
+    'est_maiores_menores': 'contagem sobre todos os cadastros',
+    'est_faixa_etaria': 'contagem por faixa sobre todos os cadastros',
+    'est_aniversariantes_mes': 'contagem por mês sobre todos os cadastros',
+    'filtro_acima_media': 'precisa da média de todos os cadastros',
+    'duplicados_revisao': 'fila de revisão (tabela auxiliar pequena)',
+    'pessoa_list?q=ana': 'busca por trecho do nome (LIKE %…%): lê o índice até completar a página',
+    'pessoa_list?q=123.456': 'busca por trecho do CPF (LIKE %…%)',
+}
+
+# Rotas que leem todos os cadastros de propósito, mas na ordem de um índice.
+VARREDURA_ORDENADA = {
+    'export_csv': 'exporta todos os cadastros',
+    'export_xlsx': 'exporta todos os cadastros',
+    'export_json': 'exporta todos os cadastros',
+}
+
+# Querystrings extras exercitadas além da URL pura.
+VARIANTES = {
+    'pessoa_list': ['?q=ana', '?q=123.456', '?q={cpf}'],
+    'pessoa_list_linhas': ['?apos_nome={nome}&apos_sobrenome={sobrenome}&apos_pk={pk}'],
+    'export_csv': ['?arquivo=1'],
+    'export_alteracoes': ['?desde=0'],
+}
+
+# Formulários de consulta enviados por POST ({cpf}, {mes}... vêm do cadastro de exemplo).
+POSTS = {
+    'filtro_aniversariantes_mes': [{'mes': '{mes}'}],
+    'buscar_por_cpf': [{'cpf': '{cpf}'}, {'cpf': '529.982.247-25'}],
+}
+
+# Rotas que não fazem sentido num GET de verificação.
+IGNORADAS = {'sair'}
+
+
+@dataclass
+class Consulta:
+    sql: str
+    plano: list[str]
+    problemas: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Rota:
+    nome: str
+    url: str
+    exigencia: str = INDEXADA
+    motivo: str = ''
+    dados: dict | None = None  # POST quando preenchido
+
+    @property
+    def descricao(self) -> str:
+        if self.dados is None:
+            return self.url
+        campos = '&'.join(f'{k}={v}' for k, v in self.dados.items())
+        return f'POST {self.url} {campos}'
+
+
+@dataclass
+class ResultadoRota:
+    rota: Rota
+    status: int
+    consultas: list[Consulta]
+
+    @property
+    def problemas(self) -> list[tuple[str, str]]:
+        if self.rota.exigencia == LIVRE:
+            return []
+        return [(c.sql, p) for c in self.consultas for p in c.problemas
+                if self.rota.exigencia == INDEXADA or _TEMP_BTREE.search(p)]
+
+
+def plano(sql: str) -> list[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [linha[-1] for linha in cursor.fetchall()]
+
+
+def problemas_do_plano(linhas: list[str], sql: str = '') -> list[str]:
+    # Primeira página em ordem de índice: o SCAN para no LIMIT.
+    scan_limitado = bool(_LIMIT.search(sql)) and not _WHERE.search(sql)
+    subconsultas = {m.group(1) for m in map(_SUBCONSULTA.match, (linha.strip() for linha in linhas)) if m}
+    # `FROM cte AS outro_nome`: o plano mostra só o alias.
+    subconsultas |= {alias for nome, alias in _ALIAS.findall(sql) if nome in subconsultas}
+    problemas = []
+    for linha in linhas:
+        texto = linha.strip()
+        scan = _SCAN.match(texto)
+        if _TEMP_BTREE.search(texto):
+            problemas.append(texto)
+        elif scan and scan.group(1) not in subconsultas and not (scan_limitado and 'INDEX' in texto):
+            problemas.append(texto)
+    return problemas
+
+
+def verificar_rota(client, url: str, nome: str = '', exigencia: str = INDEXADA,
+                   dados: dict | None = None, motivo: str = '') -> ResultadoRota:
+    """Executa GET (ou POST com `dados`) em `url`, captura os SELECTs e analisa o plano de cada um."""
+    rota = Rota(nome or url, url, exigencia, motivo, dados)
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url) if dados is None else client.post(url, dados)
+        if getattr(response, 'streaming', False):
+            # Consome o corpo: exportações fazem as consultas durante o streaming.
+            for _ in response.streaming_content:
+                pass
+        response.close()
+
+    consultas = []
+    for query in ctx.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        linhas = plano(sql)
+        consultas.append(Consulta(sql, linhas, problemas_do_plano(linhas, sql)))
+    return ResultadoRota(rota, response.status_code, consultas)
+
+
+def assert_rota_indexada(client, url: str, dados: dict | None = None) -> ResultadoRota:
+    """Helper de teste: falha se algum SELECT da rota varre a tabela ou ordena fora de índice."""
+    resultado = verificar_rota(client, url, dados=dados)
+    if resultado.problemas:
+        detalhes = '\n'.join(f'  {problema}\n    {sql}' for sql, problema in resultado.problemas)
+        raise AssertionError(f'{resultado.rota.descricao}: plano sem índice\n{detalhes}')
+    return resultado
+
+
+def _exigencia(nome: str, sufixo: str = '') -> tuple[str, str]:
+    for chave in (nome + sufixo, nome):
+        if chave in NAO_INDEXADAS:
+            return LIVRE, NAO_INDEXADAS[chave]
+        if chave in VARREDURA_ORDENADA:
+            return ORDENADA, VARREDURA_ORDENADA[chave]
+    return INDEXADA, ''
+
+
+def rotas_para_verificar(exemplo=None) -> list[Rota]:
+    """Cada rota do app, com as variantes de querystring e os POSTs de `POSTS`.
+
+    `exemplo` (uma `Pessoa`) preenche o `<pk>` das URLs e os `{campos}` das variantes.
+    """
+    from . import urls as pessoas_urls
+
+    valores = {}
+    if exemplo is not None:
+        valores = {
+            'pk': exemplo.pk, 'cpf': exemplo.cpf, 'nome': exemplo.nome,
+            'sobrenome': exemplo.sobrenome, 'mes': exemplo.data_nascimento.month,
+        }
+
+    rotas = []
+    for padrao in pessoas_urls.urlpatterns:
+        if not isinstance(padrao, URLPattern) or padrao.name in IGNORADAS:
+            continue
+        kwargs = {}
+        if 'pk' in padrao.pattern.converters:
+            if exemplo is None:
+                continue
+            kwargs['pk'] = exemplo.pk
+        url = reverse(f'{pessoas_urls.app_name}:{padrao.name}', kwargs=kwargs)
+        for sufixo in [''] + VARIANTES.get(padrao.name, []):
+            if '{' in sufixo and not valores:
+                continue
+            completa = url + sufixo.format(**{k: quote(str(v)) for k, v in valores.items()})
+            rotas.append(Rota(padrao.name, completa, *_exigencia(padrao.name, sufixo)))
+        for dados in POSTS.get(padrao.name, []) if valores else []:
+            dados = {k: str(v).format(**valores) for k, v in dados.items()}
+            rotas.append(Rota(padrao.name, url, *_exigencia(padrao.name), dados=dados))
+    return rotas
+
+
+# -------------------------
+# Banco de teste
+# -------------------------
+_NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriel', 'Helena', 'Igor', 'Júlia']
+_SOBRENOMES = ['Almeida', 'Barbosa', 'Costa', 'Dias', 'Ferreira', 'Gomes', 'Lima', 'Souza']
+
+
+def criar_dados_exemplo(quantidade: int = 300):
+    """Cadastros (e um arquivado, um par de duplicados) para as rotas terem o que consultar.
+
+    Devolve a `Pessoa` usada como exemplo pelas variantes.
+    """
+    from .arquivamento import FiltroArquivo, arquivar
+    from .cpf import completar_cpf
+    from .models import CandidatoDuplicado, Pessoa
+
+    Pessoa.objects.bulk_create([
+        Pessoa(
+            nome=_NOMES[i % len(_NOMES)],
+            sobrenome=_SOBRENOMES[i % len(_SOBRENOMES)],
+            data_nascimento=date(1950, 1, 1) + timedelta(days=i * 97),
+            sexo='M' if i % 2 else 'F',
+            cpf=completar_cpf(f'{100_000_000 + i * 7919:09d}'),
+        )
+        for i in range(quantidade)
+    ], batch_size=500)
+    primeiras = list(Pessoa.objects.order_by('pk')[:3])
+    CandidatoDuplicado.objects.create(pessoa_a=primeiras[1], pessoa_b=primeiras[2], score=0.9, bloco='exemplo')
+    arquivar(FiltroArquivo(cpfs=[Pessoa.objects.order_by('-pk').values_list('cpf', flat=True).first()]),
+             motivo='exemplo', pausa=0)
+    return primeiras[0]
+
+
+def ler_estatisticas() -> list[tuple]:
+    """Linhas de `sqlite_stat1` (geradas pelo ANALYZE) do banco atual, se houver."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return []
+        cursor.execute('SELECT tbl, idx, stat FROM sqlite_stat1')
+        return cursor.fetchall()
+
+
+def copiar_estatisticas(linhas: list[tuple]) -> None:
+    """Leva as estatísticas do banco real para o de teste: o planner escolhe como em produção."""
+    if not linhas:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute('DELETE FROM sqlite_stat1')
+        cursor.executemany('INSERT INTO sqlite_stat1 (tbl, idx, stat) VALUES (%s, %s, %s)', linhas)
+        cursor.execute('ANALYZE sqlite_schema')
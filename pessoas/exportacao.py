@@ -0,0 +1,213 @@
+"""Arquivos de exportação (CSV / JSON / XLSX) gerados uma vez por versão dos dados.
+
+A versão é o último `seq` do log de alterações (`AlteracaoPessoa`) mais a data
+de hoje (a coluna `idade` muda na virada do dia): enquanto nada muda, todos os
+downloads servem o mesmo arquivo do disco
+(`EXPORT_DIR/pessoas-<versão>.<formato>[.gz]`). CSV e JSON ficam em gzip
+(texto comprime bem); o XLSX já é um zip e fica como está.
+
+A geração é single-flight: quem encontra o arquivo faltando pega um `flock`
+por formato, confere de novo se ele já apareceu (outro worker pode ter gerado
+enquanto esperava) e só então gera. Uma virada de versão com muitos downloads
+simultâneos gera o arquivo uma vez, não uma vez por request.
+
+Com `incluir_arquivo=True` o arquivo (`pessoas_completo-<versão>...`) traz
+também os cadastros arquivados (`PessoaArquivo`), com a coluna `arquivado`.
+Arquivar/restaurar passa pelo log de alterações, então a versão muda junto.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import heapq
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+
+from .alteracoes import ultimo_seq
+from .models import Pessoa, PessoaArquivo
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock só entre as threads do processo
+    fcntl = None
+
+_lock_local = threading.Lock()
+
+FORMATOS = {
+    # formato: (content_type, comprimir em gzip)
+    'csv': ('text/csv; charset=utf-8', True),
+    'json': ('application/json; charset=utf-8', True),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', False),
+}
+
+
+def export_dir() -> Path:
+    return Path(getattr(settings, 'EXPORT_DIR', Path(settings.BASE_DIR) / 'var' / 'exports'))
+
+
+def pessoas_to_rows(incluir_arquivo: bool = False):
+    if not incluir_arquivo:
+        return _rows(Pessoa.objects.all())
+    # As duas tabelas já vêm ordenadas do banco: intercala em streaming, como se fosse uma só.
+    return heapq.merge(
+        _rows(Pessoa.objects.all(), 'Não'), _rows(PessoaArquivo.objects.all(), 'Sim'),
+        key=lambda row: (row['nome'], row['sobrenome']),
+    )
+
+
+def _rows(qs, arquivado: str | None = None):
+    for p in qs.order_by('nome', 'sobrenome').iterator(chunk_size=2000):
+        row = {
+            'nome': p.nome,
+            'sobrenome': p.sobrenome,
+            'data_nascimento': p.data_nascimento.strftime('%d/%m/%Y'),
+            'sexo': p.sexo_extenso,
+            'cpf': (p.cpf or '').zfill(11),
+            'idade': p.idade,
+        }
+        if arquivado is not None:
+            row['arquivado'] = arquivado
+        yield row
+
+
+# -------------------------
+# Geradores (escrevem num arquivo binário já aberto)
+# -------------------------
+def _escrever_csv(fh, incluir_arquivo: bool = False) -> None:
+    texto = _TextoUTF8(fh)
+    writer = csv.writer(texto, delimiter=';')
+    cabecalho = None
+    for row in pessoas_to_rows(incluir_arquivo):
+        if cabecalho is None:
+            cabecalho = list(row.keys())
+            writer.writerow(cabecalho)
+        writer.writerow([row[k] for k in cabecalho])
+
+
+def _escrever_json(fh, incluir_arquivo: bool = False) -> None:
+    # Uma linha por vez (mesma saída de json.dump(lista, indent=2)), sem montar a lista inteira.
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    separador = '[\n  '
+    for row in pessoas_to_rows(incluir_arquivo):
+        fh.write((separador + encoder.encode(row).replace('\n', '\n  ')).encode('utf-8'))
+        separador = ',\n  '
+    fh.write(b'[]' if separador == '[\n  ' else b'\n]')
+
+
+def _escrever_xlsx(fh, incluir_arquivo: bool = False) -> None:
+    # Import tardio: openpyxl só é necessário aqui e pesa no startup dos workers.
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Pessoas')
+    cabecalho = None
+    for row in pessoas_to_rows(incluir_arquivo):
+        if cabecalho is None:
+            cabecalho = list(row.keys())
+            ws.append(cabecalho)
+        ws.append([row[h] for h in cabecalho])
+    wb.save(fh)
+
+
+GERADORES = {'csv': _escrever_csv, 'json': _escrever_json, 'xlsx': _escrever_xlsx}
+
+
+class _TextoUTF8:
+    """Adaptador mínimo para o csv.writer escrever direto num arquivo binário."""
+    def __init__(self, fh):
+        self.fh = fh
+
+    def write(self, s: str):
+        return self.fh.write(s.encode('utf-8'))
+
+
+# -------------------------
+# Snapshots em disco
+# -------------------------
+def versao_atual() -> str:
+    return f"{ultimo_seq()}-{date.today():%Y%m%d}"
+
+
+def _base_snapshot(incluir_arquivo: bool) -> str:
+    return 'pessoas_completo' if incluir_arquivo else 'pessoas'
+
+
+def caminho_snapshot(formato: str, versao: str, incluir_arquivo: bool = False) -> Path:
+    _content_type, comprimir = FORMATOS[formato]
+    return export_dir() / f"{_base_snapshot(incluir_arquivo)}-{versao}.{formato}{'.gz' if comprimir else ''}"
+
+
+def obter_snapshot(formato: str, incluir_arquivo: bool = False) -> tuple[Path, str]:
+    """Caminho do arquivo da versão atual (gera se ainda não existir) e a versão."""
+    versao = versao_atual()
+    caminho = caminho_snapshot(formato, versao, incluir_arquivo)
+    if not caminho.exists():
+        with _travar_geracao(formato, incluir_arquivo):
+            # Quem esperou o lock normalmente encontra o arquivo pronto.
+            if not caminho.exists():
+                gerar_snapshot(formato, versao, incluir_arquivo)
+    return caminho, versao
+
+
+@contextmanager
+def _travar_geracao(formato: str, incluir_arquivo: bool):
+    """Lock exclusivo (entre processos) da geração de um formato."""
+    if fcntl is None:
+        with _lock_local:
+            yield
+        return
+    pasta = export_dir()
+    pasta.mkdir(parents=True, exist_ok=True)
+    # Começa com ponto: fica fora do glob de _remover_versoes_antigas.
+    with open(pasta / f'.{_base_snapshot(incluir_arquivo)}.{formato}.lock', 'a+b') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def gerar_snapshot(formato: str, versao: str, incluir_arquivo: bool = False) -> Path:
+    _content_type, comprimir = FORMATOS[formato]
+    destino = caminho_snapshot(formato, versao, incluir_arquivo)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+
+    # Grava num temporário e troca com os.replace: downloads simultâneos nunca
+    # veem arquivo pela metade.
+    fd, tmp = tempfile.mkstemp(dir=destino.parent, prefix=f'.{formato}-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as bruto:
+            if comprimir:
+                with gzip.GzipFile(fileobj=bruto, mode='wb', compresslevel=6, mtime=0) as gz:
+                    GERADORES[formato](gz, incluir_arquivo)
+            else:
+                GERADORES[formato](bruto, incluir_arquivo)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+    _remover_versoes_antigas(formato, destino, _base_snapshot(incluir_arquivo))
+    return destino
+
+
+def _remover_versoes_antigas(formato: str, atual: Path, base: str = 'pessoas') -> None:
+    """Apaga versões antigas, mantendo a anterior (pode estar sendo servida pelo proxy)."""
+    antigos = sorted(
+        (c for c in atual.parent.glob(f'{base}-*.{formato}*') if c != atual),
+        key=lambda c: c.stat().st_mtime,
+    )
+    for antigo in antigos[:-1]:
+        try:
+            antigo.unlink()
+        except FileNotFoundError:
+            pass
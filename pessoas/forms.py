@@ -1,15 +1,32 @@
 from __future__ import annotations
 
-import re
 from django import forms
 from django.core.exceptions import ValidationError
 
+from .cpf import normalize_cpf, validar_cpf
+from .cpf_lookup import get_cpf_lookup
 from .models import Pessoa
 
-def normalize_cpf(value: str) -> str:
-    return re.sub(r'\D+', '', value or '')
 
-class PessoaForm(forms.ModelForm):
+class CPFUnicoMixin:
+    """Checa a unicidade do CPF pelo serviço de busca (LRU + Bloom) em vez do banco.
+
+    A constraint `unique` continua valendo; as views tratam o IntegrityError raro
+    de duas gravações simultâneas do mesmo CPF.
+    """
+    def validar_cpf_unico(self, cpf: str) -> None:
+        if get_cpf_lookup().existe(cpf, exclude_pk=self.instance.pk):
+            raise ValidationError('Já existe uma pessoa cadastrada com este CPF.')
+
+    def validate_unique(self):
+        exclude = self._get_validation_exclusions()
+        exclude.add('cpf')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
+class PessoaForm(CPFUnicoMixin, forms.ModelForm):
     data_nascimento = forms.DateField(
         label='Data de nascimento',
         input_formats=['%d/%m/%Y', '%Y-%m-%d'],
@@ -49,6 +66,9 @@ class PessoaForm(forms.ModelForm):
         cpf = normalize_cpf(self.cleaned_data.get('cpf'))
         if not cpf.isdigit() or len(cpf) != 11:
             raise ValidationError('Formato inválido! Digite os 11 dígitos do CPF (somente números).')
+        if not validar_cpf(cpf):
+            raise ValidationError('CPF inválido! Os dígitos verificadores não conferem.')
+        self.validar_cpf_unico(cpf)
         return cpf
 
 
@@ -118,7 +138,7 @@ class EditarSexoForm(EditarCampoBaseForm):
         fields = ['sexo']
 
 
-class EditarCPFForm(EditarCampoBaseForm):
+class EditarCPFForm(CPFUnicoMixin, EditarCampoBaseForm):
     cpf = forms.CharField(
         label='CPF',
         max_length=14,
@@ -132,6 +152,9 @@ class EditarCPFForm(EditarCampoBaseForm):
         cpf = normalize_cpf(self.cleaned_data.get('cpf'))
         if not cpf.isdigit() or len(cpf) != 11:
             raise ValidationError('Formato inválido! Digite os 11 dígitos do CPF (somente números).')
+        if not validar_cpf(cpf):
+            raise ValidationError('CPF inválido! Os dígitos verificadores não conferem.')
+        self.validar_cpf_unico(cpf)
         return cpf
 
 
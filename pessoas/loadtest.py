@@ -0,0 +1,497 @@
+"""Teste de carga em processo: usuários virtuais em threads batendo na aplicação.
+
+Transportes:
+- `wsgi`: chama `cadastro_pessoas.wsgi.application` direto (sem servidor);
+- `asgi`: chama `cadastro_pessoas.asgi.application` num event loop por thread;
+- `http`: faz requisições HTTP para um servidor já rodando (ex.: runserver).
+
+Cada usuário virtual tem seu próprio cookie jar (sessão, csrftoken, mensagens)
+e sorteia cenários conforme os pesos. Os POSTs pegam o token CSRF do formulário
+antes de enviar, como um navegador; um POST que volta 200 com erros de
+formulário conta como erro. O relatório traz vazão, p50/p95/p99, erros e
+ocorrências de "database is locked" por rota.
+
+O cenário `editar` só altera cadastros criados pelo próprio teste (cenário
+`criar`), que o `--limpar` remove no final.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import io
+import itertools
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.signals import got_request_exception
+
+from .cpf import completar_cpf
+
+HOST = 'localhost'
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+# Erros de campo e non_field_errors nos templates de formulário (as mensagens usam outras classes).
+ERRO_FORM = re.compile(rb'class="(?:text-danger small mt-1|alert alert-danger)"')
+PESSOA_URL = re.compile(r'/pessoas/(\d+)/')
+HEADER_ID = 'X-Carga-Id'
+
+
+# -------------------------
+# Transportes
+# -------------------------
+@dataclass
+class Resposta:
+    status: int
+    headers: list[tuple[str, str]]
+    corpo: bytes
+
+    def cookies(self) -> list[str]:
+        return [v for k, v in self.headers if k.lower() == 'set-cookie']
+
+
+class WSGITransporte:
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, metodo: str, caminho: str, corpo: bytes, headers: dict[str, str]) -> Resposta:
+        path, _, query = caminho.partition('?')
+        environ = {
+            'REQUEST_METHOD': metodo,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': HOST,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': HOST,
+            'CONTENT_LENGTH': str(len(corpo)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(corpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for nome, valor in headers.items():
+            if nome.lower() == 'content-type':
+                environ['CONTENT_TYPE'] = valor
+            else:
+                environ['HTTP_' + nome.upper().replace('-', '_')] = valor
+
+        resultado = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            resultado['status'] = int(status.split(' ', 1)[0])
+            resultado['headers'] = response_headers
+
+        iterable = self.application(environ, start_response)
+        try:
+            corpo_resposta = b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+        return Resposta(resultado['status'], resultado['headers'], corpo_resposta)
+
+
+class ASGITransporte:
+    def __init__(self, application):
+        self.application = application
+        self._local = threading.local()
+
+    def _loop(self):
+        if not hasattr(self._local, 'loop'):
+            self._local.loop = asyncio.new_event_loop()
+        return self._local.loop
+
+    def __call__(self, metodo: str, caminho: str, corpo: bytes, headers: dict[str, str]) -> Resposta:
+        return self._loop().run_until_complete(self._chamar(metodo, caminho, corpo, headers))
+
+    async def _chamar(self, metodo, caminho, corpo, headers) -> Resposta:
+        path, _, query = caminho.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': metodo,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [(b'host', HOST.encode())] + [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            'client': ('127.0.0.1', 0),
+            'server': (HOST, 80),
+        }
+        fim = asyncio.Event()
+        enviado = False
+        resultado = {'corpo': []}
+
+        async def receive():
+            nonlocal enviado
+            if not enviado:
+                enviado = True
+                return {'type': 'http.request', 'body': corpo, 'more_body': False}
+            # O Django fica ouvindo desconexão; só "desconecta" depois da resposta.
+            await fim.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                resultado['status'] = mensagem['status']
+                resultado['headers'] = [(k.decode(), v.decode()) for k, v in mensagem.get('headers', [])]
+            elif mensagem['type'] == 'http.response.body':
+                resultado['corpo'].append(mensagem.get('body', b''))
+                if not mensagem.get('more_body'):
+                    fim.set()
+
+        await self.application(scope, receive, send)
+        fim.set()
+        return Resposta(resultado['status'], resultado['headers'], b''.join(resultado['corpo']))
+
+
+class HTTPTransporte:
+    def __init__(self, base_url: str, timeout: float = 30):
+        partes = urlsplit(base_url)
+        self.host = partes.hostname or '127.0.0.1'
+        self.porta = partes.port or 80
+        self.timeout = timeout
+
+    def __call__(self, metodo: str, caminho: str, corpo: bytes, headers: dict[str, str]) -> Resposta:
+        conexao = http.client.HTTPConnection(self.host, self.porta, timeout=self.timeout)
+        try:
+            conexao.request(metodo, caminho, body=corpo or None, headers=headers)
+            resp = conexao.getresponse()
+            return Resposta(resp.status, resp.getheaders(), resp.read())
+        finally:
+            conexao.close()
+
+
+# -------------------------
+# Métricas
+# -------------------------
+@dataclass
+class MetricasRota:
+    latencias: list[float] = field(default_factory=list)
+    erros: int = 0
+    locked: int = 0
+    form_invalido: int = 0
+    excecao: str = ''  # primeira exceção do cenário fora de uma requisição
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rotas: dict[str, MetricasRota] = defaultdict(MetricasRota)
+        self._ids = itertools.count(1)
+        self._locked_ids: set[str] = set()
+
+    def novo_id(self) -> str:
+        return str(next(self._ids))
+
+    def marcar_locked(self, requisicao_id: str) -> None:
+        """Chamado pelo handler de exceção (wsgi/asgi): a contagem fica para o `registrar`."""
+        with self._lock:
+            self._locked_ids.add(requisicao_id)
+
+    def foi_locked(self, requisicao_id: str) -> bool:
+        with self._lock:
+            if requisicao_id in self._locked_ids:
+                self._locked_ids.discard(requisicao_id)
+                return True
+            return False
+
+    def registrar(self, rota: str, segundos: float, erro: bool, locked: bool = False,
+                  form_invalido: bool = False) -> None:
+        with self._lock:
+            m = self.rotas[rota]
+            m.latencias.append(segundos)
+            m.erros += erro or form_invalido
+            m.locked += locked
+            m.form_invalido += form_invalido
+
+    def registrar_falha(self, rota: str, exc: BaseException) -> None:
+        """Exceção no código do cenário que não veio de uma requisição (já contada pelo `_enviar`)."""
+        with self._lock:
+            m = self.rotas[rota]
+            m.erros += 1
+            m.excecao = m.excecao or f'{type(exc).__name__}: {exc}'
+
+    def relatorio(self, duracao: float) -> list[dict]:
+        linhas = []
+        total = MetricasRota()
+        for rota in sorted(self.rotas):
+            m = self.rotas[rota]
+            linhas.append(_resumo(rota, m, duracao))
+            total.latencias.extend(m.latencias)
+            total.erros += m.erros
+            total.locked += m.locked
+            total.form_invalido += m.form_invalido
+        linhas.append(_resumo('TOTAL', total, duracao))
+        return linhas
+
+
+def _percentil(ordenadas: list[float], p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    indice = min(len(ordenadas) - 1, max(0, round(p / 100 * len(ordenadas) + 0.5) - 1))
+    return ordenadas[indice]
+
+
+def _resumo(rota: str, m: MetricasRota, duracao: float) -> dict:
+    ordenadas = sorted(m.latencias)
+    n = len(ordenadas)
+    return {
+        'rota': rota,
+        'requisicoes': n,
+        'req_s': n / duracao if duracao else 0.0,
+        'p50_ms': _percentil(ordenadas, 50) * 1000,
+        'p95_ms': _percentil(ordenadas, 95) * 1000,
+        'p99_ms': _percentil(ordenadas, 99) * 1000,
+        'erros': m.erros,
+        'taxa_erro': m.erros / n if n else 0.0,
+        'database_locked': m.locked,
+        'form_invalido': m.form_invalido,
+        'excecao': m.excecao,
+    }
+
+
+# -------------------------
+# Usuário virtual e cenários
+# -------------------------
+class Usuario:
+    def __init__(self, transporte, metricas: Metricas):
+        self.transporte = transporte
+        self.metricas = metricas
+        self.cookies: dict[str, str] = {}
+
+    def _enviar(self, rota: str, metodo: str, caminho: str, dados: dict | None = None) -> Resposta:
+        corpo = urlencode(dados).encode() if dados else b''
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        if metodo == 'POST':
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        requisicao_id = headers[HEADER_ID] = self.metricas.novo_id()
+
+        inicio = time.perf_counter()
+        try:
+            resp = self.transporte(metodo, caminho, corpo, headers)
+        except Exception as exc:
+            locked = self.metricas.foi_locked(requisicao_id) or 'database is locked' in str(exc)
+            self.metricas.registrar(rota, time.perf_counter() - inicio, erro=True, locked=locked)
+            exc.carga_registrada = True
+            raise
+        segundos = time.perf_counter() - inicio
+
+        for cabecalho in resp.cookies():
+            for nome, morsel in SimpleCookie(cabecalho).items():
+                if morsel.value:
+                    self.cookies[nome] = morsel.value
+                else:
+                    self.cookies.pop(nome, None)
+
+        # wsgi/asgi: marcado pelo handler de exceção. http: só dá para ver na
+        # página de erro do DEBUG=True.
+        locked = self.metricas.foi_locked(requisicao_id) or (
+            resp.status >= 500 and b'database is locked' in resp.corpo
+        )
+        form_invalido = metodo == 'POST' and resp.status == 200 and bool(ERRO_FORM.search(resp.corpo))
+        self.metricas.registrar(rota, segundos, erro=resp.status >= 400, locked=locked,
+                                form_invalido=form_invalido)
+        return resp
+
+    def get(self, rota: str, caminho: str) -> Resposta:
+        return self._enviar(rota, 'GET', caminho)
+
+    def post_form(self, rota: str, caminho: str, dados: dict) -> Resposta:
+        """GET do formulário (pega o token CSRF) seguido do POST."""
+        form = self.get(f'{rota}:form', caminho)
+        token = CSRF_INPUT.search(form.corpo)
+        if token:
+            dados = {**dados, 'csrfmiddlewaretoken': token.group(1).decode()}
+        return self._enviar(f'{rota}:post', 'POST', caminho, dados)
+
+
+@dataclass
+class Dados:
+    """Amostra do banco usada para montar as URLs dos cenários."""
+    pks: list[int]
+    cpfs: list[str]
+    nomes: list[str]
+    criados: list[str] = field(default_factory=list)  # CPFs enviados pelo cenário "criar"
+    pks_criados: list[int] = field(default_factory=list)  # cadastros que ele criou de fato
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def novo_cpf(self, rnd: random.Random) -> str:
+        cpf = completar_cpf(f'{rnd.randrange(10 ** 9):09d}')
+        with self._lock:
+            self.criados.append(cpf)
+        return cpf
+
+    def registrar_criado(self, resp: Resposta) -> None:
+        """Guarda o pk do redirect para o detalhe (cadastro criado com sucesso)."""
+        if resp.status not in (301, 302, 303):
+            return
+        local = dict((k.lower(), v) for k, v in resp.headers).get('location', '')
+        encontrado = PESSOA_URL.search(local)
+        if encontrado:
+            with self._lock:
+                self.pks_criados.append(int(encontrado.group(1)))
+
+    def criado_qualquer(self, rnd: random.Random) -> int | None:
+        with self._lock:
+            return rnd.choice(self.pks_criados) if self.pks_criados else None
+
+
+ESTATISTICAS = (
+    '/estatisticas/total/', '/estatisticas/sexo/', '/estatisticas/media-idade/',
+    '/estatisticas/maiores-menores/', '/estatisticas/faixa-etaria/',
+    '/estatisticas/maior-menor-idade/', '/estatisticas/aniversariantes-mes/',
+)
+EXPORTACOES = ('/exportacao/csv/', '/exportacao/json/', '/exportacao/xlsx/')
+
+
+def cenario_lista(u: Usuario, d: Dados, rnd: random.Random):
+    u.get('lista', '/pessoas/')
+
+
+def cenario_busca(u: Usuario, d: Dados, rnd: random.Random):
+    termo = rnd.choice(d.nomes)[:rnd.randint(3, 6)] if d.nomes else 'a'
+    u.get('busca', '/pessoas/?' + urlencode({'q': termo}))
+
+
+def cenario_detalhe(u: Usuario, d: Dados, rnd: random.Random):
+    if d.pks:
+        u.get('detalhe', f'/pessoas/{rnd.choice(d.pks)}/')
+
+
+def cenario_busca_cpf(u: Usuario, d: Dados, rnd: random.Random):
+    # Metade acerta, metade erra (CPF digitado errado é o caso comum).
+    cpf = rnd.choice(d.cpfs) if d.cpfs and rnd.random() < 0.5 else f'{rnd.randrange(10 ** 11):011d}'
+    u.post_form('busca_cpf', '/cadastro/buscar/?destino=detalhe', {'cpf': cpf, 'destino': 'detalhe'})
+
+
+def cenario_criar(u: Usuario, d: Dados, rnd: random.Random):
+    resp = u.post_form('criar', '/pessoas/nova/', {
+        'nome': 'Carga',
+        'sobrenome': f'Teste{rnd.randrange(10 ** 6)}',
+        'data_nascimento': f'{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{rnd.randint(1940, 2020)}',
+        'sexo': rnd.choice('MF'),
+        'cpf': d.novo_cpf(rnd),
+    })
+    d.registrar_criado(resp)
+
+
+def cenario_editar(u: Usuario, d: Dados, rnd: random.Random):
+    # Só edita o que o próprio teste criou: cadastros reais ficam intactos.
+    pk = d.criado_qualquer(rnd)
+    if pk is None:
+        cenario_criar(u, d, rnd)
+        return
+    u.post_form('editar', f'/pessoas/{pk}/editar/nome/', {'nome': f'Carga{rnd.randrange(10 ** 6)}'})
+
+
+def cenario_estatisticas(u: Usuario, d: Dados, rnd: random.Random):
+    u.get('estatisticas', rnd.choice(ESTATISTICAS))
+
+
+def cenario_exportar(u: Usuario, d: Dados, rnd: random.Random):
+    u.get('exportar', rnd.choice(EXPORTACOES))
+
+
+CENARIOS = {
+    'lista': cenario_lista,
+    'busca': cenario_busca,
+    'detalhe': cenario_detalhe,
+    'busca_cpf': cenario_busca_cpf,
+    'criar': cenario_criar,
+    'editar': cenario_editar,
+    'estatisticas': cenario_estatisticas,
+    'exportar': cenario_exportar,
+}
+
+MIX_PADRAO = {
+    'lista': 20, 'busca': 15, 'detalhe': 20, 'busca_cpf': 15,
+    'criar': 5, 'editar': 5, 'estatisticas': 15, 'exportar': 5,
+}
+
+
+def parse_mix(texto: str) -> dict[str, int]:
+    """'lista=20,detalhe=10' -> {'lista': 20, 'detalhe': 10}."""
+    mix = {}
+    for parte in filter(None, (p.strip() for p in texto.split(','))):
+        nome, _, peso = parte.partition('=')
+        if nome not in CENARIOS:
+            raise ValueError(f'Cenário desconhecido: {nome!r} (opções: {", ".join(CENARIOS)})')
+        mix[nome] = int(peso or 1)
+    return mix
+
+
+# -------------------------
+# Execução
+# -------------------------
+def executar(transporte, dados: Dados, mix: dict[str, int], workers: int,
+             duracao: float | None = None, requisicoes: int | None = None, seed: int | None = None):
+    """Roda os usuários virtuais e devolve (Metricas, duração real em segundos)."""
+    from django.db import close_old_connections, connections
+
+    metricas = Metricas()
+    nomes = [n for n, p in mix.items() if p > 0]
+    pesos = [mix[n] for n in nomes]
+    restantes = [requisicoes] if requisicoes else None
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao if duracao else None
+
+    def ao_erro(sender, request=None, **kwargs):
+        exc = sys.exc_info()[1]
+        requisicao_id = request.headers.get(HEADER_ID) if request is not None else None
+        if requisicao_id and exc is not None and 'database is locked' in str(exc):
+            metricas.marcar_locked(requisicao_id)
+
+    def continuar() -> bool:
+        if fim is not None and time.perf_counter() >= fim:
+            return False
+        if restantes is not None:
+            with lock:
+                if restantes[0] <= 0:
+                    return False
+                restantes[0] -= 1
+        return True
+
+    def trabalhador(indice: int):
+        rnd = random.Random(None if seed is None else seed + indice)
+        usuario = Usuario(transporte, metricas)
+        try:
+            while continuar():
+                nome = rnd.choices(nomes, pesos)[0]
+                try:
+                    CENARIOS[nome](usuario, dados, rnd)
+                except Exception as exc:
+                    # Falha da requisição já foi contada na rota; o resto (bug no
+                    # cenário, dados inesperados) conta como erro do cenário.
+                    if not getattr(exc, 'carga_registrada', False):
+                        metricas.registrar_falha(nome, exc)
+                close_old_connections()
+        finally:
+            connections.close_all()
+
+    got_request_exception.connect(ao_erro, weak=False)
+    inicio = time.perf_counter()
+    try:
+        threads = [threading.Thread(target=trabalhador, args=(i,), daemon=True) for i in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        got_request_exception.disconnect(ao_erro)
+    return metricas, time.perf_counter() - inicio
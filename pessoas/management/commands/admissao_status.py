@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from pessoas.admissao import config_classe, get_metricas
+
+
+class Command(BaseCommand):
+    help = 'Mostra fila e rejeições do controle de admissão (somando todos os workers).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zerar', action='store_true', help='Zera os contadores depois de mostrar.')
+
+    def handle(self, *args, **options):
+        metricas = get_metricas()
+        linhas = metricas.resumo()
+        if not linhas:
+            self.stdout.write('ℹ️ Nenhuma espera ou rejeição registrada.')
+        for linha in linhas:
+            config = config_classe(linha['classe'])
+            ultima = (
+                datetime.fromtimestamp(linha['ultima_rejeicao']).strftime('%d/%m/%Y %H:%M:%S')
+                if linha['ultima_rejeicao'] else '-'
+            )
+            texto = (
+                f"{linha['classe']:<12} limite={config['limite']} em_fila={linha['em_fila']} "
+                f"fila_max={linha['fila_max']} admitidos_apos_espera={linha['admitidos_apos_espera']} "
+                f"rejeitados={linha['rejeitados']} ultima_rejeicao={ultima}"
+            )
+            self.stdout.write(self.style.WARNING(texto) if linha['rejeitados'] else texto)
+        if options['zerar']:
+            metricas.zerar()
+            self.stdout.write(self.style.SUCCESS('✅ Contadores zerados.'))
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pessoas.arquivamento import adicionar_argumentos_filtro, arquivar, contar, filtro_das_opcoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Move cadastros inativos para o arquivo (PessoaArquivo) em lotes com transações curtas. '
+        'Filtros: faixa de nascimento, idade do cadastro, tempo sem alteração ou lista de CPFs.'
+    )
+
+    def add_arguments(self, parser):
+        adicionar_argumentos_filtro(parser)
+        parser.add_argument('--motivo', default='', help='Anotação gravada em cada registro (ex.: "óbito").')
+
+    def handle(self, *args, **options):
+        try:
+            filtro = filtro_das_opcoes(options)
+        except OSError as exc:
+            raise CommandError(f'❌ Não foi possível ler a lista de CPFs: {exc}')
+        except ValueError as exc:
+            raise CommandError(f'❌ {exc}')
+        if filtro.vazio:
+            raise CommandError('❌ Informe pelo menos um filtro (arquivar tudo não é permitido).')
+
+        previstos = contar(filtro)
+        if options['dry_run'] or not previstos:
+            self.stdout.write(f'ℹ️ {previstos} cadastros seriam arquivados.')
+            return
+
+        inicio = time.perf_counter()
+        total = arquivar(
+            filtro, motivo=options['motivo'], chunk_size=max(1, options['chunk_size']), pausa=options['pausa'],
+            progresso=lambda n: self.stdout.write(f'  {n}/{previstos}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} cadastros arquivados em {time.perf_counter() - inicio:.1f}s.'
+        ))
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from pessoas.models import Pessoa
+from pessoas.render import render_linhas, url_prefixos
+
+
+class Command(BaseCommand):
+    help = 'Mede o tempo de renderização da tabela de pessoas por 1.000 linhas (sem banco).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=5000)
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        n = options['linhas']
+        agora = datetime.now(timezone.utc)
+        pessoas = [
+            Pessoa(
+                pk=i + 1,
+                nome=f'Nome{i}',
+                sobrenome=f'Sobrenome{i}',
+                data_nascimento=date(1950, 1, 1) + timedelta(days=i % 25000),
+                sexo=Pessoa.SEXO_MASC if i % 2 else Pessoa.SEXO_FEM,
+                cpf=f'{i:011d}',
+                atualizado_em=agora,
+            )
+            for i in range(n)
+        ]
+        request = RequestFactory().get('/pessoas/')
+        pagina = get_template('pessoas/pessoas_list.html')
+        urls = url_prefixos()
+        # Cache próprio do benchmark: limpar o `default` apagaria as linhas (e o
+        # que mais estiver lá) de quem compartilha o cache com este processo.
+        cache_linhas = LocMemCache('pessoas-bench-render', {'OPTIONS': {'MAX_ENTRIES': n * 2}})
+
+        def pagina_completa():
+            linhas = render_linhas(pessoas, urls, cache_linhas)
+            pagina.render({'pessoas': pessoas, 'linhas': linhas, 'q': ''}, request)
+
+        medicoes = {
+            'linhas sem cache (1ª renderização)': lambda: (
+                cache_linhas.clear(), render_linhas(pessoas, urls, cache_linhas),
+            ),
+            'linhas com cache': lambda: render_linhas(pessoas, urls, cache_linhas),
+            'página completa com cache': pagina_completa,
+        }
+        render_linhas(pessoas, urls, cache_linhas)  # aquece templates e cache
+
+        for nome, func in medicoes.items():
+            tempos = []
+            for _ in range(options['repeticoes']):
+                inicio = time.perf_counter()
+                func()
+                tempos.append(time.perf_counter() - inicio)
+            por_mil = min(tempos) / n * 1000 * 1000
+            self.stdout.write(f'{nome:<40} {por_mil:8.2f} ms / 1.000 linhas')
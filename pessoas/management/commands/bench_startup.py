@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Igual ao que um worker faz ao subir: configura o Django e carrega o wsgi.py.
+CODIGO_STARTUP = (
+    "import os, django; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings'); "
+    "django.setup(); "
+    "import cadastro_pessoas.wsgi"
+)
+
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de imports no startup de um worker com `python -X importtime` '
+        'e falha se passar do orçamento ou se carregar dependências pesadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', None),
+                            help='Orçamento de tempo de import em ms (padrão: settings.STARTUP_IMPORT_BUDGET_MS).')
+        parser.add_argument('--proibidos', default='openpyxl,numpy,rapidfuzz',
+                            help='Módulos que não podem ser importados no startup (separados por vírgula).')
+        parser.add_argument('--repeticoes', type=int, default=3)
+        parser.add_argument('--top', type=int, default=10, help='Quantos imports mais caros listar.')
+
+    def handle(self, *args, **options):
+        melhor = None
+        for _ in range(max(1, options['repeticoes'])):
+            medicao = self._medir()
+            if melhor is None or medicao['import_ms'] < melhor['import_ms']:
+                melhor = medicao
+
+        self.stdout.write(f"Tempo total do processo: {melhor['wall_ms']:.1f} ms")
+        self.stdout.write(f"Tempo de imports (-X importtime): {melhor['import_ms']:.1f} ms")
+        self.stdout.write('Imports mais caros (cumulativo):')
+        for modulo, ms in melhor['top'][:options['top']]:
+            self.stdout.write(f'  {ms:8.1f} ms  {modulo}')
+
+        erros = []
+        proibidos = [m.strip() for m in options['proibidos'].split(',') if m.strip()]
+        carregados = sorted(m for m in proibidos if m in melhor['modulos'])
+        if carregados:
+            erros.append(f'dependências pesadas importadas no startup: {", ".join(carregados)}')
+        budget = options['budget_ms']
+        if budget is not None and melhor['import_ms'] > budget:
+            erros.append(f"imports levaram {melhor['import_ms']:.1f} ms (orçamento: {budget:.0f} ms)")
+        if erros:
+            raise CommandError('❌ ' + '; '.join(erros))
+        self.stdout.write(self.style.SUCCESS('✅ Startup dentro do orçamento.'))
+
+    def _medir(self) -> dict:
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'cadastro_pessoas.settings')
+        inicio = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CODIGO_STARTUP],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        wall_ms = (time.perf_counter() - inicio) * 1000
+        if proc.returncode != 0:
+            raise CommandError(f'Falha ao iniciar o processo de medição:\n{proc.stderr[-2000:]}')
+
+        total_us = 0
+        modulos = set()
+        cumulativos = []
+        for linha in proc.stderr.splitlines():
+            m = LINHA_IMPORTTIME.match(linha)
+            if not m:
+                continue
+            cumulativo, recuo, modulo = int(m.group(2)), m.group(3), m.group(4)
+            modulos.add(modulo.split('.')[0])
+            if len(recuo) <= 1:  # import de nível superior: o cumulativo já inclui os filhos
+                total_us += cumulativo
+                cumulativos.append((modulo, cumulativo / 1000))
+        cumulativos.sort(key=lambda x: -x[1])
+        return {'wall_ms': wall_ms, 'import_ms': total_us / 1000, 'top': cumulativos, 'modulos': modulos}
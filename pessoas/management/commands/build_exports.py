@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from pessoas.exportacao import FORMATOS, caminho_snapshot, gerar_snapshot, versao_atual
+
+
+class Command(BaseCommand):
+    help = 'Gera (pré-aquece) os arquivos de exportação CSV/JSON/XLSX da versão atual dos dados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=sorted(FORMATOS), action='append',
+                            help='Formato a gerar (pode repetir). Padrão: todos.')
+        parser.add_argument('--forcar', action='store_true',
+                            help='Gera de novo mesmo se o arquivo da versão atual já existir.')
+        parser.add_argument('--incluir-arquivo', action='store_true',
+                            help='Gera a versão com os cadastros arquivados (pessoas_completo-*).')
+
+    def handle(self, *args, **options):
+        versao = versao_atual()
+        for formato in options['formato'] or sorted(FORMATOS):
+            caminho = caminho_snapshot(formato, versao, options['incluir_arquivo'])
+            if caminho.exists() and not options['forcar']:
+                self.stdout.write(f'{formato}: versão {versao} já existe ({caminho.name}).')
+                continue
+            inicio = time.perf_counter()
+            caminho = gerar_snapshot(formato, versao, options['incluir_arquivo'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {formato}: {caminho.name} ({caminho.stat().st_size / 1024:.1f} KiB) '
+                f'em {time.perf_counter() - inicio:.2f}s.'
+            ))
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from pessoas.alteracoes import compactar
+
+
+class Command(BaseCommand):
+    help = 'Compacta o log de alterações: mantém só a entrada mais nova de cada pessoa antes do horizonte.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30,
+                            help='Entradas mais novas que isso ficam intactas (padrão: 30).')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        horizonte = timezone.now() - timedelta(days=options['dias'])
+        removidas = compactar(horizonte, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Log compactado: {removidas} entradas removidas.'))
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from pessoas import cpf_lookup
+from pessoas.explain import (
+    LIVRE,
+    copiar_estatisticas,
+    criar_dados_exemplo,
+    ler_estatisticas,
+    rotas_para_verificar,
+    verificar_rota,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Roda cada rota de pessoas/urls.py num banco de teste, faz EXPLAIN QUERY PLAN de todos os SELECTs e '
+        'falha se uma rota indexada varrer a tabela/índice inteiro ou ordenar com TEMP B-TREE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rota', action='append', default=[],
+                            help='Verifica só estas rotas (nome da URL; pode repetir).')
+        parser.add_argument('--planos', action='store_true', help='Mostra o plano de todas as consultas.')
+        parser.add_argument('--cadastros', type=int, default=300,
+                            help='Cadastros de exemplo criados no banco de teste (padrão: 300).')
+        parser.add_argument('--estatisticas', action='store_true',
+                            help='Usa as estatísticas do ANALYZE do banco real (planos como em produção; '
+                                 'num banco pequeno o planner prefere SCAN).')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('❌ explain_views usa EXPLAIN QUERY PLAN do SQLite.')
+
+        estatisticas = ler_estatisticas() if options['estatisticas'] else []
+        banco_real = connection.settings_dict['NAME']
+        lookup_real = cpf_lookup._instance
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with tempfile.TemporaryDirectory() as tmp, override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                EXPORT_DIR=Path(tmp) / 'exports',
+                CPF_BLOOM_PATH=Path(tmp) / 'cpf_bloom.bin',
+                CPF_BLOOM_MAX_AGE=None,
+                ADMISSAO_ATIVA=False,
+            ):
+                exemplo = criar_dados_exemplo(options['cadastros'])
+                copiar_estatisticas(estatisticas)
+                falhas = self._verificar(exemplo, options)
+        finally:
+            cpf_lookup._instance = lookup_real
+            connection.creation.destroy_test_db(banco_real, verbosity=0)
+
+        if falhas:
+            raise CommandError(f'❌ {falhas} rota(s) indexada(s) com varredura completa ou TEMP B-TREE.')
+        self.stdout.write(self.style.SUCCESS('✅ Todas as rotas indexadas usam índice.'))
+
+    def _verificar(self, exemplo, options) -> int:
+        client = Client()
+        falhas = 0
+        for rota in rotas_para_verificar(exemplo):
+            if options['rota'] and rota.nome not in options['rota']:
+                continue
+            # Sem filtro de CPFs nem LRU: as buscas por CPF vão ao banco e entram na verificação.
+            cpf_lookup._instance = None
+            resultado = verificar_rota(client, rota.url, rota.nome, rota.exigencia, rota.dados, rota.motivo)
+            self._mostrar(resultado, options['planos'])
+            falhas += bool(resultado.problemas)
+        return falhas
+
+    def _mostrar(self, resultado, planos: bool) -> None:
+        rota = resultado.rota
+        marca = rota.exigencia if rota.exigencia != LIVRE else f'livre ({rota.motivo})'
+        if rota.motivo and rota.exigencia != LIVRE:
+            marca = f'{marca} ({rota.motivo})'
+        cabecalho = f'{rota.descricao} [{resultado.status}] {len(resultado.consultas)} SELECT(s) · {marca}'
+        if resultado.problemas:
+            self.stdout.write(self.style.ERROR(f'❌ {cabecalho}'))
+            for sql, problema in resultado.problemas:
+                self.stdout.write(f'    {problema}\n      {sql[:300]}')
+        else:
+            self.stdout.write(f'✅ {cabecalho}')
+        if planos:
+            for consulta in resultado.consultas:
+                self.stdout.write(f'    {consulta.sql[:200]}')
+                for linha in consulta.plano:
+                    self.stdout.write(f'      → {linha}')
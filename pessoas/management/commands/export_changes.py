@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from pessoas.alteracoes import iter_ndjson, ultimo_seq
+
+
+class Command(BaseCommand):
+    help = 'Escreve em NDJSON as alterações de pessoas posteriores a um cursor (seq).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=int, default=0,
+                            help='Último seq já recebido (padrão: 0 = tudo).')
+        parser.add_argument('--saida', default='-',
+                            help='Arquivo de saída (padrão: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        ate = ultimo_seq()
+        linhas = iter_ndjson(options['desde'], ate, options['chunk_size'])
+
+        if options['saida'] == '-':
+            for linha in linhas:
+                self.stdout.write(linha, ending='')
+        else:
+            with open(options['saida'], 'w', encoding='utf-8') as fh:
+                fh.writelines(linhas)
+        # Cursor para a próxima chamada vai para stderr, para não misturar com o NDJSON.
+        self.stderr.write(f'cursor={ate}')
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pessoas.duplicados import LIMIAR_PADRAO, chave_sem_data, chaves_de_bloco, comparar_blocos, normalizar_texto
+from pessoas.models import CandidatoDuplicado, Pessoa
+
+# Cadastros por leitura na passada por sobrenome (limita a memória dos blocos).
+LINHAS_POR_PARTICAO = 250_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Procura cadastros que podem ser a mesma pessoa (blocos por sobrenome/nome fonético + nascimento '
+        'e por nome fonético + sobrenome) e grava os pares candidatos para revisão.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limiar', type=float, default=LIMIAR_PADRAO,
+                            help=f'Score mínimo (0-1) para gravar um par (padrão: {LIMIAR_PADRAO}).')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos do pool de comparação (1 = sem pool).')
+        parser.add_argument('--max-bloco', type=int, default=200,
+                            help='Blocos maiores que isso são ignorados (evita custo quadrático).')
+        parser.add_argument('--blocos-por-tarefa', type=int, default=2000,
+                            help='Quantos blocos cada tarefa do pool recebe.')
+        parser.add_argument('--chunk-size', type=int, default=20_000,
+                            help='Linhas lidas do banco por vez.')
+        parser.add_argument('--particoes', type=int, default=None,
+                            help='Leituras da passada por sobrenome (padrão: uma a cada '
+                                 f'{LINHAS_POR_PARTICAO} cadastros).')
+
+    def handle(self, *args, **options):
+        limiar = options['limiar']
+        workers = max(1, options['workers'])
+        max_bloco = options['max_bloco']
+        por_tarefa = options['blocos_por_tarefa']
+        inicio = time.perf_counter()
+
+        self.stats = defaultdict(int)
+        # Pares ainda pendentes são recalculados; confirmados/descartados ficam.
+        CandidatoDuplicado.objects.filter(status=CandidatoDuplicado.STATUS_PENDENTE).delete()
+        # ignore_conflicts descarta pares já gravados sem avisar: conta pela tabela.
+        existentes = CandidatoDuplicado.objects.count()
+
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        pendentes = set()
+        lote: list = []
+        try:
+            grupos = chain(
+                self._blocos_por_data(options['chunk_size'], max_bloco),
+                self._blocos_por_sobrenome(options['chunk_size'], max_bloco, options['particoes']),
+            )
+            for blocos_do_grupo in grupos:
+                lote.extend(blocos_do_grupo)
+                if len(lote) < por_tarefa:
+                    continue
+                pendentes = self._enviar(pool, lote, limiar, pendentes, max_em_voo=workers * 2)
+                lote = []
+            if lote:
+                pendentes = self._enviar(pool, lote, limiar, pendentes, max_em_voo=workers * 2)
+            for fut in pendentes:
+                self._gravar(fut.result())
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stats['pares'] = CandidatoDuplicado.objects.count() - existentes
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {self.stats['pessoas']} cadastros em {self.stats['blocos']} blocos "
+            f"({self.stats['blocos_grandes']} ignorados por tamanho), "
+            f"{self.stats['pares']} pares candidatos encontrados em {duracao:.1f}s."
+        ))
+
+    def _blocos_por_data(self, chunk_size: int, max_bloco: int):
+        """Lê as pessoas ordenadas por nascimento e devolve os blocos de cada data."""
+        qs = (
+            Pessoa.objects.order_by('data_nascimento', 'pk')
+            .values_list('pk', 'nome', 'sobrenome', 'cpf', 'data_nascimento')
+        )
+        data_atual = None
+        blocos: dict[str, list] = defaultdict(list)
+        for pk, nome, sobrenome, cpf, nascimento in qs.iterator(chunk_size=chunk_size):
+            if nascimento != data_atual:
+                if blocos:
+                    yield self._fechar(blocos, max_bloco)
+                data_atual = nascimento
+                blocos = defaultdict(list)
+            self.stats['pessoas'] += 1
+            for chave in chaves_de_bloco(nome, sobrenome, nascimento.isoformat()):
+                blocos[chave].append((pk, nome, sobrenome, cpf, nascimento.isoformat()))
+        if blocos:
+            yield self._fechar(blocos, max_bloco)
+
+    def _blocos_por_sobrenome(self, chunk_size: int, max_bloco: int, particoes: int | None):
+        """Segunda passada, sem a data: pega o mesmo nome/sobrenome com a data digitada errada.
+
+        O bloco usa o sobrenome normalizado (Silva = silva = Sílva), que o SQLite
+        não ordena por índice. Em vez de `ORDER BY sobrenome` (ordenação
+        temporária e agrupamento pelo texto cru), lê em ordem de pk e reparte
+        os sobrenomes por hash: cada partição é uma leitura que só guarda os
+        seus blocos em memória.
+        """
+        if particoes is None:
+            # A primeira passada já contou os cadastros (o chain é preguiçoso).
+            particoes = math.ceil(self.stats['pessoas'] / LINHAS_POR_PARTICAO)
+        particoes = max(1, particoes)
+        qs = Pessoa.objects.order_by('pk').values_list('pk', 'nome', 'sobrenome', 'cpf', 'data_nascimento')
+        for particao in range(particoes):
+            blocos: dict[str, list] = defaultdict(list)
+            for pk, nome, sobrenome, cpf, nascimento in qs.iterator(chunk_size=chunk_size):
+                if particoes > 1 and hash(normalizar_texto(sobrenome)) % particoes != particao:
+                    continue
+                chave = chave_sem_data(nome, sobrenome)
+                if chave:
+                    blocos[chave].append((pk, nome, sobrenome, cpf, nascimento.isoformat()))
+            # Um bloco por vez: o handle junta em tarefas de --blocos-por-tarefa.
+            for bloco in self._fechar(blocos, max_bloco):
+                yield [bloco]
+
+    def _fechar(self, blocos: dict, max_bloco: int) -> list:
+        fechados = []
+        for chave, registros in blocos.items():
+            if len(registros) < 2:
+                continue
+            self.stats['blocos'] += 1
+            if len(registros) > max_bloco:
+                self.stats['blocos_grandes'] += 1
+                continue
+            fechados.append((chave, registros))
+        return fechados
+
+    def _enviar(self, pool, lote: list, limiar: float, pendentes: set, max_em_voo: int) -> set:
+        if pool is None:
+            self._gravar(comparar_blocos(lote, limiar))
+            return pendentes
+        pendentes.add(pool.submit(comparar_blocos, lote, limiar))
+        # Backpressure: não deixa a leitura do banco correr muito à frente do pool.
+        while len(pendentes) >= max_em_voo:
+            prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            for fut in prontos:
+                self._gravar(fut.result())
+        return pendentes
+
+    def _gravar(self, pares: list) -> None:
+        if not pares:
+            return
+        objs = [
+            CandidatoDuplicado(pessoa_a_id=pa, pessoa_b_id=pb, score=score, bloco=chave[:160])
+            for pa, pb, score, chave in pares
+        ]
+        with transaction.atomic():
+            CandidatoDuplicado.objects.bulk_create(objs, batch_size=1000, ignore_conflicts=True)
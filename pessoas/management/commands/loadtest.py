@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pessoas.loadtest import (
+    ASGITransporte, Dados, HTTPTransporte, MIX_PADRAO, WSGITransporte, executar, parse_mix,
+)
+from pessoas.models import Pessoa
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga: usuários virtuais concorrentes (threads) com mix de cenários ponderado; '
+        'relata vazão, p50/p95/p99, erros e "database is locked" por rota.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--transporte', choices=('wsgi', 'asgi', 'http'), default='wsgi',
+                            help='wsgi/asgi chamam a aplicação no próprio processo; http usa --url.')
+        parser.add_argument('--url', default='http://127.0.0.1:8000',
+                            help='Servidor alvo no modo http (ex.: runserver ou gunicorn).')
+        parser.add_argument('--workers', type=int, default=8, help='Usuários virtuais simultâneos.')
+        parser.add_argument('--duracao', type=float, default=30, help='Segundos de teste (padrão: 30).')
+        parser.add_argument('--requisicoes', type=int, default=0,
+                            help='Para após N cenários (ignora --duracao).')
+        parser.add_argument('--mix', default='',
+                            help='Pesos dos cenários, ex.: "lista=20,detalhe=10,criar=0". '
+                                 f'Padrão: {",".join(f"{k}={v}" for k, v in MIX_PADRAO.items())}.')
+        parser.add_argument('--amostra', type=int, default=2000,
+                            help='Cadastros lidos do banco para montar as URLs de detalhe/edição/CPF.')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--json', dest='saida_json', default='',
+                            help='Grava o relatório também neste arquivo JSON.')
+        parser.add_argument('--limpar', action='store_true',
+                            help='Exclui os cadastros criados pelo cenário "criar" ao final.')
+
+    def handle(self, *args, **options):
+        try:
+            mix = {**MIX_PADRAO, **parse_mix(options['mix'])}
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if not any(mix.values()):
+            raise CommandError('Todos os pesos do mix são zero.')
+
+        transporte = self._transporte(options)
+        amostra = list(
+            Pessoa.objects.order_by('pk').values_list('pk', 'nome', 'cpf')[:options['amostra']]
+        )
+        dados = Dados(
+            pks=[pk for pk, _n, _c in amostra],
+            nomes=[nome for _p, nome, _c in amostra],
+            cpfs=[cpf for _p, _n, cpf in amostra],
+        )
+        if not dados.pks:
+            self.stdout.write(self.style.WARNING('⚠️ Nenhum cadastro no banco: detalhe/editar não vão rodar.'))
+
+        workers = max(1, options['workers'])
+        requisicoes = options['requisicoes'] or None
+        self.stdout.write(
+            f"ℹ️ {options['transporte']} · {workers} workers · "
+            + (f'{requisicoes} cenários' if requisicoes else f"{options['duracao']:.0f}s")
+        )
+        metricas, duracao = executar(
+            transporte, dados, mix, workers,
+            duracao=None if requisicoes else options['duracao'],
+            requisicoes=requisicoes, seed=options['seed'],
+        )
+        relatorio = metricas.relatorio(duracao)
+        self._imprimir(relatorio, duracao)
+
+        if options['saida_json']:
+            with open(options['saida_json'], 'w', encoding='utf-8') as fh:
+                json.dump({'duracao_s': duracao, 'workers': workers, 'transporte': options['transporte'],
+                           'mix': mix, 'rotas': relatorio}, fh, ensure_ascii=False, indent=2)
+
+        if options['limpar'] and dados.criados:
+            removidos = 0
+            for i in range(0, len(dados.criados), 500):
+                removidos += Pessoa.objects.filter(cpf__in=dados.criados[i:i + 500]).delete()[0]
+            self.stdout.write(f'ℹ️ {removidos} cadastros de teste removidos.')
+
+    def _transporte(self, options):
+        if options['transporte'] == 'http':
+            return HTTPTransporte(options['url'])
+        if options['transporte'] == 'asgi':
+            from cadastro_pessoas.asgi import application
+            return ASGITransporte(application)
+        from cadastro_pessoas.wsgi import application
+        return WSGITransporte(application)
+
+    def _imprimir(self, relatorio: list[dict], duracao: float) -> None:
+        self.stdout.write(
+            f"{'rota':<22} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'erros':>6} {'erro %':>7} {'form':>5} {'locked':>6}"
+        )
+        for linha in relatorio:
+            texto = (
+                f"{linha['rota']:<22} {linha['requisicoes']:>7} {linha['req_s']:>8.1f} "
+                f"{linha['p50_ms']:>8.1f} {linha['p95_ms']:>8.1f} {linha['p99_ms']:>8.1f} "
+                f"{linha['erros']:>6} {linha['taxa_erro'] * 100:>6.1f}% {linha['form_invalido']:>5} "
+                f"{linha['database_locked']:>6}"
+            )
+            if linha['rota'] == 'TOTAL':
+                self.stdout.write(self.style.MIGRATE_HEADING(texto))
+            elif linha['erros'] or linha['database_locked']:
+                self.stdout.write(self.style.WARNING(texto))
+            else:
+                self.stdout.write(texto)
+        for linha in relatorio:
+            if linha['excecao']:
+                self.stdout.write(self.style.WARNING(f"⚠️ {linha['rota']}: {linha['excecao']}"))
+        total = relatorio[-1]
+        estilo = self.style.SUCCESS if not total['erros'] else self.style.ERROR
+        self.stdout.write(estilo(
+            f"{'✅' if not total['erros'] else '❌'} {total['requisicoes']} requisições em {duracao:.1f}s "
+            f"({total['req_s']:.1f} req/s), {total['erros']} erros "
+            f"({total['form_invalido']} formulários com erro), "
+            f"{total['database_locked']} 'database is locked'."
+        ))
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from pessoas.cpf_lookup import get_cpf_lookup
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o filtro de Bloom de CPFs usado nas buscas por CPF (agende no cron).'
+
+    def handle(self, *args, **options):
+        lookup = get_cpf_lookup()
+        bloom = lookup.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Filtro de CPF reconstruído em {lookup.path}: {bloom.count} CPFs, '
+            f'{bloom.num_bits} bits, {bloom.num_hashes} hashes, '
+            f'FPR estimada {bloom.estimated_fpr():.4%}.'
+        ))
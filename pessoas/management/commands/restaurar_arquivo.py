@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pessoas.arquivamento import adicionar_argumentos_filtro, contar, filtro_das_opcoes, restaurar
+
+
+class Command(BaseCommand):
+    help = 'Devolve cadastros do arquivo (PessoaArquivo) para a tabela de pessoas, com o mesmo id.'
+
+    def add_arguments(self, parser):
+        adicionar_argumentos_filtro(parser)
+        parser.add_argument('--todos', action='store_true', help='Restaura o arquivo inteiro.')
+
+    def handle(self, *args, **options):
+        try:
+            filtro = filtro_das_opcoes(options)
+        except OSError as exc:
+            raise CommandError(f'❌ Não foi possível ler a lista de CPFs: {exc}')
+        except ValueError as exc:
+            raise CommandError(f'❌ {exc}')
+        if filtro.vazio and not options['todos']:
+            raise CommandError('❌ Informe um filtro ou --todos.')
+
+        previstos = contar(filtro, arquivo=True)
+        if options['dry_run'] or not previstos:
+            self.stdout.write(f'ℹ️ {previstos} cadastros seriam restaurados.')
+            return
+
+        inicio = time.perf_counter()
+        total, conflitos = restaurar(
+            filtro, chunk_size=max(1, options['chunk_size']), pausa=options['pausa'],
+            progresso=lambda n: self.stdout.write(f'  {n}/{previstos}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {total} cadastros restaurados em {time.perf_counter() - inicio:.1f}s.'
+        ))
+        for a in conflitos:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️ Continua no arquivo: {a} — CPF ou id já em uso por outro cadastro.'
+            ))
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from pessoas.cpf import formatar_lote, validar_lote
+from pessoas.models import Pessoa
+
+
+class Command(BaseCommand):
+    help = 'Varre os CPFs gravados em lotes e lista os que têm dígitos verificadores inválidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=20_000,
+                            help='Quantidade de linhas lidas do banco por lote (padrão: 20000).')
+        parser.add_argument('--limite', type=int, default=100,
+                            help='Máximo de CPFs inválidos listados na saída (0 = só o total).')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        limite = options['limite']
+        inicio = time.perf_counter()
+
+        total = invalidos = 0
+        ultimo_pk = 0
+        while True:
+            # Paginação por pk (keyset): cada lote usa o índice da PK, sem OFFSET.
+            lote = list(
+                Pessoa.objects.filter(pk__gt=ultimo_pk)
+                .order_by('pk')
+                .values_list('pk', 'cpf', 'nome', 'sobrenome')[:chunk_size]
+            )
+            if not lote:
+                break
+            ultimo_pk = lote[-1][0]
+            total += len(lote)
+
+            cpfs = [row[1] for row in lote]
+            validos = validar_lote(cpfs)
+            ruins = [row for row, ok in zip(lote, validos) if not ok]
+            if ruins and invalidos < limite:
+                mostrar = ruins[:limite - invalidos]
+                for (pk, _cpf, nome, sobrenome), fmt in zip(mostrar, formatar_lote([r[1] for r in mostrar])):
+                    self.stdout.write(f'{pk};{fmt or _cpf};{nome} {sobrenome}')
+            invalidos += len(ruins)
+
+        duracao = time.perf_counter() - inicio
+        estilo = self.style.WARNING if invalidos else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f'{"⚠️" if invalidos else "✅"} {total} CPFs verificados em {duracao:.2f}s: '
+            f'{invalidos} com dígitos verificadores inválidos.'
+        ))
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+import urllib.request
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from pessoas.estaticos import VENDOR, VENDOR_EXTRAS
+
+# Os .map não são versionados; sem isso o collectstatic (manifest) falharia procurando por eles.
+_SOURCE_MAP = re.compile(rb'\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$')
+
+
+class Command(BaseCommand):
+    help = 'Baixa Bootstrap, Bootstrap Icons e Chart.js (versões fixas) para pessoas/static/pessoas/vendor/.'
+    # É o que resolve o pessoas.E001: não pode ser barrado por ele.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forcar', action='store_true', help='Baixa de novo mesmo se o arquivo já existir.')
+
+    def handle(self, *args, **options):
+        static = Path(apps.get_app_config('pessoas').path) / 'static'
+        arquivos = {a.caminho: a.cdn for a in VENDOR.values()} | VENDOR_EXTRAS
+        for caminho, url in arquivos.items():
+            destino = static / caminho
+            if destino.exists() and not options['forcar']:
+                self.stdout.write(f'ℹ️ {caminho} já existe.')
+                continue
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    dados = resp.read()
+            except OSError as exc:
+                raise CommandError(f'❌ Falha ao baixar {url}: {exc}')
+            if caminho.endswith(('.css', '.js')):
+                dados = _SOURCE_MAP.sub(b'\n', dados)
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_bytes(dados)
+            self.stdout.write(self.style.SUCCESS(f'✅ {caminho} ({len(dados) // 1024} KB)'))
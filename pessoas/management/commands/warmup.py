@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from pessoas.warmup import aquecer
+
+
+class Command(BaseCommand):
+    help = 'Pré-compila templates, resolve URLs, abre o banco e carrega o filtro de CPFs (e mostra os tempos).'
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for etapa, (itens, segundos) in aquecer().items():
+            total += segundos
+            status = f'{itens} itens' if itens >= 0 else 'FALHOU (ver log)'
+            self.stdout.write(f'{etapa:<12} {status:<18} {segundos * 1000:8.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'✅ Aquecimento concluído em {total * 1000:.1f} ms.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:25
+
+import django.core.validators
+import pessoas.cpf
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pessoa',
+            name='cpf',
+            field=models.CharField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator(message='CPF deve conter exatamente 11 dígitos numéricos (somente números).', regex='^\\d{11}$'), pessoas.cpf.cpf_digitos_validator]),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0002_cpf_digitos_verificadores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatoDuplicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('bloco', models.CharField(max_length=160)),
+                ('status', models.CharField(choices=[('P', 'Pendente'), ('C', 'Confirmado'), ('D', 'Descartado')], default='P', max_length=1)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('pessoa_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pessoas.pessoa')),
+                ('pessoa_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pessoas.pessoa')),
+            ],
+            options={
+                'verbose_name': 'Candidato a duplicado',
+                'verbose_name_plural': 'Candidatos a duplicados',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='candidato_status_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('pessoa_a', 'pessoa_b'), name='candidato_duplicado_par_unico')],
+            },
+        ),
+    ]
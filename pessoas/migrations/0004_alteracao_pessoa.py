@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:28
+
+from django.db import migrations, models
+
+
+def registrar_pessoas_existentes(apps, schema_editor):
+    """Uma inclusão por pessoa já cadastrada: cursor 0 passa a reproduzir a base inteira."""
+    Pessoa = apps.get_model('pessoas', 'Pessoa')
+    AlteracaoPessoa = apps.get_model('pessoas', 'AlteracaoPessoa')
+    lote = []
+    for p in Pessoa.objects.order_by('pk').iterator(chunk_size=2000):
+        lote.append(AlteracaoPessoa(pessoa_id=p.pk, operacao='I', dados={
+            'nome': p.nome,
+            'sobrenome': p.sobrenome,
+            'data_nascimento': p.data_nascimento.isoformat(),
+            'sexo': p.sexo,
+            'cpf': p.cpf,
+        }))
+        if len(lote) >= 2000:
+            AlteracaoPessoa.objects.bulk_create(lote)
+            lote = []
+    AlteracaoPessoa.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0003_candidato_duplicado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoPessoa',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('pessoa_id', models.BigIntegerField()),
+                ('operacao', models.CharField(choices=[('I', 'Inclusão'), ('U', 'Alteração'), ('D', 'Exclusão')], max_length=1)),
+                ('dados', models.JSONField()),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Alteração de pessoa',
+                'verbose_name_plural': 'Alterações de pessoas',
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['pessoa_id', 'seq'], name='alteracao_pessoa_seq_idx'), models.Index(fields=['criado_em'], name='alteracao_criado_em_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_pessoas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0004_alteracao_pessoa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=models.Index(fields=['nome', 'sobrenome'], name='pessoa_nome_sobrenome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=models.Index(fields=['data_nascimento'], name='pessoa_nascimento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=models.Index(fields=['sexo', 'data_nascimento'], name='pessoa_sexo_nascimento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=models.Index(fields=['sexo', 'nome', 'sobrenome'], name='pessoa_sexo_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=models.Index(fields=['atualizado_em'], name='pessoa_atualizado_em_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0005_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PessoaArquivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=120)),
+                ('sobrenome', models.CharField(max_length=120)),
+                ('data_nascimento', models.DateField()),
+                ('sexo', models.CharField(choices=[('M', 'Masculino'), ('F', 'Feminino')], max_length=1)),
+                ('cpf', models.CharField(db_index=True, max_length=11)),
+                ('criado_em', models.DateTimeField()),
+                ('atualizado_em', models.DateTimeField()),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+                ('motivo', models.CharField(blank=True, max_length=120)),
+            ],
+            options={
+                'verbose_name': 'Pessoa arquivada',
+                'verbose_name_plural': 'Pessoas arquivadas',
+                'ordering': ['nome', 'sobrenome'],
+                'indexes': [models.Index(fields=['nome', 'sobrenome'], name='arquivo_nome_sobrenome_idx'), models.Index(fields=['arquivado_em'], name='arquivo_arquivado_em_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0006_pessoa_arquivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatoDuplicadoArquivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pessoa_a_id', models.BigIntegerField()),
+                ('pessoa_b_id', models.BigIntegerField()),
+                ('score', models.FloatField()),
+                ('bloco', models.CharField(max_length=160)),
+                ('status', models.CharField(choices=[('P', 'Pendente'), ('C', 'Confirmado'), ('D', 'Descartado')], max_length=1)),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Candidato a duplicado arquivado',
+                'verbose_name_plural': 'Candidatos a duplicados arquivados',
+                'indexes': [models.Index(fields=['pessoa_b_id'], name='candidato_arquivo_b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('pessoa_a_id', 'pessoa_b_id'), name='candidato_arquivo_par_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+"""Corrige os CPFs do seed_pessoas, que não tinham dígitos verificadores válidos.
+
+Só altera linhas que ainda são o seed original (mesmo CPF antigo, nome e
+sobrenome) e cujo CPF novo não está em uso. Cada troca entra no log de
+alterações; no fim o filtro de CPFs é invalidado.
+"""
+
+from django.db import migrations, transaction
+from django.utils import timezone
+
+# (cpf antigo, cpf corrigido, nome, sobrenome)
+SEED_CORRIGIDO = [
+    ('92738461520', '92738461573', 'Sérgio', 'Timon'),
+    ('48195027633', '48195027601', 'Júlia', 'Lanzoni'),
+    ('73019462855', '73019462878', 'Arthur', 'Timon'),
+    ('60294718301', '60294718303', 'Miguel', 'Lanzoni'),
+    ('19485720366', '19485720360', 'Mariana', 'Souza'),
+    ('53820697144', '53820697195', 'Roberto', 'Almeida'),
+    ('71549286013', '71549286030', 'Fernanda', 'Pereira'),
+    ('40928573691', '40928573656', 'Lucas', 'Oliveira'),
+    ('86031749205', '86031749203', 'Beatriz', 'Costa'),
+    ('27590148362', '27590148350', 'Joao', 'Silva'),
+    ('91467235088', '91467235016', 'Carla', 'Mendes'),
+    ('36850917420', '36850917439', 'Thiago', 'Ferreira'),
+    ('59281473066', '59281473097', 'Patricia', 'Rocha'),
+    ('80732619455', '80732619440', 'Vinicius', 'Ribeiro'),
+    ('15693074281', '15693074234', 'Camila', 'Lima'),
+    ('67420591837', '67420591849', 'Eduardo', 'Martins'),
+    ('31985720644', '31985720612', 'Isabela', 'Barbosa'),
+    ('90214673851', '90214673804', 'Gustavo', 'Carvalho'),
+    ('48017593622', '48017593600', 'Aline', 'Dias'),
+    ('61594820733', '61594820767', 'Rafael', 'Santos'),
+    ('29374615089', '29374615061', 'Daniela', 'Castro'),
+    ('50937186244', '50937186295', 'Leticia', 'Teixeira'),
+    ('86730491572', '86730491566', 'Bruno', 'Gomes'),
+]
+
+
+def _trocar(apps, schema_editor, de: int, para: int):
+    Pessoa = apps.get_model('pessoas', 'Pessoa')
+    AlteracaoPessoa = apps.get_model('pessoas', 'AlteracaoPessoa')
+    alias = schema_editor.connection.alias
+    agora = timezone.now()
+    trocados = []
+    for linha in SEED_CORRIGIDO:
+        antigo, novo, nome, sobrenome = linha[de], linha[para], linha[2], linha[3]
+        if Pessoa.objects.using(alias).filter(cpf=novo).exists():
+            continue
+        pessoa = Pessoa.objects.using(alias).filter(cpf=antigo, nome=nome, sobrenome=sobrenome).first()
+        if pessoa is None:
+            continue
+        Pessoa.objects.using(alias).filter(pk=pessoa.pk).update(cpf=novo, atualizado_em=agora)
+        trocados.append(AlteracaoPessoa(pessoa_id=pessoa.pk, operacao='U', dados={
+            'nome': pessoa.nome,
+            'sobrenome': pessoa.sobrenome,
+            'data_nascimento': pessoa.data_nascimento.isoformat(),
+            'sexo': pessoa.sexo,
+            'cpf': novo,
+        }))
+    if trocados:
+        AlteracaoPessoa.objects.using(alias).bulk_create(trocados)
+        transaction.on_commit(_invalidar_filtro_cpfs, using=alias)
+
+
+def _invalidar_filtro_cpfs():
+    from pessoas.cpf_lookup import get_cpf_lookup
+    get_cpf_lookup().invalidate()
+
+
+def corrigir(apps, schema_editor):
+    _trocar(apps, schema_editor, 0, 1)
+
+
+def desfazer(apps, schema_editor):
+    _trocar(apps, schema_editor, 1, 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pessoas', '0007_candidato_duplicado_arquivo'),
+    ]
+
+    operations = [
+        migrations.RunPython(corrigir, desfazer),
+    ]
@@ -2,13 +2,118 @@ from __future__ import annotations
 
 from datetime import date
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cpf import cpf_digitos_validator, formatar_cpf
 
 cpf_validator = RegexValidator(
     regex=r'^\d{11}$',
     message='CPF deve conter exatamente 11 dígitos numéricos (somente números).'
 )
 
+LOTE_ALTERACOES = 500  # linhas por lote no update() em massa
+
+
+class PessoaQuerySet(models.QuerySet):
+    """Caminhos em massa também gravam no log de alterações, na mesma transação."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        conflitos = kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts')
+        with transaction.atomic(using=self.db):
+            if conflitos:
+                # Com conflitos o Django não diz quais linhas entraram: o que já
+                # existia (mesmo CPF ou mesmo pk) antes do INSERT não é inclusão.
+                cpfs_antes = set(Pessoa.objects.filter(cpf__in=[p.cpf for p in objs]).values_list('cpf', flat=True))
+                pks_antes = set(Pessoa.objects.filter(pk__in=[p.pk for p in objs if p.pk is not None])
+                                .values_list('pk', flat=True))
+            else:
+                cpfs_antes = pks_antes = set()
+            criados = super().bulk_create(objs, *args, **kwargs)
+            sem_pk = [p.cpf for p in criados if p.pk is None and p.cpf not in cpfs_antes]
+            if sem_pk:  # banco sem RETURNING: busca os pks pelo CPF (único)
+                pks = dict(Pessoa.objects.filter(cpf__in=sem_pk).values_list('cpf', 'pk'))
+                for p in criados:
+                    if p.pk is None and p.cpf not in cpfs_antes:
+                        p.pk = pks.get(p.cpf)
+            novos = [p for p in criados if p.pk is not None]
+            alterados = []
+            if conflitos:
+                no_banco = set(Pessoa.objects.filter(pk__in=[p.pk for p in novos]).values_list('pk', 'cpf'))
+                vistos = set()
+                confirmados = []
+                for p in novos:
+                    if (p.pk, p.cpf) not in no_banco or p.pk in vistos:
+                        continue  # ignorado (conflito dentro do próprio lote ou com outra linha)
+                    vistos.add(p.pk)
+                    if p.cpf in cpfs_antes or p.pk in pks_antes:
+                        alterados.append(p.pk)  # update_conflicts: a linha existente foi atualizada
+                    else:
+                        confirmados.append(p)
+                novos = confirmados
+            AlteracaoPessoa.registrar(AlteracaoPessoa.OP_INSERT, novos)
+            if alterados:
+                AlteracaoPessoa.registrar(AlteracaoPessoa.OP_UPDATE, Pessoa.objects.filter(pk__in=alterados))
+            pares = [(p.cpf, p.pk) for p in novos]
+            transaction.on_commit(lambda: _cpf_lookup().registrar_insercoes(pares))
+        return criados
+
+    def update(self, **kwargs):
+        # `auto_now` não vale para update(): sem isso o cache de linhas (chave com
+        # atualizado_em, ver render.py) e os filtros por alteração ficariam velhos.
+        if self.query.is_sliced:
+            raise TypeError('Cannot update a query once a slice has been taken.')
+        kwargs.setdefault('atualizado_em', timezone.now())
+        linhas = 0
+        with transaction.atomic(using=self.db):
+            # Em lotes por pk (keyset): só LOTE_ALTERACOES pks na memória por vez. Cada
+            # lote é atualizado e relido para o log; as linhas já alteradas ficam para
+            # trás do cursor, mesmo que deixem de casar com o filtro.
+            qs = self.order_by('pk')
+            ultimo = None
+            while True:
+                pagina = qs if ultimo is None else qs.filter(pk__gt=ultimo)
+                pks = list(pagina.values_list('pk', flat=True)[:LOTE_ALTERACOES])
+                if not pks:
+                    break
+                lote = Pessoa.objects.using(self.db).filter(pk__in=pks)
+                linhas += super(PessoaQuerySet, lote).update(**kwargs)
+                AlteracaoPessoa.registrar(AlteracaoPessoa.OP_UPDATE, lote)
+                ultimo = pks[-1]
+            if linhas and 'cpf' in kwargs:
+                transaction.on_commit(lambda: _cpf_lookup().invalidate())
+        return linhas
+
+    update.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        # O bulk_update do Django grava por update() (log e filtro de CPFs vêm de lá);
+        # aqui só entra atualizado_em, igual nos objetos e no banco.
+        objs = list(objs)
+        agora = timezone.now()
+        for p in objs:
+            p.atualizado_em = agora
+        return super().bulk_update(objs, list(dict.fromkeys([*fields, 'atualizado_em'])), *args, **kwargs)
+
+    bulk_update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            removidos = list(self.order_by().values('pk', 'cpf'))
+            resultado = super().delete()
+            AlteracaoPessoa.registrar_exclusoes(removidos)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+def _cpf_lookup():
+    from .cpf_lookup import get_cpf_lookup
+    return get_cpf_lookup()
+
+
 class Pessoa(models.Model):
     SEXO_MASC = 'M'
     SEXO_FEM = 'F'
@@ -16,28 +121,54 @@ class Pessoa(models.Model):
         (SEXO_MASC, 'Masculino'),
         (SEXO_FEM, 'Feminino'),
     )
+    SEXO_EXTENSO = dict(SEXO_CHOICES)
 
     nome = models.CharField(max_length=120)
     sobrenome = models.CharField(max_length=120)
     data_nascimento = models.DateField()
     sexo = models.CharField(max_length=1, choices=SEXO_CHOICES)
-    cpf = models.CharField(max_length=11, unique=True, validators=[cpf_validator])
+    cpf = models.CharField(max_length=11, unique=True, validators=[cpf_validator, cpf_digitos_validator])
 
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    objects = PessoaQuerySet.as_manager()
+
     class Meta:
         ordering = ['nome', 'sobrenome']
         verbose_name = 'Pessoa'
         verbose_name_plural = 'Pessoas'
+        indexes = [
+            # Ordenação padrão e paginação por keyset (nome, sobrenome, pk).
+            models.Index(fields=['nome', 'sobrenome'], name='pessoa_nome_sobrenome_idx'),
+            # Faixas de idade, mais velha/mais nova, aniversariantes por intervalo de datas.
+            models.Index(fields=['data_nascimento'], name='pessoa_nascimento_idx'),
+            # Sexo combinado com idade/nascimento.
+            models.Index(fields=['sexo', 'data_nascimento'], name='pessoa_sexo_nascimento_idx'),
+            # Filtros homens/mulheres: WHERE sexo = ? ORDER BY nome, sobrenome sem ordenação temporária.
+            models.Index(fields=['sexo', 'nome', 'sobrenome'], name='pessoa_sexo_nome_idx'),
+            models.Index(fields=['atualizado_em'], name='pessoa_atualizado_em_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.nome} {self.sobrenome} ({self.cpf_formatado})"
 
+    def save(self, *args, **kwargs):
+        op = AlteracaoPessoa.OP_INSERT if self._state.adding else AlteracaoPessoa.OP_UPDATE
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            AlteracaoPessoa.registrar(op, [self])
+
+    def delete(self, *args, **kwargs):
+        removido = {'pk': self.pk, 'cpf': self.cpf}
+        with transaction.atomic(using=kwargs.get('using')):
+            resultado = super().delete(*args, **kwargs)
+            AlteracaoPessoa.registrar_exclusoes([removido])
+        return resultado
+
     @property
     def cpf_formatado(self) -> str:
-        cpf = (self.cpf or '').zfill(11)
-        return f"{cpf[0:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:11]}"
+        return formatar_cpf(self.cpf)
 
     @property
     def idade(self) -> int:
@@ -53,4 +184,194 @@ class Pessoa(models.Model):
 
     @property
     def sexo_extenso(self) -> str:
-        return dict(self.SEXO_CHOICES).get(self.sexo, self.sexo)
+        return self.SEXO_EXTENSO.get(self.sexo, self.sexo)
+
+
+class CandidatoDuplicado(models.Model):
+    """Par de cadastros que podem ser a mesma pessoa (gerado por `find_duplicates`)."""
+    STATUS_PENDENTE = 'P'
+    STATUS_CONFIRMADO = 'C'
+    STATUS_DESCARTADO = 'D'
+    STATUS_CHOICES = (
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_CONFIRMADO, 'Confirmado'),
+        (STATUS_DESCARTADO, 'Descartado'),
+    )
+
+    # Sempre pessoa_a.pk < pessoa_b.pk, para o par não aparecer duas vezes.
+    pessoa_a = models.ForeignKey(Pessoa, on_delete=models.CASCADE, related_name='+')
+    pessoa_b = models.ForeignKey(Pessoa, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    bloco = models.CharField(max_length=160)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = 'Candidato a duplicado'
+        verbose_name_plural = 'Candidatos a duplicados'
+        constraints = [
+            models.UniqueConstraint(fields=['pessoa_a', 'pessoa_b'], name='candidato_duplicado_par_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['status', '-score'], name='candidato_status_score_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.pessoa_a_id} ~ {self.pessoa_b_id} ({self.score:.2f})"
+
+
+class AlteracaoPessoa(models.Model):
+    """Log append-only de alterações em `Pessoa` (outbox para exportação incremental).
+
+    `seq` cresce sempre (AUTOINCREMENT no SQLite) e serve de cursor para os
+    consumidores: `/exportacao/alteracoes/?desde=<seq>` ou `manage.py export_changes`.
+    """
+    OP_INSERT = 'I'
+    OP_UPDATE = 'U'
+    OP_DELETE = 'D'
+    OP_CHOICES = (
+        (OP_INSERT, 'Inclusão'),
+        (OP_UPDATE, 'Alteração'),
+        (OP_DELETE, 'Exclusão'),
+    )
+
+    seq = models.BigAutoField(primary_key=True)
+    pessoa_id = models.BigIntegerField()  # sem FK: a linha sobrevive à exclusão da pessoa
+    operacao = models.CharField(max_length=1, choices=OP_CHOICES)
+    dados = models.JSONField()
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['seq']
+        verbose_name = 'Alteração de pessoa'
+        verbose_name_plural = 'Alterações de pessoas'
+        indexes = [
+            models.Index(fields=['pessoa_id', 'seq'], name='alteracao_pessoa_seq_idx'),
+            models.Index(fields=['criado_em'], name='alteracao_criado_em_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.seq} {self.operacao} pessoa {self.pessoa_id}"
+
+    @staticmethod
+    def snapshot(pessoa: Pessoa) -> dict:
+        return {
+            'nome': pessoa.nome,
+            'sobrenome': pessoa.sobrenome,
+            'data_nascimento': pessoa.data_nascimento.isoformat() if pessoa.data_nascimento else None,
+            'sexo': pessoa.sexo,
+            'cpf': pessoa.cpf,
+        }
+
+    @classmethod
+    def registrar(cls, operacao: str, pessoas) -> None:
+        cls.objects.bulk_create(
+            [cls(pessoa_id=p.pk, operacao=operacao, dados=cls.snapshot(p)) for p in pessoas],
+            batch_size=500,
+        )
+
+    @classmethod
+    def registrar_exclusoes(cls, removidos: list[dict]) -> None:
+        cls.objects.bulk_create(
+            [cls(pessoa_id=r['pk'], operacao=cls.OP_DELETE, dados={'cpf': r['cpf']}) for r in removidos],
+            batch_size=500,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            'seq': self.seq,
+            'op': self.operacao,
+            'pessoa_id': self.pessoa_id,
+            'dados': self.dados,
+            'em': self.criado_em.isoformat(),
+        }
+
+
+class PessoaArquivo(models.Model):
+    """Cadastros retirados da tabela quente (`Pessoa`) por `manage.py arquivar_pessoas`.
+
+    Guarda o mesmo `id` da pessoa, para `restaurar_arquivo` devolvê-la com o
+    mesmo pk. `cpf` não é único aqui: um CPF pode ser arquivado, recadastrado e
+    arquivado de novo.
+    """
+    SEXO_EXTENSO = Pessoa.SEXO_EXTENSO
+
+    id = models.BigIntegerField(primary_key=True)
+    nome = models.CharField(max_length=120)
+    sobrenome = models.CharField(max_length=120)
+    data_nascimento = models.DateField()
+    sexo = models.CharField(max_length=1, choices=Pessoa.SEXO_CHOICES)
+    cpf = models.CharField(max_length=11, db_index=True)
+    criado_em = models.DateTimeField()
+    atualizado_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+    motivo = models.CharField(max_length=120, blank=True)
+
+    class Meta:
+        ordering = ['nome', 'sobrenome']
+        verbose_name = 'Pessoa arquivada'
+        verbose_name_plural = 'Pessoas arquivadas'
+        indexes = [
+            models.Index(fields=['nome', 'sobrenome'], name='arquivo_nome_sobrenome_idx'),
+            models.Index(fields=['arquivado_em'], name='arquivo_arquivado_em_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.nome} {self.sobrenome} ({self.cpf_formatado}) [arquivo]"
+
+    # Mesmas regras de exibição de `Pessoa`.
+    cpf_formatado = Pessoa.cpf_formatado
+    idade = Pessoa.idade
+    sexo_extenso = Pessoa.sexo_extenso
+
+    @classmethod
+    def de_pessoa(cls, pessoa: Pessoa, motivo: str = '') -> PessoaArquivo:
+        return cls(
+            id=pessoa.pk, nome=pessoa.nome, sobrenome=pessoa.sobrenome,
+            data_nascimento=pessoa.data_nascimento, sexo=pessoa.sexo, cpf=pessoa.cpf,
+            criado_em=pessoa.criado_em, atualizado_em=pessoa.atualizado_em, motivo=motivo[:120],
+        )
+
+    def para_pessoa(self) -> Pessoa:
+        return Pessoa(
+            pk=self.pk, nome=self.nome, sobrenome=self.sobrenome,
+            data_nascimento=self.data_nascimento, sexo=self.sexo, cpf=self.cpf,
+        )
+
+
+class CandidatoDuplicadoArquivo(models.Model):
+    """Pares de `CandidatoDuplicado` de pessoas arquivadas (as FKs apagariam o par e a decisão).
+
+    Voltam para `CandidatoDuplicado` quando as duas pessoas estão de novo na
+    tabela quente (`restaurar_arquivo`).
+    """
+    pessoa_a_id = models.BigIntegerField()
+    pessoa_b_id = models.BigIntegerField()
+    score = models.FloatField()
+    bloco = models.CharField(max_length=160)
+    status = models.CharField(max_length=1, choices=CandidatoDuplicado.STATUS_CHOICES)
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Candidato a duplicado arquivado'
+        verbose_name_plural = 'Candidatos a duplicados arquivados'
+        constraints = [
+            models.UniqueConstraint(fields=['pessoa_a_id', 'pessoa_b_id'], name='candidato_arquivo_par_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['pessoa_b_id'], name='candidato_arquivo_b_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.pessoa_a_id} ~ {self.pessoa_b_id} ({self.score:.2f}) [arquivo]"
+
+    @classmethod
+    def de_candidato(cls, c: CandidatoDuplicado) -> CandidatoDuplicadoArquivo:
+        return cls(pessoa_a_id=c.pessoa_a_id, pessoa_b_id=c.pessoa_b_id, score=c.score, bloco=c.bloco,
+                   status=c.status)
+
+    def para_candidato(self) -> CandidatoDuplicado:
+        return CandidatoDuplicado(pessoa_a_id=self.pessoa_a_id, pessoa_b_id=self.pessoa_b_id, score=self.score,
+                                  bloco=self.bloco, status=self.status)
@@ -0,0 +1,83 @@
+"""Renderização rápida das linhas da tabela de pessoas (`pessoas_list.html`).
+
+Com milhares de linhas, montar o HTML custa mais que a consulta: cada linha
+reverte três URLs e calcula `idade`, `sexo_extenso` e `cpf_formatado`. Aqui:
+
+- as URLs são revertidas uma vez por requisição (prefixo + pk + sufixo);
+- cada `<tr>` fica em cache, com chave `pk + atualizado_em + data de hoje`
+  (a idade muda na virada do dia), buscado em lote com `get_many`/`set_many`;
+- só as linhas que não estavam no cache passam pelo template `_pessoa_linha.html`.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.cache import cache
+from django.core.cache.backends.base import BaseCache
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import SafeString, mark_safe
+
+LINHA_TEMPLATE = 'pessoas/_pessoa_linha.html'
+LINHA_VERSAO = 1  # incremente ao mudar o template da linha
+LINHA_TIMEOUT = 60 * 60 * 24
+
+_PK_SENTINELA = 987654321
+
+
+def url_prefixos() -> dict[str, tuple[str, str]]:
+    """(prefixo, sufixo) de cada URL por pk, revertidos uma única vez."""
+    prefixos = {}
+    for chave, nome in (
+        ('detalhe', 'pessoas:pessoa_detail'),
+        ('editar', 'pessoas:pessoa_edicao_menu'),
+        ('excluir', 'pessoas:pessoa_delete'),
+    ):
+        prefixo, sufixo = reverse(nome, args=[_PK_SENTINELA]).split(str(_PK_SENTINELA))
+        prefixos[chave] = (prefixo, sufixo)
+    return prefixos
+
+
+def _chave(pessoa, hoje: str, raiz: str) -> str:
+    atualizado = pessoa.atualizado_em.timestamp() if pessoa.atualizado_em else 0
+    return f'pessoa-linha:{LINHA_VERSAO}:{raiz}:{hoje}:{pessoa.pk}:{atualizado}'
+
+
+def render_linhas(pessoas, urls: dict | None = None, cache_linhas: BaseCache | None = None) -> SafeString:
+    """HTML das `<tr>` de `pessoas`, reaproveitando as linhas já renderizadas.
+
+    `cache_linhas` troca o cache `default` (o `bench_render` usa um cache próprio).
+    """
+    pessoas = list(pessoas)
+    if not pessoas:
+        return mark_safe('')
+    urls = urls or url_prefixos()
+    cache_linhas = cache_linhas or cache
+    hoje = date.today().isoformat()
+    raiz = urls['detalhe'][0]  # muda se o app for montado em outro SCRIPT_NAME
+
+    chaves = [_chave(p, hoje, raiz) for p in pessoas]
+    prontas = cache_linhas.get_many(chaves)
+
+    template = None
+    novas = {}
+    partes = []
+    for pessoa, chave in zip(pessoas, chaves):
+        html = prontas.get(chave)
+        if html is None:
+            if template is None:
+                template = get_template(LINHA_TEMPLATE)
+            pk = str(pessoa.pk)
+            html = template.render({
+                'p': pessoa,
+                'url_detalhe': urls['detalhe'][0] + pk + urls['detalhe'][1],
+                'url_editar': urls['editar'][0] + pk + urls['editar'][1],
+                'url_excluir': urls['excluir'][0] + pk + urls['excluir'][1],
+            })
+            novas[chave] = html
+        partes.append(html)
+
+    if novas:
+        cache_linhas.set_many(novas, LINHA_TIMEOUT)
+    return mark_safe(''.join(partes))
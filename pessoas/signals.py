@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cpf_lookup import get_cpf_lookup
+from .models import Pessoa
+
+
+@receiver(pre_save, sender=Pessoa)
+def guardar_cpf_anterior(sender, instance: Pessoa, raw=False, update_fields=None, **kwargs):
+    """Guarda o CPF atual do banco para saber, no post_save, se ele mudou."""
+    instance._cpf_anterior = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'cpf' not in update_fields:
+        return
+    instance._cpf_anterior = (
+        Pessoa.objects.filter(pk=instance.pk).values_list('cpf', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Pessoa)
+def atualizar_cpf_lookup_save(sender, instance: Pessoa, created: bool, raw=False, **kwargs):
+    if raw:
+        return
+    lookup = get_cpf_lookup()
+    cpf, pk = instance.cpf, instance.pk
+    anterior = getattr(instance, '_cpf_anterior', None)
+
+    if anterior and anterior != cpf:
+        transaction.on_commit(lambda: lookup.registrar_remocao(anterior))
+    if created or (anterior and anterior != cpf):
+        transaction.on_commit(lambda: lookup.registrar_insercao(cpf, pk))
+
+
+@receiver(post_delete, sender=Pessoa)
+def atualizar_cpf_lookup_delete(sender, instance: Pessoa, **kwargs):
+    lookup = get_cpf_lookup()
+    cpf = instance.cpf
+    transaction.on_commit(lambda: lookup.registrar_remocao(cpf))
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from pessoas.estaticos import VENDOR, vendorizado
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(nome: str):
+    """<link>/<script> de uma biblioteca de `VENDOR`, servida localmente (CDN só com ESTATICOS_CDN_FALLBACK)."""
+    asset = VENDOR[nome]
+    if vendorizado(asset.caminho) or not getattr(settings, 'ESTATICOS_CDN_FALLBACK', False):
+        url = static(asset.caminho)
+    else:
+        url = asset.cdn
+    if asset.tipo == 'css':
+        return format_html('<link href="{}" rel="stylesheet">', url)
+    return format_html('<script src="{}"></script>', url)
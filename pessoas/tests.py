@@ -0,0 +1,837 @@
+from __future__ import annotations
+
+import gzip
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from . import cpf, cpf_lookup, exportacao, loadtest
+from .admin import EstimatedCountPaginator, FaixaEtariaFilter, MesNascimentoFilter, PessoaAdmin
+from .admissao import adquirir, get_metricas, limitar, tentar_vaga
+from .arquivamento import FiltroArquivo, arquivar, ler_cpfs, restaurar
+from .cpf import completar_cpf, formatar_cpf, formatar_lote, normalizar_lote, validar_cpf, validar_lote
+from .cpf_lookup import CPFLookup, get_cpf_lookup
+from .duplicados import LIMIAR_PADRAO, pontuar_par
+from .estaticos import (
+    ArmazenamentoEstatico,
+    aceita_encoding,
+    servir_estatico,
+    verificar_vendor,
+    verificar_vendor_deploy,
+)
+from .explain import (
+    assert_rota_indexada,
+    criar_dados_exemplo,
+    plano,
+    problemas_do_plano,
+    rotas_para_verificar,
+    verificar_rota,
+)
+from .exportacao import _escrever_json, pessoas_to_rows
+from .loadtest import Dados, Metricas, Resposta, Usuario
+from .management.commands.seed_pessoas import SEED
+from .models import AlteracaoPessoa, CandidatoDuplicado, CandidatoDuplicadoArquivo, Pessoa
+from .render import render_linhas
+from .utils import years_ago
+from .warmup import ETAPAS, aquecer
+
+
+class CadastroTestCase(TestCase):
+    """Filtro de CPFs, exportações e vagas de admissão numa pasta temporária, não em `var/`."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = Path(cls.enterClassContext(tempfile.TemporaryDirectory()))
+        cls.enterClassContext(override_settings(
+            CPF_BLOOM_PATH=cls.tmp / 'cpf_bloom.bin',
+            CPF_BLOOM_MAX_AGE=None,
+            EXPORT_DIR=cls.tmp / 'exports',
+            ADMISSAO_DIR=cls.tmp / 'admissao',
+            # Sem depender do manifest do collectstatic (testes rodam com DEBUG=False).
+            STORAGES={**settings.STORAGES, 'staticfiles': {
+                'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+            }},
+        ))
+        super().setUpClass()
+
+    def setUp(self):
+        cpf_lookup._instance = None
+        self.addCleanup(setattr, cpf_lookup, '_instance', None)
+
+
+def criar_pessoa(cpf: str, nome: str = 'Gabriel', sobrenome: str = 'Timon',
+                 nascimento: date = date(1990, 5, 16), sexo: str = 'M') -> Pessoa:
+    return Pessoa.objects.create(nome=nome, sobrenome=sobrenome, data_nascimento=nascimento, sexo=sexo, cpf=cpf)
+
+
+# -------------------------
+# CPF
+# -------------------------
+def com_e_sem_numpy(teste: TestCase):
+    """Repete o bloco com NumPy e com o laço escalar (NumPy ausente)."""
+    for com_numpy in (True, False):
+        with teste.subTest(numpy=com_numpy), mock.patch.object(cpf, '_numpy', None if com_numpy else False):
+            yield
+
+
+class CPFTests(TestCase):
+    VALIDO = '16559687775'
+    ENTRADAS = [
+        '16559687775', '165.596.877-75', ' 529.982.247-25 ', '52998224726', '11111111111',
+        '1655968777', '165596877751', '', 'abc', '165 596 877 x 75', '１６５５９６８７７７５', '1' * 40,
+    ]
+
+    def test_validar_cpf(self):
+        self.assertTrue(validar_cpf(self.VALIDO))
+        self.assertTrue(validar_cpf('165.596.877-75'))
+        self.assertFalse(validar_cpf('16559687776'))
+        self.assertFalse(validar_cpf('00000000000'))
+        self.assertFalse(validar_cpf('1655968777'))
+        self.assertEqual(completar_cpf('165596877'), self.VALIDO)
+
+    def test_validar_lote(self):
+        esperado = [True, True, True, False, False, False, False, False, False, True, False, False]
+        for _ in com_e_sem_numpy(self):
+            resultado = validar_lote(self.ENTRADAS)
+            self.assertIsInstance(resultado, list)
+            self.assertEqual(resultado, esperado)
+            self.assertEqual(validar_lote([]), [])
+
+    def test_normalizar_e_formatar_lote(self):
+        normalizados = ['16559687775', '16559687775', '52998224725', '52998224726', '11111111111',
+                        '', '', '', '', '16559687775', '', '']
+        formatados = [formatar_cpf(c) if c else '' for c in normalizados]
+        for _ in com_e_sem_numpy(self):
+            self.assertEqual(normalizar_lote(self.ENTRADAS), normalizados)
+            self.assertEqual(formatar_lote(self.ENTRADAS), formatados)
+
+    def test_seed_tem_cpfs_validos(self):
+        self.assertTrue(all(validar_lote([linha[4] for linha in SEED])))
+
+
+class ScanCPFsTests(CadastroTestCase):
+    def test_lista_so_os_invalidos(self):
+        criar_pessoa('16559687775')
+        ruim = criar_pessoa('12345678901', nome='Izabela')
+        for _ in com_e_sem_numpy(self):
+            saida = StringIO()
+            call_command('scan_cpfs', '--chunk-size', '1', stdout=saida)
+            linhas = saida.getvalue().splitlines()
+            self.assertEqual(linhas[0], f'{ruim.pk};123.456.789-01;Izabela Timon')
+            self.assertIn('2 CPFs verificados', linhas[-1])
+            self.assertIn('1 com dígitos verificadores inválidos', linhas[-1])
+
+
+# -------------------------
+# Duplicados
+# -------------------------
+class PontuacaoDuplicadosTests(TestCase):
+    def test_mesmo_nome_e_nascimento_com_cpf_diferente_passa_do_limiar(self):
+        score = pontuar_par((1, 'Gabriel', 'Timon', '16559687775'), (2, 'Gabriel', 'Timon', '52998224725'))
+        self.assertGreaterEqual(score, LIMIAR_PADRAO)
+        score = pontuar_par(
+            (1, 'Gabriel', 'Timon', '16559687775', '1990-05-16'),
+            (2, 'Gabriel', 'Timon', '52998224725', '1990-05-16'),
+        )
+        self.assertGreaterEqual(score, LIMIAR_PADRAO)
+
+    def test_cpf_igual_so_aumenta_o_score(self):
+        base = pontuar_par(
+            (1, 'Gabriel', 'Timon', '16559687775', '1990-05-16'),
+            (2, 'Gabriel', 'Timom', '52998224725', '1990-05-16'),
+        )
+        com_cpf = pontuar_par(
+            (1, 'Gabriel', 'Timon', '16559687775', '1990-05-16'),
+            (2, 'Gabriel', 'Timom', '16559687775', '1990-05-16'),
+        )
+        self.assertGreater(com_cpf, base)
+
+    def test_nascimento_diferente_nao_e_duplicado(self):
+        score = pontuar_par(
+            (1, 'Gabriel', 'Timon', '16559687775', '1990-05-16'),
+            (2, 'Gabriel', 'Timon', '52998224725', '1975-11-02'),
+        )
+        self.assertLess(score, LIMIAR_PADRAO)
+
+
+class FindDuplicatesTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = criar_pessoa('16559687775')
+        self.b = criar_pessoa('52998224725')
+        # Mesma pessoa com a data digitada errada (dia e mês trocados).
+        self.c = criar_pessoa('11144477735', nascimento=date(1990, 1, 5))
+        self.d = criar_pessoa('39053344705', nascimento=date(1990, 5, 1))
+
+    def _executar(self) -> str:
+        saida = StringIO()
+        call_command('find_duplicates', '--workers', '1', stdout=saida)
+        return saida.getvalue()
+
+    def test_encontra_pares_com_e_sem_a_mesma_data(self):
+        self._executar()
+        pares = set(CandidatoDuplicado.objects.values_list('pessoa_a_id', 'pessoa_b_id'))
+        self.assertIn((self.a.pk, self.b.pk), pares)
+        self.assertIn((self.c.pk, self.d.pk), pares)
+
+    def test_sobrenome_com_caixa_e_acento_diferentes_cai_no_mesmo_bloco(self):
+        # Datas com um dígito de diferença: só a passada por sobrenome os compara.
+        silva = criar_pessoa(completar_cpf('123456789'), nome='Ana', sobrenome='Silva', nascimento=date(1980, 3, 12))
+        silva_min = criar_pessoa(completar_cpf('987654321'), nome='Ana', sobrenome='silva',
+                                 nascimento=date(1980, 3, 13))
+        silva_acento = criar_pessoa(completar_cpf('111222333'), nome='Ana', sobrenome='Sílva',
+                                    nascimento=date(1980, 3, 14))
+        for particoes in ('1', '3'):
+            with self.subTest(particoes=particoes):
+                CandidatoDuplicado.objects.all().delete()
+                call_command('find_duplicates', '--workers', '1', '--particoes', particoes, stdout=StringIO())
+                pares = set(CandidatoDuplicado.objects.values_list('pessoa_a_id', 'pessoa_b_id'))
+                self.assertLessEqual(
+                    {(silva.pk, silva_min.pk), (silva.pk, silva_acento.pk), (silva_min.pk, silva_acento.pk)}, pares,
+                )
+
+    def test_conta_so_pares_novos(self):
+        self.assertIn(' 2 pares candidatos', self._executar())
+        CandidatoDuplicado.objects.update(status=CandidatoDuplicado.STATUS_DESCARTADO)
+        self.assertIn(' 0 pares candidatos', self._executar())
+
+
+class RevisaoDuplicadosTests(CadastroTestCase):
+    def test_candidato_invalido_nao_quebra(self):
+        response = self.client.post(reverse('pessoas:duplicados_revisao'),
+                                    {'candidato': 'abc', 'acao': 'confirmar'})
+        self.assertRedirects(response, reverse('pessoas:duplicados_revisao'))
+
+
+# -------------------------
+# Log de alterações
+# -------------------------
+class LogAlteracoesTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        self.existente = criar_pessoa('16559687775')
+
+    def _ops(self, operacao: str) -> list[int]:
+        return list(AlteracaoPessoa.objects.filter(operacao=operacao).order_by('seq')
+                    .values_list('pessoa_id', flat=True))
+
+    def test_bulk_create_com_conflitos_ignorados_registra_so_os_inseridos(self):
+        Pessoa.objects.bulk_create([
+            Pessoa(nome='Outro', sobrenome='Nome', data_nascimento=date(1980, 1, 1), sexo='F', cpf='16559687775'),
+            Pessoa(nome='Nova', sobrenome='Pessoa', data_nascimento=date(1985, 1, 1), sexo='F', cpf='52998224725'),
+            Pessoa(nome='Nova', sobrenome='Repetida', data_nascimento=date(1985, 1, 1), sexo='F', cpf='52998224725'),
+        ], ignore_conflicts=True)
+        nova = Pessoa.objects.get(cpf='52998224725')
+        self.assertEqual(self._ops('I'), [self.existente.pk, nova.pk])
+        self.assertEqual(Pessoa.objects.get(cpf='16559687775').nome, 'Gabriel')
+
+    def test_update_em_lotes_registra_todas_as_linhas(self):
+        outras = [criar_pessoa(cpf) for cpf in ('52998224725', '11144477735', '39053344705')]
+        with mock.patch('pessoas.models.LOTE_ALTERACOES', 2):
+            # O filtro deixa de casar depois do update: o cursor por pk não pode se perder.
+            linhas = Pessoa.objects.filter(nome='Gabriel').update(nome='Rafael')
+        self.assertEqual(linhas, 4)
+        self.assertEqual(sorted(self._ops('U')), sorted([self.existente.pk] + [p.pk for p in outras]))
+        self.assertFalse(Pessoa.objects.filter(nome='Gabriel').exists())
+        self.assertEqual({a.dados['nome'] for a in AlteracaoPessoa.objects.filter(operacao='U')}, {'Rafael'})
+
+
+# -------------------------
+# Cache de linhas
+# -------------------------
+class CacheLinhasTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.pessoa = criar_pessoa('16559687775')
+
+    def _linha(self) -> str:
+        return render_linhas(Pessoa.objects.filter(pk=self.pessoa.pk))
+
+    def test_update_em_massa_invalida_a_linha(self):
+        self.assertIn('Gabriel', self._linha())
+        Pessoa.objects.filter(pk=self.pessoa.pk).update(nome='Rafael')
+        self.assertIn('Rafael', self._linha())
+
+    def test_bulk_update_invalida_a_linha(self):
+        self.assertIn('Gabriel', self._linha())
+        antes = self.pessoa.atualizado_em
+        self.pessoa.nome = 'Rafael'
+        Pessoa.objects.bulk_update([self.pessoa], ['nome'])
+        self.assertGreater(self.pessoa.atualizado_em, antes)
+        self.assertIn('Rafael', self._linha())
+
+    def test_bench_render_nao_limpa_o_cache_default(self):
+        cache.set('outra-coisa', 1)
+        linha = self._linha()
+        call_command('bench_render', '--linhas', '10', '--repeticoes', '1', stdout=StringIO())
+        self.assertEqual(cache.get('outra-coisa'), 1)
+        with mock.patch('pessoas.render.get_template', side_effect=AssertionError('linha fora do cache')):
+            self.assertEqual(self._linha(), linha)
+
+
+# -------------------------
+# Admin
+# -------------------------
+class PessoaAdminTests(CadastroTestCase):
+    def test_idade_calculada_no_banco_igual_a_do_model(self):
+        hoje = date.today()
+        nascimentos = [date(1990, 5, 16), years_ago(hoje, 30), years_ago(hoje, 30) + timedelta(days=1),
+                       date(2000, 2, 29)]
+        for i, nascimento in enumerate(nascimentos):
+            criar_pessoa(completar_cpf(f'{123456780 + i:09d}'), nascimento=nascimento)
+        qs = PessoaAdmin(Pessoa, admin.site).get_queryset(RequestFactory().get('/'))
+        for pessoa in qs:
+            with self.subTest(nascimento=pessoa.data_nascimento):
+                self.assertIsInstance(pessoa.idade_db, int)
+                self.assertEqual(pessoa.idade_db, pessoa.idade)
+
+    def _admin(self) -> PessoaAdmin:
+        return PessoaAdmin(Pessoa, admin.site)
+
+    def _criar(self, quantidade: int, inicio: int = 0) -> list[Pessoa]:
+        return [criar_pessoa(completar_cpf(f'{200000000 + inicio + i:09d}')) for i in range(quantidade)]
+
+    def test_paginador_conta_exato_ate_o_limite(self):
+        self._criar(3)
+        paginador = EstimatedCountPaginator(Pessoa.objects.filter(sexo='M').order_by('pk'), 2)
+        with mock.patch.object(EstimatedCountPaginator, 'limite', 3):
+            self.assertEqual(paginador.count, 3)
+        self.assertFalse(paginador.truncado)
+
+    def test_paginador_acima_do_limite_corta_os_links_sem_inventar_contagem(self):
+        pessoas = self._criar(8)
+        # Pks altos e buracos: MAX(id) superestimaria a tabela.
+        Pessoa.objects.filter(pk__in=[p.pk for p in pessoas[:3]]).delete()
+        with mock.patch.object(EstimatedCountPaginator, 'limite', 4):
+            filtrado = EstimatedCountPaginator(Pessoa.objects.filter(sexo='M').order_by('pk'), 3)
+            self.assertEqual(filtrado.count, 4)
+            self.assertTrue(filtrado.truncado)
+            self.assertIsNone(filtrado.estimativa)
+            self.assertEqual(filtrado.num_pages, 2)
+            self.assertTrue(filtrado.page(filtrado.num_pages).object_list)
+
+            # Sem filtro e sem ANALYZE: nenhuma estimativa.
+            self.assertIsNone(EstimatedCountPaginator(Pessoa.objects.order_by('pk'), 3).estimativa)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            todos = EstimatedCountPaginator(Pessoa.objects.order_by('pk'), 3)
+            self.assertEqual(todos.count, 4)
+            self.assertEqual(todos.estimativa, 5)
+
+    def test_changelist_mostra_contagem_limitada(self):
+        self._criar(4)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'senha'))
+        url = reverse('admin:pessoas_pessoa_changelist')
+        with mock.patch.object(EstimatedCountPaginator, 'limite', 3):
+            self.assertContains(self.client.get(url, {'sexo__exact': 'M'}), 'mais de 3 Pessoas')
+        self.assertContains(self.client.get(url, {'sexo__exact': 'M'}), '4 Pessoas')
+
+    def test_busca_por_cpf_exata_e_por_prefixo(self):
+        alvo = criar_pessoa('16559687775')
+        outra = criar_pessoa('52998224725')
+        request = RequestFactory().get('/')
+        qs = Pessoa.objects.all()
+        resultado, distinto = self._admin().get_search_results(request, qs, '165.596.877-75')
+        self.assertEqual(list(resultado), [alvo])
+        self.assertFalse(distinto)
+        self.assertIn('"cpf" = ', str(resultado.query))
+
+        resultado, _ = self._admin().get_search_results(request, qs, '165.59')
+        self.assertEqual(list(resultado), [alvo])
+        self.assertIn('"cpf" >= 16559', str(resultado.query))
+        resultado, _ = self._admin().get_search_results(request, qs, '5')
+        self.assertEqual(list(resultado), [outra])
+
+        # Com letras é busca por nome, não por CPF.
+        resultado, _ = self._admin().get_search_results(request, qs, 'Gab')
+        self.assertEqual(set(resultado), {alvo, outra})
+
+    def _filtrar(self, filtro, valor: str) -> set:
+        request = RequestFactory().get('/', {filtro.parameter_name: valor})
+        instancia = filtro(request, {filtro.parameter_name: [valor]}, Pessoa, self._admin())
+        return set(instancia.queryset(request, Pessoa.objects.all()))
+
+    def test_filtro_faixa_etaria(self):
+        hoje = date.today()
+        dezessete = criar_pessoa('16559687775', nascimento=years_ago(hoje, 18) + timedelta(days=1))
+        dezoito = criar_pessoa('52998224725', nascimento=years_ago(hoje, 18))
+        cinquenta = criar_pessoa('11144477735', nascimento=years_ago(hoje, 50))
+        self.assertEqual(self._filtrar(FaixaEtariaFilter, '0-17'), {dezessete})
+        self.assertEqual(self._filtrar(FaixaEtariaFilter, '18-29'), {dezoito})
+        self.assertEqual(self._filtrar(FaixaEtariaFilter, '30-49'), set())
+        self.assertEqual(self._filtrar(FaixaEtariaFilter, '50+'), {cinquenta})
+
+    def test_filtro_mes_de_nascimento(self):
+        maio = criar_pessoa('16559687775', nascimento=date(1990, 5, 31))
+        maio_outro_ano = criar_pessoa('52998224725', nascimento=date(1975, 5, 1))
+        junho = criar_pessoa('11144477735', nascimento=date(1990, 6, 1))
+        self.assertEqual(self._filtrar(MesNascimentoFilter, '5'), {maio, maio_outro_ano})
+        self.assertEqual(self._filtrar(MesNascimentoFilter, '6'), {junho})
+        for invalido in ('13', 'x'):
+            with self.subTest(mes=invalido):
+                self.assertEqual(self._filtrar(MesNascimentoFilter, invalido), {maio, maio_outro_ano, junho})
+
+
+# -------------------------
+# Busca por CPF
+# -------------------------
+class CPFLookupTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pessoa = criar_pessoa('16559687775')
+
+    def _lookup(self, max_age=None) -> CPFLookup:
+        return CPFLookup(self.tmp / self._testMethodName / 'cpf_bloom.bin', max_age=max_age)
+
+    def test_sem_arquivo_consulta_o_banco_sem_reconstruir(self):
+        lookup = self._lookup()
+        self.assertEqual(lookup.buscar_pk('16559687775'), self.pessoa.pk)
+        self.assertIsNone(lookup.buscar_pk('52998224725'))
+        self.assertFalse(lookup.path.exists())
+        self.assertEqual(lookup.stats()['bloom_negativos'], 0)
+
+    def test_filtro_velho_continua_valendo_no_request(self):
+        lookup = self._lookup(max_age=60)
+        lookup.rebuild()
+        # Envelhece o arquivo: o request não pode reconstruir na hora.
+        with open(lookup.path, 'rb') as fh:
+            header, bits = json.loads(fh.readline()), fh.read()
+        header['criado_em'] = time.time() - 3600
+        with open(lookup.path, 'wb') as fh:
+            fh.write(json.dumps(header).encode() + b'\n' + bits)
+        lookup._agendar_reconstrucao = lambda: setattr(self, 'agendou', True)
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(lookup.buscar_pk('52998224725'))
+        self.assertTrue(self.agendou)
+        self.assertEqual(json.loads(lookup.path.read_bytes().split(b'\n', 1)[0])['criado_em'], header['criado_em'])
+
+    def test_invalidate_desliga_o_filtro_de_todos_os_processos(self):
+        lookup, outro = self._lookup(), self._lookup()
+        lookup.rebuild()
+        self.assertIsNone(outro.buscar_pk('52998224725'))
+        self.assertEqual(outro.stats()['bloom_negativos'], 1)
+
+        lookup.invalidate()
+        self.assertIsNone(outro.buscar_pk('52998224725'))
+        self.assertEqual(outro.stats()['bloom_negativos'], 1)  # foi ao banco
+
+        lookup.rebuild()
+        self.assertIsNone(outro.buscar_pk('52998224725'))
+        self.assertEqual(outro.stats()['bloom_negativos'], 2)
+
+    def test_remocao_durante_a_consulta_nao_deixa_pk_velho_no_lru(self):
+        lookup, outro = self._lookup(), self._lookup()
+        primeira = QuerySet.first
+
+        def first_com_remocao_concorrente(qs):
+            pk = primeira(qs)
+            # Outro worker troca o CPF e anota no journal antes do `_lembrar`.
+            Pessoa.objects.filter(pk=self.pessoa.pk).update(cpf='52998224725')
+            outro.registrar_remocao('16559687775')
+            return pk
+
+        with mock.patch.object(QuerySet, 'first', first_com_remocao_concorrente):
+            self.assertEqual(lookup.buscar_pk('16559687775'), self.pessoa.pk)
+        self.assertEqual(lookup.stats()['lru_tamanho'], 0)
+        self.assertIsNone(lookup.buscar_pk('16559687775'))
+
+        # Sem alteração concorrente o acerto do banco continua entrando no LRU.
+        self.assertEqual(lookup.buscar_pk('52998224725'), self.pessoa.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup.buscar_pk('52998224725'), self.pessoa.pk)
+
+
+# -------------------------
+# Exportação
+# -------------------------
+@override_settings(ADMISSAO_ATIVA=False)
+class ExportacaoTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        criar_pessoa('16559687775', nome='Ângela')
+        criar_pessoa('52998224725')
+
+    def test_json_em_streaming_igual_ao_dump_da_lista(self):
+        saida = BytesIO()
+        _escrever_json(saida)
+        esperado = json.dumps(list(pessoas_to_rows()), ensure_ascii=False, indent=2)
+        self.assertEqual(saida.getvalue().decode('utf-8'), esperado)
+        Pessoa.objects.all().delete()
+        saida = BytesIO()
+        _escrever_json(saida)
+        self.assertEqual(saida.getvalue(), b'[]')
+
+    def test_etag_depende_do_content_encoding(self):
+        url = reverse('pessoas:export_json')
+        gzip_ = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        texto = self.client.get(url)
+        self.assertEqual(gzip_['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Encoding', texto)
+        self.assertNotEqual(gzip_['ETag'], texto['ETag'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=texto['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=gzip_['ETag']).status_code, 200)
+
+    def test_geracao_concorrente_gera_uma_vez(self):
+        geracoes = []
+
+        def gerar_devagar(formato, versao, incluir_arquivo=False):
+            geracoes.append(versao)
+            time.sleep(0.2)
+            destino = exportacao.caminho_snapshot(formato, versao, incluir_arquivo)
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_bytes(b'')
+            return destino
+
+        with mock.patch.object(exportacao, 'gerar_snapshot', gerar_devagar), \
+                mock.patch.object(exportacao, 'versao_atual', return_value='1-20260101'):
+            threads = [threading.Thread(target=exportacao.obter_snapshot, args=('csv',)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(geracoes), 1)
+
+
+# -------------------------
+# Controle de admissão
+# -------------------------
+@override_settings(ADMISSAO_CLASSES={'teste': {'limite': 2, 'espera': 0.1, 'retry_after': 7}})
+class AdmissaoTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        get_metricas().zerar()
+
+    def ocupar(self, quantas: int) -> list:
+        vagas = [adquirir('teste') for _ in range(quantas)]
+        for vaga in vagas:
+            self.addCleanup(vaga.liberar)
+        return vagas
+
+    def metricas(self) -> dict:
+        return next((linha for linha in get_metricas().resumo() if linha['classe'] == 'teste'), {})
+
+    def test_limite_de_vagas_simultaneas(self):
+        primeira, segunda = self.ocupar(2)
+        self.assertIsNotNone(primeira)
+        self.assertIsNotNone(segunda)
+        self.assertIsNone(tentar_vaga('teste', 2))
+        primeira.liberar()
+        vaga = tentar_vaga('teste', 2)
+        self.assertIsNotNone(vaga)
+        vaga.liberar()
+
+    def test_espera_limitada_e_rejeicao(self):
+        self.ocupar(2)
+        inicio = time.monotonic()
+        self.assertIsNone(adquirir('teste'))
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.1)
+        self.assertLess(time.monotonic() - inicio, 1.0)
+        linha = self.metricas()
+        self.assertEqual((linha['em_fila'], linha['fila_max'], linha['rejeitados']), (0, 1, 1))
+        self.assertIsNotNone(linha['ultima_rejeicao'])
+
+    def test_admitido_apos_espera(self):
+        primeira, _segunda = self.ocupar(2)
+        threading.Timer(0.03, primeira.liberar).start()
+        vaga = adquirir('teste')
+        self.assertIsNotNone(vaga)
+        vaga.liberar()
+        linha = self.metricas()
+        self.assertEqual((linha['admitidos_apos_espera'], linha['rejeitados'], linha['em_fila']), (1, 0, 0))
+
+    @override_settings(ADMISSAO_ATIVA=True)
+    def test_503_com_retry_after(self):
+        view = limitar('teste')(lambda request: HttpResponse('ok'))
+        self.ocupar(2)
+        with self.assertLogs('pessoas.admissao', 'WARNING'):
+            response = view(RequestFactory().get('/exportar/'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+    @override_settings(ADMISSAO_ATIVA=True)
+    def test_streaming_segura_a_vaga_ate_fechar(self):
+        view = limitar('teste')(lambda request: StreamingHttpResponse(iter([b'a', b'b'])))
+        response = view(RequestFactory().get('/exportar/'))
+        self.assertEqual(b''.join(response.streaming_content), b'ab')
+        self.ocupar(1)
+        self.assertIsNone(tentar_vaga('teste', 2))
+        response.close()
+        vaga = tentar_vaga('teste', 2)
+        self.assertIsNotNone(vaga)
+        vaga.liberar()
+
+    def test_fila_de_processo_morto_nao_conta(self):
+        morto = subprocess.Popen([sys.executable, '-c', 'pass'])
+        morto.wait()
+        with mock.patch('pessoas.admissao.os.getpid', return_value=morto.pid):
+            get_metricas().entrar_fila('teste')
+        self.assertEqual(self.metricas()['em_fila'], 0)
+        self.assertEqual(self.metricas()['fila_max'], 1)
+
+
+# -------------------------
+# Startup e aquecimento
+# -------------------------
+class StartupTests(TestCase):
+    def test_startup_dentro_do_orcamento_e_sem_dependencias_pesadas(self):
+        # Mede num processo novo, como um worker: STARTUP_IMPORT_BUDGET_MS e
+        # openpyxl/numpy/rapidfuzz fora do startup.
+        saida = StringIO()
+        call_command('bench_startup', '--repeticoes', '1', stdout=saida)
+        self.assertIn('✅', saida.getvalue())
+
+    def test_bench_startup_falha_fora_do_orcamento(self):
+        with self.assertRaisesMessage(CommandError, 'orçamento'):
+            call_command('bench_startup', '--repeticoes', '1', '--budget-ms', '0.001', stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'dependências pesadas importadas no startup: django'):
+            call_command('bench_startup', '--repeticoes', '1', '--proibidos', 'django', stdout=StringIO())
+
+
+class WarmupTests(CadastroTestCase):
+    def test_aquecer_roda_todas_as_etapas_sem_contar_consulta(self):
+        criar_pessoa('16559687775')
+        get_cpf_lookup().rebuild()
+        with mock.patch('pessoas.warmup.connections.close_all') as fechar:
+            resultado = aquecer(fechar_conexoes=True)
+        fechar.assert_called_once_with()
+        self.assertEqual(set(resultado), {nome for nome, _etapa in ETAPAS})
+        self.assertTrue(all(itens > 0 for itens, _segundos in resultado.values()), resultado)
+        self.assertEqual(resultado['cpf_lookup'][0], 1)
+        self.assertEqual(get_cpf_lookup().stats()['consultas'], 0)
+
+
+# -------------------------
+# Arquivos estáticos
+# -------------------------
+class EstaticosTests(TestCase):
+    def test_accept_encoding_respeita_q_values(self):
+        self.assertTrue(aceita_encoding('gzip, deflate, br', 'gzip'))
+        self.assertTrue(aceita_encoding('br;q=1.0, gzip;q=0.8', 'gzip'))
+        self.assertFalse(aceita_encoding('gzip;q=0, identity', 'gzip'))
+        self.assertFalse(aceita_encoding('x-gzip', 'gzip'))
+        self.assertTrue(aceita_encoding('*', 'br'))
+        self.assertFalse(aceita_encoding('gzip;q=0, *', 'gzip'))
+        self.assertFalse(aceita_encoding('', 'gzip'))
+
+    def test_vendor_ausente_avisa_e_barra_o_deploy(self):
+        with mock.patch('pessoas.estaticos.finders.find', return_value=None):
+            with override_settings(ESTATICOS_CDN_FALLBACK=False):
+                self.assertEqual([e.id for e in verificar_vendor()], ['pessoas.W001'])
+                self.assertEqual([e.id for e in verificar_vendor_deploy()], ['pessoas.E001'])
+            with override_settings(ESTATICOS_CDN_FALLBACK=True):
+                self.assertEqual([e.id for e in verificar_vendor()], ['pessoas.W001'])
+                self.assertEqual(verificar_vendor_deploy(), [])
+        with mock.patch('pessoas.estaticos.finders.find', return_value='/static/x'):
+            self.assertEqual(verificar_vendor() + verificar_vendor_deploy(), [])
+
+    def test_sem_manifest_a_url_fica_sem_hash(self):
+        with tempfile.TemporaryDirectory() as raiz:
+            armazenamento = ArmazenamentoEstatico(location=raiz, base_url='/static/')
+            self.assertEqual(armazenamento.url('pessoas/vendor/x.css'), '/static/pessoas/vendor/x.css')
+
+    def test_servir_estatico(self):
+        with tempfile.TemporaryDirectory() as raiz, override_settings(STATIC_ROOT=raiz):
+            Path(raiz, 'app.css').write_bytes(b'body{}' * 200)
+            Path(raiz, 'app.css.gz').write_bytes(gzip.compress(b'body{}' * 200))
+            fabrica = RequestFactory()
+            response = servir_estatico(fabrica.get('/static/app.css', HTTP_ACCEPT_ENCODING='gzip'), 'app.css')
+            response.close()
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertNotIn('Content-Disposition', response)
+
+            etag = response['ETag']
+            outro = '"0-0-id"'
+            for header, status in ((f'{outro}, {etag}', 304), (etag[:-2] + '"', 200), ('*', 200)):
+                with self.subTest(if_none_match=header):
+                    response = servir_estatico(
+                        fabrica.get('/static/app.css', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=header),
+                        'app.css',
+                    )
+                    response.close()
+                    self.assertEqual(response.status_code, status)
+
+
+# -------------------------
+# Arquivo de cadastros inativos
+# -------------------------
+@override_settings(ADMISSAO_ATIVA=False)
+class ArquivamentoTests(CadastroTestCase):
+    def setUp(self):
+        super().setUp()
+        self.a = criar_pessoa('16559687775', nome='Bruno')
+        self.b = criar_pessoa('52998224725', nome='Bruno')
+        self.c = criar_pessoa('11144477735', nome='Ana')
+        self.par = CandidatoDuplicado.objects.create(
+            pessoa_a=self.a, pessoa_b=self.b, score=0.95, bloco='teste', status=CandidatoDuplicado.STATUS_DESCARTADO,
+        )
+
+    def test_par_de_duplicados_sobrevive_ao_arquivamento(self):
+        arquivar(FiltroArquivo(cpfs=[self.b.cpf]), pausa=0)
+        self.assertFalse(CandidatoDuplicado.objects.exists())
+        self.assertEqual(CandidatoDuplicadoArquivo.objects.get().status, CandidatoDuplicado.STATUS_DESCARTADO)
+
+        restaurar(FiltroArquivo(cpfs=[self.b.cpf]), pausa=0)
+        par = CandidatoDuplicado.objects.get()
+        self.assertEqual((par.pessoa_a_id, par.pessoa_b_id, par.status),
+                         (self.a.pk, self.b.pk, CandidatoDuplicado.STATUS_DESCARTADO))
+        self.assertFalse(CandidatoDuplicadoArquivo.objects.exists())
+
+    def test_par_so_volta_com_as_duas_pessoas(self):
+        arquivar(FiltroArquivo(cpfs=[self.a.cpf, self.b.cpf]), pausa=0, chunk_size=1)
+        restaurar(FiltroArquivo(cpfs=[self.a.cpf]), pausa=0)
+        self.assertFalse(CandidatoDuplicado.objects.exists())
+        restaurar(FiltroArquivo(cpfs=[self.b.cpf]), pausa=0)
+        self.assertTrue(CandidatoDuplicado.objects.filter(pessoa_a=self.a, pessoa_b=self.b).exists())
+
+    def test_exportacao_completa_intercala_por_nome(self):
+        arquivar(FiltroArquivo(cpfs=[self.c.cpf]), pausa=0)
+        criar_pessoa('39053344705', nome='Carla')
+        linhas = list(pessoas_to_rows(incluir_arquivo=True))
+        self.assertEqual([(r['nome'], r['arquivado']) for r in linhas],
+                         [('Ana', 'Sim'), ('Bruno', 'Não'), ('Bruno', 'Não'), ('Carla', 'Não')])
+
+    def test_lista_de_cpfs_exige_11_digitos(self):
+        lista = self.tmp / f'{self._testMethodName}.txt'
+        lista.write_text('165.596.877-75  # ok\n\n5299822472\n', encoding='utf-8')
+        with self.assertRaisesMessage(ValueError, 'linha 3'):
+            ler_cpfs(str(lista))
+        lista.write_text('165.596.877-75\n52998224725\n16559687775\n', encoding='utf-8')
+        self.assertEqual(ler_cpfs(str(lista)), ['16559687775', '52998224725'])
+
+
+# -------------------------
+# Teste de carga
+# -------------------------
+class LoadtestMetricasTests(TestCase):
+    def _usuario(self, resposta: Resposta, locked_no_handler: bool = False) -> tuple[Usuario, Metricas]:
+        metricas = Metricas()
+
+        def transporte(metodo, caminho, corpo, headers):
+            if locked_no_handler:
+                metricas.marcar_locked(headers['X-Carga-Id'])
+            return resposta
+
+        return Usuario(transporte, metricas), metricas
+
+    def test_formulario_com_erro_conta_como_erro(self):
+        corpo = b'<form><div class="text-danger small mt-1">CPF inv\xc3\xa1lido.</div></form>'
+        usuario, metricas = self._usuario(Resposta(200, [], corpo))
+        usuario._enviar('criar:post', 'POST', '/pessoas/nova/', {'cpf': '1'})
+        self.assertEqual((metricas.rotas['criar:post'].erros, metricas.rotas['criar:post'].form_invalido), (1, 1))
+
+    def test_database_locked_conta_uma_vez(self):
+        corpo = b'OperationalError: database is locked'
+        usuario, metricas = self._usuario(Resposta(500, [], corpo), locked_no_handler=True)
+        usuario._enviar('editar:post', 'POST', '/pessoas/1/editar/nome/', {'nome': 'X'})
+        self.assertEqual(metricas.rotas['editar:post'].locked, 1)
+
+    def test_excecao_no_cenario_conta_como_erro_do_cenario(self):
+        def transporte(metodo, caminho, corpo, headers):
+            raise ConnectionError('servidor caiu')
+
+        cenarios = {
+            'quebrado': lambda u, d, rnd: {}['chave'],
+            'fora_do_ar': lambda u, d, rnd: u.get('fora_do_ar', '/'),
+        }
+        with mock.patch.dict(loadtest.CENARIOS, cenarios):
+            metricas, _duracao = loadtest.executar(
+                transporte, Dados([], [], []), {'quebrado': 1, 'fora_do_ar': 1}, workers=1, requisicoes=10, seed=1,
+            )
+        quebrado, fora_do_ar = metricas.rotas['quebrado'], metricas.rotas['fora_do_ar']
+        self.assertEqual(quebrado.erros + fora_do_ar.erros, 10)
+        self.assertEqual((quebrado.latencias, quebrado.excecao), ([], "KeyError: 'chave'"))
+        # Falha da requisição conta uma vez só, na rota, e não como exceção do cenário.
+        self.assertEqual(len(fora_do_ar.latencias), fora_do_ar.erros)
+        self.assertEqual(fora_do_ar.excecao, '')
+
+
+# -------------------------
+# Planos de consulta
+# -------------------------
+class PlanosConsultaTests(CadastroTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.exemplo = criar_dados_exemplo()
+
+    def test_todas_as_rotas_indexadas_usam_indice(self):
+        for rota in rotas_para_verificar(self.exemplo):
+            with self.subTest(rota=rota.descricao):
+                cpf_lookup._instance = None
+                resultado = verificar_rota(self.client, rota.url, rota.nome, rota.exigencia, rota.dados)
+                self.assertLess(resultado.status, 500)
+                self.assertEqual(resultado.problemas, [])
+
+    def test_paginas_da_lista(self):
+        assert_rota_indexada(self.client, reverse('pessoas:pessoa_list'))
+        e = self.exemplo
+        assert_rota_indexada(
+            self.client,
+            reverse('pessoas:pessoa_list_linhas') + f'?apos_nome={e.nome}&apos_sobrenome={e.sobrenome}&apos_pk={e.pk}',
+        )
+
+    def test_busca_por_cpf_vai_ao_indice_unico(self):
+        resultado = assert_rota_indexada(self.client, reverse('pessoas:buscar_por_cpf'), {'cpf': self.exemplo.cpf})
+        self.assertEqual(resultado.status, 302)
+        self.assertEqual(len(resultado.consultas), 1)
+
+    def test_aniversariantes_por_faixa_de_datas(self):
+        url = reverse('pessoas:filtro_aniversariantes_mes')
+        resultado = assert_rota_indexada(self.client, url, {'mes': '5'})
+        self.assertEqual(resultado.status, 200)
+        response = self.client.post(url, {'mes': '5'})
+        esperado = list(Pessoa.objects.filter(data_nascimento__month=5).order_by('data_nascimento', 'pk'))
+        self.assertTrue(esperado)
+        self.assertEqual(response.context['pessoas'], esperado)
+
+    def test_busca_por_trecho_do_nome_nao_passa(self):
+        with self.assertRaises(AssertionError):
+            assert_rota_indexada(self.client, reverse('pessoas:pessoa_list') + '?q=ana')
+
+    def test_scan_de_indice_so_vale_com_limit_e_sem_where(self):
+        scan = ['SCAN pessoas_pessoa USING COVERING INDEX pessoa_nascimento_idx']
+        self.assertEqual(problemas_do_plano(scan, 'SELECT 1 FROM pessoas_pessoa LIMIT 1'), [])
+        self.assertEqual(problemas_do_plano(scan, 'SELECT 1 FROM pessoas_pessoa WHERE x = 1 LIMIT 1'), scan)
+        self.assertEqual(problemas_do_plano(scan, 'SELECT COUNT(*) FROM pessoas_pessoa'), scan)
+
+    def test_scan_sem_tabela_nao_e_problema(self):
+        casos = {
+            'SELECT 1': [],
+            "SELECT * FROM pessoas_pessoa WHERE nome IN (VALUES ('a'), ('b'))": [],
+            'SELECT * FROM pessoas_pessoa WHERE id IN (SELECT 1 UNION SELECT 2)': [],
+            # Subconsulta no FROM: o SCAN do alias não é problema.
+            "SELECT * FROM (SELECT nome FROM pessoas_pessoa GROUP BY nome) AS s WHERE s.nome > 'a'": [],
+            'WITH x AS MATERIALIZED (SELECT id FROM pessoas_pessoa WHERE id < 10) SELECT * FROM x, x AS y': [],
+            "SELECT * FROM pessoas_pessoa U0 WHERE U0.nome LIKE '%a'": ['SCAN U0'],
+        }
+        for sql, esperado in casos.items():
+            with self.subTest(sql=sql):
+                problemas = problemas_do_plano(plano(sql), sql)
+                self.assertEqual([p for p in problemas if not p.startswith('USE TEMP B-TREE')], esperado)
+
+        # Já a tabela lida dentro da subconsulta continua sendo verificada.
+        sql = ('SELECT * FROM (SELECT sobrenome, COUNT(*) AS n FROM pessoas_pessoa GROUP BY sobrenome) AS s '
+               'WHERE s.n > 1')
+        problemas = problemas_do_plano(plano(sql), sql)
+        self.assertTrue(any(p.startswith('SCAN pessoas_pessoa') for p in problemas), plano(sql))
+        self.assertNotIn('SCAN s', problemas)
@@ -1,5 +1,10 @@
 from django.urls import path
 from . import views
+from .admissao import limitar
+
+# Classes de custo (ver pessoas/admissao.py): limite de execuções simultâneas entre workers.
+exportacao = limitar('exportacao')
+relatorio = limitar('relatorio')
 
 app_name = 'pessoas'
 
@@ -15,6 +20,7 @@ urlpatterns = [
 
     # Cadastros (listar / criar / detalhe)
     path('pessoas/', views.pessoa_list, name='pessoa_list'),
+    path('pessoas/linhas/', views.pessoa_list_linhas, name='pessoa_list_linhas'),
     path('pessoas/nova/', views.pessoa_create, name='pessoa_create'),
     path('pessoas/<int:pk>/', views.pessoa_detail, name='pessoa_detail'),
 
@@ -32,26 +38,30 @@ urlpatterns = [
     # Excluir
     path('pessoas/<int:pk>/excluir/', views.pessoa_delete, name='pessoa_delete'),
 
+    # Revisão de possíveis duplicados
+    path('cadastro/duplicados/', views.duplicados_revisao, name='duplicados_revisao'),
+
     # Filtros
-    path('filtros/homens/', views.filtro_homens, name='filtro_homens'),
-    path('filtros/mulheres/', views.filtro_mulheres, name='filtro_mulheres'),
-    path('filtros/mais-velha/', views.filtro_mais_velha, name='filtro_mais_velha'),
-    path('filtros/mais-nova/', views.filtro_mais_nova, name='filtro_mais_nova'),
-    path('filtros/menores/', views.filtro_menores, name='filtro_menores'),
-    path('filtros/acima-media/', views.filtro_acima_media, name='filtro_acima_media'),
-    path('filtros/aniversariantes/', views.filtro_aniversariantes_mes, name='filtro_aniversariantes_mes'),
+    path('filtros/homens/', relatorio(views.filtro_homens), name='filtro_homens'),
+    path('filtros/mulheres/', relatorio(views.filtro_mulheres), name='filtro_mulheres'),
+    path('filtros/mais-velha/', relatorio(views.filtro_mais_velha), name='filtro_mais_velha'),
+    path('filtros/mais-nova/', relatorio(views.filtro_mais_nova), name='filtro_mais_nova'),
+    path('filtros/menores/', relatorio(views.filtro_menores), name='filtro_menores'),
+    path('filtros/acima-media/', relatorio(views.filtro_acima_media), name='filtro_acima_media'),
+    path('filtros/aniversariantes/', relatorio(views.filtro_aniversariantes_mes), name='filtro_aniversariantes_mes'),
 
     # Estatísticas
-    path('estatisticas/total/', views.est_total_cadastros, name='est_total_cadastros'),
-    path('estatisticas/sexo/', views.est_homens_mulheres, name='est_homens_mulheres'),
-    path('estatisticas/media-idade/', views.est_media_idade, name='est_media_idade'),
-    path('estatisticas/maiores-menores/', views.est_maiores_menores, name='est_maiores_menores'),
-    path('estatisticas/faixa-etaria/', views.est_faixa_etaria, name='est_faixa_etaria'),
-    path('estatisticas/maior-menor-idade/', views.est_maior_menor_idade, name='est_maior_menor_idade'),
-    path('estatisticas/aniversariantes-mes/', views.est_aniversariantes_mes, name='est_aniversariantes_mes'),
+    path('estatisticas/total/', relatorio(views.est_total_cadastros), name='est_total_cadastros'),
+    path('estatisticas/sexo/', relatorio(views.est_homens_mulheres), name='est_homens_mulheres'),
+    path('estatisticas/media-idade/', relatorio(views.est_media_idade), name='est_media_idade'),
+    path('estatisticas/maiores-menores/', relatorio(views.est_maiores_menores), name='est_maiores_menores'),
+    path('estatisticas/faixa-etaria/', relatorio(views.est_faixa_etaria), name='est_faixa_etaria'),
+    path('estatisticas/maior-menor-idade/', relatorio(views.est_maior_menor_idade), name='est_maior_menor_idade'),
+    path('estatisticas/aniversariantes-mes/', relatorio(views.est_aniversariantes_mes), name='est_aniversariantes_mes'),
 
     # Exportação
-    path('exportacao/csv/', views.export_csv, name='export_csv'),
-    path('exportacao/xlsx/', views.export_xlsx, name='export_xlsx'),
-    path('exportacao/json/', views.export_json, name='export_json'),
+    path('exportacao/csv/', exportacao(views.export_csv), name='export_csv'),
+    path('exportacao/xlsx/', exportacao(views.export_xlsx), name='export_xlsx'),
+    path('exportacao/json/', exportacao(views.export_json), name='export_json'),
+    path('exportacao/alteracoes/', exportacao(views.export_alteracoes), name='export_alteracoes'),
 ]
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from datetime import date
+
+
+def years_ago(d: date, years: int) -> date:
+    """Retorna uma data equivalente a 'd - years', ajustando 29/02 quando necessário."""
+    try:
+        return d.replace(year=d.year - years)
+    except ValueError:
+        # Ex.: 29/02 -> 28/02
+        return d.replace(month=2, day=28, year=d.year - years)
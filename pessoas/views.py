@@ -1,20 +1,33 @@
 from __future__ import annotations
 
-import csv
-import json
+import calendar
+import gzip
+import operator
 import re
 from datetime import date
-from io import BytesIO
+from functools import reduce
 
+from django.conf import settings
 from django.contrib import messages
+from django.db import IntegrityError
 from django.db.models import Count, Q
 from django.db.models.functions import ExtractMonth
-from django.http import HttpResponse
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, urlencode
 
-from openpyxl import Workbook
-
+from .alteracoes import iter_ndjson, ultimo_seq
+from .cpf_lookup import get_cpf_lookup
+from .estaticos import aceita_encoding
+from .exportacao import FORMATOS, obter_snapshot
 from .forms import (
     BuscarCPFForm,
     MesForm,
@@ -25,7 +38,9 @@ from .forms import (
     EditarSexoForm,
     EditarCPFForm,
 )
-from .models import Pessoa
+from .models import CandidatoDuplicado, Pessoa, PessoaArquivo
+from .render import render_linhas
+from .utils import years_ago
 
 
 # -------------------------
@@ -34,13 +49,16 @@ from .models import Pessoa
 def normalize_cpf(value: str) -> str:
     return re.sub(r'\D+', '', value or '')
 
-def years_ago(d: date, years: int) -> date:
-    """Retorna uma data equivalente a 'd - years', ajustando 29/02 quando necessário."""
+def salvar_form_com_cpf(form):
+    """Salva o form; se outro processo gravou o mesmo CPF entre a validação e o
+    INSERT/UPDATE, a constraint única do banco barra e o erro volta para o form."""
     try:
-        return d.replace(year=d.year - years)
-    except ValueError:
-        # Ex.: 29/02 -> 28/02
-        return d.replace(month=2, day=28, year=d.year - years)
+        return form.save()
+    except IntegrityError:
+        form.add_error('cpf', 'Já existe uma pessoa cadastrada com este CPF.')
+        return None
+
+PAGINA_LISTA = 200
 
 def calc_media_idade(pessoas: list[Pessoa]) -> float:
     if not pessoas:
@@ -85,28 +103,78 @@ def menu_edicao_cadastro(request):
 # -------------------------
 def pessoa_list(request):
     q = (request.GET.get('q') or '').strip()
+    pessoas, proximo = _pagina_lista(_buscar_pessoas(q), request.GET)
+
+    context = {
+        'page_title': 'Todos os cadastros',
+        'page_subtitle': 'Lista completa de pessoas cadastradas',
+        'pessoas': pessoas,
+        'q': q,
+        'mais_url': _mais_url(q, proximo),
+    }
+    return _render_lista(request, context)
+
+def pessoa_list_linhas(request):
+    """Só as `<tr>` da próxima página da listagem (carregamento incremental).
+
+    O cabeçalho `X-Mais-Url` traz a URL da página seguinte (vazio no fim).
+    """
+    q = (request.GET.get('q') or '').strip()
+    pessoas, proximo = _pagina_lista(_buscar_pessoas(q), request.GET)
+    response = HttpResponse(render_linhas(pessoas))
+    response['X-Mais-Url'] = _mais_url(q, proximo)
+    return response
+
+def _buscar_pessoas(q: str):
     pessoas_qs = Pessoa.objects.all()
 
     if q:
         q_norm = normalize_cpf(q)
         if q_norm.isdigit() and len(q_norm) == 11:
-            pessoas_qs = pessoas_qs.filter(cpf=q_norm)
+            pk = get_cpf_lookup().buscar_pk(q_norm)
+            pessoas_qs = pessoas_qs.filter(pk=pk) if pk is not None else pessoas_qs.none()
         else:
             pessoas_qs = pessoas_qs.filter(Q(nome__icontains=q) | Q(sobrenome__icontains=q))
 
-    context = {
-        'page_title': 'Todos os cadastros',
-        'page_subtitle': 'Lista completa de pessoas cadastradas',
-        'pessoas': pessoas_qs.order_by('nome', 'sobrenome'),
-        'q': q,
-    }
+    return pessoas_qs.order_by('nome', 'sobrenome', 'pk')
+
+def _pagina_lista(pessoas_qs, params):
+    """Página por keyset (nome, sobrenome, pk): sem OFFSET, custo igual em qualquer página."""
+    try:
+        apos_pk = int(params.get('apos_pk') or 0)
+    except ValueError:
+        apos_pk = 0
+    if apos_pk:
+        nome, sobrenome = params.get('apos_nome', ''), params.get('apos_sobrenome', '')
+        # `nome >= ?` repete o que o OR já garante, mas é o que deixa o banco
+        # começar a leitura do índice em `nome` em vez de percorrê-lo desde o início.
+        pessoas_qs = pessoas_qs.filter(nome__gte=nome).filter(
+            Q(nome__gt=nome)
+            | Q(nome=nome, sobrenome__gt=sobrenome)
+            | Q(nome=nome, sobrenome=sobrenome, pk__gt=apos_pk)
+        )
+
+    pessoas = list(pessoas_qs[:PAGINA_LISTA + 1])
+    if len(pessoas) <= PAGINA_LISTA:
+        return pessoas, None
+    pessoas = pessoas[:PAGINA_LISTA]
+    ultima = pessoas[-1]
+    return pessoas, {'apos_nome': ultima.nome, 'apos_sobrenome': ultima.sobrenome, 'apos_pk': ultima.pk}
+
+def _mais_url(q: str, proximo: dict | None) -> str:
+    if not proximo:
+        return ''
+    return reverse('pessoas:pessoa_list_linhas') + '?' + urlencode({'q': q, **proximo})
+
+def _render_lista(request, context: dict):
+    """Renderiza `pessoas_list.html` com as linhas já montadas (cache por linha)."""
+    context['linhas'] = render_linhas(context['pessoas'])
     return render(request, 'pessoas/pessoas_list.html', context)
 
 def pessoa_create(request):
     if request.method == 'POST':
         form = PessoaForm(request.POST)
-        if form.is_valid():
-            pessoa = form.save()
+        if form.is_valid() and (pessoa := salvar_form_com_cpf(form)):
             messages.success(request, '✅ Pessoa cadastrada com sucesso!')
             return redirect('pessoas:pessoa_detail', pk=pessoa.pk)
         messages.error(request, '❌ Corrija os erros do formulário.')
@@ -137,15 +205,15 @@ def buscar_por_cpf(request):
         form = BuscarCPFForm(request.POST)
         if form.is_valid():
             cpf = form.cleaned_data['cpf']
-            pessoa = Pessoa.objects.filter(cpf=cpf).first()
-            if pessoa:
+            pk = get_cpf_lookup().buscar_pk(cpf)
+            if pk is not None:
                 messages.success(request, '✅ Cadastro encontrado!')
 
                 if destino == 'editar':
-                    return redirect('pessoas:pessoa_edicao_menu', pk=pessoa.pk)
+                    return redirect('pessoas:pessoa_edicao_menu', pk=pk)
                 if destino == 'excluir':
-                    return redirect('pessoas:pessoa_delete', pk=pessoa.pk)
-                return redirect('pessoas:pessoa_detail', pk=pessoa.pk)
+                    return redirect('pessoas:pessoa_delete', pk=pk)
+                return redirect('pessoas:pessoa_detail', pk=pk)
 
             messages.error(request, '❌ CPF não encontrado.')
     else:
@@ -173,8 +241,7 @@ def _editar_campo(request, pk: int, form_class, titulo: str, sucesso_msg: str):
 
     if request.method == 'POST':
         form = form_class(request.POST, instance=pessoa)
-        if form.is_valid():
-            form.save()
+        if form.is_valid() and salvar_form_com_cpf(form):
             messages.success(request, sucesso_msg)
             return redirect('pessoas:pessoa_detail', pk=pessoa.pk)
         messages.error(request, '❌ Corrija os erros do formulário.')
@@ -222,6 +289,38 @@ def pessoa_delete(request, pk: int):
     })
 
 
+# -------------------------
+# Revisão de duplicados (gerados por `manage.py find_duplicates`)
+# -------------------------
+def duplicados_revisao(request):
+    if request.method == 'POST':
+        candidato_id = request.POST.get('candidato', '')
+        if not candidato_id.isdigit():
+            messages.error(request, '❌ Par inválido.')
+            return redirect('pessoas:duplicados_revisao')
+        candidato = get_object_or_404(CandidatoDuplicado, pk=int(candidato_id))
+        acao = request.POST.get('acao')
+        if acao == 'confirmar':
+            candidato.status = CandidatoDuplicado.STATUS_CONFIRMADO
+            messages.success(request, '✅ Par marcado como duplicado.')
+        elif acao == 'descartar':
+            candidato.status = CandidatoDuplicado.STATUS_DESCARTADO
+            messages.info(request, 'ℹ️ Par descartado: não será sugerido novamente.')
+        candidato.save(update_fields=['status'])
+        return redirect('pessoas:duplicados_revisao')
+
+    candidatos = (
+        CandidatoDuplicado.objects
+        .filter(status=CandidatoDuplicado.STATUS_PENDENTE)
+        .select_related('pessoa_a', 'pessoa_b')
+        .order_by('-score')[:200]
+    )
+    return render(request, 'pessoas/duplicados_revisao.html', {
+        'page_title': 'Revisar possíveis duplicados',
+        'candidatos': candidatos,
+    })
+
+
 # -------------------------
 # Menus: Filtros / Estatísticas / Exportação
 # -------------------------
@@ -240,7 +339,7 @@ def menu_exportacao(request):
 # -------------------------
 def filtro_homens(request):
     pessoas = Pessoa.objects.filter(sexo=Pessoa.SEXO_MASC).order_by('nome', 'sobrenome')
-    return render(request, 'pessoas/pessoas_list.html', {
+    return _render_lista(request, {
         'page_title': 'Exibir todos os Homens',
         'page_subtitle': 'Filtro: sexo masculino',
         'pessoas': pessoas,
@@ -249,7 +348,7 @@ def filtro_homens(request):
 
 def filtro_mulheres(request):
     pessoas = Pessoa.objects.filter(sexo=Pessoa.SEXO_FEM).order_by('nome', 'sobrenome')
-    return render(request, 'pessoas/pessoas_list.html', {
+    return _render_lista(request, {
         'page_title': 'Exibir todas as mulheres',
         'page_subtitle': 'Filtro: sexo feminino',
         'pessoas': pessoas,
@@ -280,7 +379,7 @@ def filtro_menores(request):
     hoje = date.today()
     corte = years_ago(hoje, 18)  # nasceu depois disso => menor de 18
     pessoas = Pessoa.objects.filter(data_nascimento__gt=corte).order_by('data_nascimento')
-    return render(request, 'pessoas/pessoas_list.html', {
+    return _render_lista(request, {
         'page_title': 'Exibir pessoas com menos de 18 anos',
         'page_subtitle': f'Corte: nascidos após {corte.strftime("%d/%m/%Y")}',
         'pessoas': pessoas,
@@ -292,12 +391,31 @@ def filtro_acima_media(request):
     media = calc_media_idade(pessoas)
     acima = [p for p in pessoas if p.idade > media]
     acima.sort(key=lambda p: (-p.idade, p.nome))
-    return render(request, 'pessoas/pessoas_list.html', {
+    return _render_lista(request, {
         'page_title': 'Exibir pessoas com idade acima da média de idade',
         'page_subtitle': f'Média atual: {media} anos',
         'pessoas': acima,
     })
 
+def _aniversariantes(mes: int) -> list[Pessoa]:
+    """Nascidos no `mes` de qualquer ano, ordenados pela data de nascimento.
+
+    `data_nascimento__month` aplica uma função sobre a coluna e varre a tabela;
+    uma faixa de datas por ano usa o índice de `data_nascimento`.
+    """
+    datas = Pessoa.objects.order_by('data_nascimento').values_list('data_nascimento', flat=True)
+    primeira, ultima = datas.first(), datas.last()
+    if primeira is None:
+        return []
+    faixas = [
+        Q(data_nascimento__range=(date(ano, mes, 1), date(ano, mes, calendar.monthrange(ano, mes)[1])))
+        for ano in range(primeira.year, ultima.year + 1)
+    ]
+    # Sem ORDER BY no SQL: com ele o SQLite prefere varrer o índice inteiro já ordenado.
+    pessoas = list(Pessoa.objects.filter(reduce(operator.or_, faixas)).order_by())
+    pessoas.sort(key=lambda p: (p.data_nascimento, p.pk))
+    return pessoas
+
 def filtro_aniversariantes_mes(request):
     form = MesForm(request.POST or None)
     pessoas = None
@@ -305,8 +423,8 @@ def filtro_aniversariantes_mes(request):
 
     if request.method == 'POST' and form.is_valid():
         mes_escolhido = int(form.cleaned_data['mes'])
-        pessoas = Pessoa.objects.filter(data_nascimento__month=mes_escolhido).order_by('data_nascimento')
-        if not pessoas.exists():
+        pessoas = _aniversariantes(mes_escolhido)
+        if not pessoas:
             messages.info(request, 'ℹ️ Não há aniversariantes neste mês.')
 
     return render(request, 'pessoas/aniversariantes_mes.html', {
@@ -419,69 +537,78 @@ def est_aniversariantes_mes(request):
 # -------------------------
 # Exportação (equivalente ao CLI)
 # -------------------------
-def _pessoas_to_rows():
-    pessoas = Pessoa.objects.all().order_by('nome', 'sobrenome')
-    for p in pessoas:
-        yield {
-            'nome': p.nome,
-            'sobrenome': p.sobrenome,
-            'data_nascimento': p.data_nascimento.strftime('%d/%m/%Y'),
-            'sexo': p.sexo_extenso,
-            'cpf': (p.cpf or '').zfill(11),
-            'idade': p.idade,
-        }
+def _aceita_gzip(request) -> bool:
+    return aceita_encoding(request.headers.get('Accept-Encoding', ''), 'gzip')
 
-def export_csv(request):
-    dados = list(_pessoas_to_rows())
-    if not dados:
+def _servir_export(request, formato: str, filename: str):
+    """Serve o snapshot da versão atual dos dados (gerado uma vez, reaproveitado por todos).
+
+    `?arquivo=1` inclui os cadastros arquivados (coluna `arquivado`).
+    """
+    incluir_arquivo = request.GET.get('arquivo') == '1'
+    if not Pessoa.objects.exists() and not (incluir_arquivo and PessoaArquivo.objects.exists()):
         messages.error(request, '❌ Não há cadastros para exportar.')
         return redirect('pessoas:menu_exportacao')
 
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="pessoas.csv"'
+    caminho, versao = obter_snapshot(formato, incluir_arquivo)
+    content_type, comprimido = FORMATOS[formato]
+    if incluir_arquivo:
+        filename = filename.replace('pessoas.', 'pessoas_completo.')
+    # Arquivo .gz só vai como está se o cliente aceitar gzip.
+    envia_arquivo = not comprimido or _aceita_gzip(request)
+    # ETag forte = bytes idênticos: a versão gzip e a descomprimida têm ETags diferentes.
+    sufixos = ('-arquivo' if incluir_arquivo else '') + ('-gzip' if comprimido and envia_arquivo else '')
+    etag = f'"{formato}-{versao}{sufixos}"'
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif envia_arquivo and settings.EXPORT_SENDFILE:
+        # O proxy (nginx/Apache) lê o arquivo do disco e envia os bytes; o worker fica livre.
+        response = HttpResponse(content_type=content_type)
+        if settings.EXPORT_SENDFILE == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.EXPORT_SENDFILE_PREFIX + caminho.name
+        else:
+            response['X-Sendfile'] = str(caminho)
+    elif envia_arquivo:
+        response = FileResponse(open(caminho, 'rb'), content_type=content_type)
+    else:
+        # Cliente sem gzip: descomprime em streaming, sem carregar o arquivo inteiro.
+        response = StreamingHttpResponse(_ler_gzip(caminho), content_type=content_type)
+
+    if comprimido and envia_arquivo:
+        response['Content-Encoding'] = 'gzip'
+    if comprimido:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
-    writer = csv.writer(response, delimiter=';')
-    writer.writerow(dados[0].keys())
-    for row in dados:
-        writer.writerow([row[k] for k in dados[0].keys()])
+def _ler_gzip(caminho, bloco: int = 64 * 1024):
+    with gzip.open(caminho, 'rb') as fh:
+        while dados := fh.read(bloco):
+            yield dados
 
-    return response
+def export_csv(request):
+    return _servir_export(request, 'csv', 'pessoas.csv')
 
 def export_json(request):
-    dados = list(_pessoas_to_rows())
-    if not dados:
-        messages.error(request, '❌ Não há cadastros para exportar.')
-        return redirect('pessoas:menu_exportacao')
-
-    response = HttpResponse(
-        json.dumps(dados, ensure_ascii=False, indent=2),
-        content_type='application/json; charset=utf-8'
-    )
-    response['Content-Disposition'] = 'attachment; filename="pessoas.json"'
-    return response
+    return _servir_export(request, 'json', 'pessoas.json')
 
 def export_xlsx(request):
-    dados = list(_pessoas_to_rows())
-    if not dados:
-        messages.error(request, '❌ Não há cadastros para exportar.')
-        return redirect('pessoas:menu_exportacao')
+    return _servir_export(request, 'xlsx', 'pessoas.xlsx')
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Pessoas'
+def export_alteracoes(request):
+    """Alterações posteriores ao cursor `?desde=<seq>`, em NDJSON (uma por linha).
 
-    headers = list(dados[0].keys())
-    ws.append(headers)
-    for row in dados:
-        ws.append([row[h] for h in headers])
-
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
+    O cabeçalho `X-Cursor` traz o seq a usar na próxima chamada.
+    """
+    try:
+        desde = int(request.GET.get('desde') or 0)
+    except ValueError:
+        return HttpResponseBadRequest('Parâmetro "desde" deve ser um número inteiro.')
 
-    response = HttpResponse(
-        buffer.getvalue(),
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="pessoas.xlsx"'
+    ate = ultimo_seq()
+    response = StreamingHttpResponse(iter_ndjson(desde, ate), content_type='application/x-ndjson; charset=utf-8')
+    response['X-Cursor'] = str(max(ate, desde))
     return response
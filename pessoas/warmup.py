@@ -0,0 +1,87 @@
+"""Aquecimento do worker antes de receber tráfego.
+
+O primeiro request de um worker novo paga: compilar templates, montar o
+resolver de URLs, abrir a conexão com o banco e carregar o filtro de CPFs.
+`aquecer()` faz isso no boot (chamado por `wsgi.py`/`asgi.py` quando
+`WARMUP_ON_START = True`, ou à mão pelo comando `warmup`).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def _templates() -> int:
+    pasta = Path(apps.get_app_config('pessoas').path) / 'templates'
+    nomes = [p.relative_to(pasta).as_posix() for p in pasta.rglob('*.html')]
+    for nome in nomes:
+        get_template(nome)  # o loader em cache guarda o template compilado
+    return len(nomes)
+
+
+def _urls() -> int:
+    resolver = get_resolver()
+    total = 0
+    for nome, _padroes in resolver.namespace_dict['pessoas'][1].reverse_dict.lists():
+        if not isinstance(nome, str):
+            continue
+        try:
+            reverse(f'pessoas:{nome}')
+        except NoReverseMatch:
+            reverse(f'pessoas:{nome}', args=[1])
+        total += 1
+    resolver.resolve('/')
+    return total
+
+
+def _banco() -> int:
+    for conexao in connections.all():
+        with conexao.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    return len(connections.all())
+
+
+def _cpf_lookup() -> int:
+    from .cpf_lookup import get_cpf_lookup
+
+    lookup = get_cpf_lookup()
+    lookup.carregar()
+    return lookup.stats().get('bloom_itens', 0)
+
+
+ETAPAS = (
+    ('templates', _templates),
+    ('urls', _urls),
+    ('banco', _banco),
+    ('cpf_lookup', _cpf_lookup),
+)
+
+
+def aquecer(fechar_conexoes: bool = False) -> dict[str, tuple[int, float]]:
+    """Executa as etapas e devolve {etapa: (itens, segundos)}.
+
+    Use `fechar_conexoes=True` quando o aquecimento roda no processo mestre antes
+    do fork (ex.: gunicorn --preload): conexões não podem ser herdadas pelos workers.
+    """
+    resultado = {}
+    for nome, etapa in ETAPAS:
+        inicio = time.perf_counter()
+        try:
+            itens = etapa()
+        except Exception:  # aquecimento nunca deve impedir o worker de subir
+            logger.exception('Falha no aquecimento (%s)', nome)
+            itens = -1
+        resultado[nome] = (itens, time.perf_counter() - inicio)
+    if fechar_conexoes:
+        connections.close_all()
+    logger.info('Worker aquecido: %s', {k: f'{v[1] * 1000:.1f}ms' for k, v in resultado.items()})
+    return resultado